@@ -1,4 +1,8 @@
+from typing import Optional
+
 from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
 
 from .extensions import db, login_manager, csrf, limiter
 from .config import Config
@@ -6,6 +10,10 @@ from .security import set_csp_nonce, set_security_headers
 from .blueprints.main import bp as main_bp
 from .blueprints.admin import bp_admin as admin_bp
 
+# 与 simple_notes.bootstrap 相同：app_settings 中记录结构版本号，模型结构变化时递增
+SCHEMA_VERSION = 1
+SCHEMA_VERSION_KEY = 'schema_version'
+
 
 def create_app() -> Flask:
     app = Flask(__name__, static_folder='static', template_folder='templates')
@@ -43,28 +51,62 @@ def create_app() -> Flask:
     for rule, endpoint, target, methods in alias_rules:
         app.add_url_rule(rule, endpoint=endpoint, view_func=vf[target], methods=methods)
 
+    from .cli import register_commands
+    register_commands(app)
+
+    # 建表与管理员初始化由 bootstrap 命令完成；启动时只用一条查询比对结构版本号
     with app.app_context():
-        db.create_all()
-        # Bootstrap default admin(s) and persist admin list
-        try:
-            from .services.admin_service import AdminService
-            from .models import User, AppSetting
-            from werkzeug.security import generate_password_hash
-            # Persist initial admin list if not set yet
-            if not AppSetting.query.filter_by(key='admin_users').first():
-                initial_admins = set(app.config.get('ADMIN_USERS', set()))
-                if initial_admins:
-                    AdminService().set_admin_users(initial_admins)
-            admin_users = AdminService().get_admin_users()
-            default_pw = app.config.get('ADMIN_DEFAULT_PASSWORD', 'ChangeMe123!')
-            for uname in admin_users:
-                if not User.query.filter_by(username=uname).first():
-                    u = User(username=uname, email=f"{uname}@local", password_hash=generate_password_hash(default_pw))
-                    db.session.add(u)
-            db.session.commit()
-        except Exception:
-            # Avoid startup failure due to bootstrap issues; log in server output
-            import traceback
-            traceback.print_exc()
-
-    return app
\ No newline at end of file
+        check_schema(app)
+
+    return app
+
+
+def schema_version() -> Optional[int]:
+    """数据库中记录的结构版本号；表不存在或未记录时返回 None"""
+    try:
+        with db.engine.connect() as conn:
+            value = conn.execute(
+                text('SELECT value FROM app_settings WHERE key = :key'), {'key': SCHEMA_VERSION_KEY}
+            ).scalar()
+    except (OperationalError, ProgrammingError):
+        return None
+    return int(value) if value is not None else None
+
+
+def check_schema(app: Flask) -> bool:
+    """版本不一致时按 AUTO_BOOTSTRAP 自动初始化或记录警告"""
+    version = schema_version()
+    if version == SCHEMA_VERSION:
+        return True
+    if app.config.get('AUTO_BOOTSTRAP'):
+        bootstrap(app)
+        return True
+    app.logger.warning('数据库结构版本为 %s，应为 %s；请先执行 flask bootstrap', version, SCHEMA_VERSION)
+    return False
+
+
+def bootstrap(app: Flask) -> None:
+    """建表并创建初始管理员，最后记录结构版本号（可重复执行）"""
+    db.create_all()
+    # Bootstrap default admin(s) and persist admin list
+    try:
+        from .services.admin_service import AdminService
+        from .models import User, AppSetting
+        from werkzeug.security import generate_password_hash
+        # Persist initial admin list if not set yet
+        if not AppSetting.query.filter_by(key='admin_users').first():
+            initial_admins = set(app.config.get('ADMIN_USERS', set()))
+            if initial_admins:
+                AdminService().set_admin_users(initial_admins)
+        admin_users = AdminService().get_admin_users()
+        default_pw = app.config.get('ADMIN_DEFAULT_PASSWORD', 'ChangeMe123!')
+        for uname in admin_users:
+            if not User.query.filter_by(username=uname).first():
+                u = User(username=uname, email=f"{uname}@local", password_hash=generate_password_hash(default_pw))
+                db.session.add(u)
+        db.session.merge(AppSetting(key=SCHEMA_VERSION_KEY, value=str(SCHEMA_VERSION)))
+        db.session.commit()
+    except Exception:
+        # Avoid startup failure due to bootstrap issues; log in server output
+        import traceback
+        traceback.print_exc()
@@ -1,11 +1,10 @@
 import click
-from diary_app import create_app
-import os
+from flask.cli import FlaskGroup
+
+
+def register_commands(app):
+    """注册命令行命令（由 create_app 调用，flask --app diary_app 与 main() 都能找到）"""
 
-def main():
-    """日记Web应用的命令行入口"""
-    app = create_app(config_name=os.environ.get('FLASK_ENV', 'development'))
-    
     @app.cli.command("init-db")
     def init_db():
         """初始化数据库"""
@@ -34,6 +33,13 @@ def main():
         db.session.commit()
         click.echo("数据库初始化完成！")
     
+    @app.cli.command("bootstrap")
+    def bootstrap_db():
+        """建表并创建初始管理员（每次部署执行一次）"""
+        from diary_app import bootstrap
+        bootstrap(app)
+        click.echo("数据库初始化完成！")
+    
     @app.cli.command("create-admin")
     @click.argument("username")
     @click.password_option()
@@ -75,9 +81,14 @@ def main():
     def run_dev(host, port):
         """运行开发服务器"""
         app.run(host=host, port=port, debug=True)
-    
-    # 运行Flask命令行接口
-    app.cli()
+
+
+def main():
+    """日记Web应用的命令行入口"""
+    from diary_app import create_app
+
+    # 运行Flask命令行接口；应用在执行命令时才创建
+    FlaskGroup(create_app=create_app)()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -12,6 +12,10 @@ class Config:
 
     LOGIN_RATE_LIMIT = os.getenv("LOGIN_RATE_LIMIT", "10 per minute")
 
+    # Run bootstrap automatically when the schema version is missing/outdated at startup (default on);
+    # set AUTO_BOOTSTRAP=0 in deployments that run `flask bootstrap` once per release
+    AUTO_BOOTSTRAP = os.getenv("AUTO_BOOTSTRAP", "1") == "1"
+
     @staticmethod
     def build_database_url(instance_path: str) -> str:
         database_url = os.getenv("DATABASE_URL")
@@ -41,6 +45,7 @@ class Config:
         app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
         app.config["LOGIN_RATE_LIMIT"] = cls.LOGIN_RATE_LIMIT
+        app.config["AUTO_BOOTSTRAP"] = cls.AUTO_BOOTSTRAP
 
         # Admin settings via env: comma-separated usernames
         admin_users = set(
@@ -10,7 +10,7 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(50), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     # 角色由配置控制（ADMIN_USERS），避免迁移破坏现有表结构
 
     notes = db.relationship('NoteEntry', backref='user', lazy=True, cascade="all, delete-orphan")
@@ -23,6 +23,12 @@ class User(UserMixin, db.Model):
 
 class NoteEntry(db.Model):
     __tablename__ = 'note_entries'
+    __table_args__ = (
+        # 按用户筛选并按 created_at DESC, id DESC 排序/游标翻页
+        db.Index('ix_note_entries_user_created', 'user_id', 'created_at', 'id'),
+        # 管理员跨用户按时间列表
+        db.Index('ix_note_entries_created', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -1,23 +1,50 @@
-from flask import Flask
+import time
 
-from simple_notes.extensions import db, login_manager, csrf, limiter
-from simple_notes.config import Config
-from simple_notes.security import set_csp_nonce, set_security_headers
-from simple_notes.blueprints.main import bp as main_bp
-from simple_notes.blueprints.admin import bp_admin as admin_bp
+# 导入 simple_notes 的任何子模块都会先执行本文件，因此这里不在模块级导入扩展、蓝图与服务；
+# 它们在 create_app 中导入（计入启动报告的 import 阶段），维护脚本与 CLI 只加载用到的模块
 
 
-def create_app() -> Flask:
+def create_app():
+    started = time.perf_counter()
+    from flask import Flask
+
+    from simple_notes.extensions import db, login_manager, csrf, limiter
+    from simple_notes.config import Config
+    from simple_notes.security import set_csp_nonce, set_security_headers
+    from simple_notes.sessions import init_sessions
+    from simple_notes.templating import init_template_cache
+    from simple_notes.assets import init_assets
+    from simple_notes.stylesheets import init_stylesheets
+    from simple_notes.compression import init_compression
+    from simple_notes.metrics import StartupTimer, init_sql_counter
+    from simple_notes.engine import init_engine
+    from simple_notes.routing import init_replicas
+    from simple_notes.sharding import init_shards
+    from simple_notes.bootstrap import check_schema
+    from simple_notes.blueprints.main import bp as main_bp
+    from simple_notes.blueprints.admin import bp_admin as admin_bp
+
+    timer = StartupTimer(import_seconds=time.perf_counter() - started)
     app = Flask(__name__, static_folder='static', template_folder='templates')
 
     # Apply config
     Config.apply(app)
+    init_template_cache(app)
+    init_assets(app)
+    init_stylesheets(app)
+    timer.mark('config')
 
     # Init extensions
+    init_sessions(app)
     db.init_app(app)
+    with app.app_context():
+        init_engine(app, [*db.engines.values(), *init_replicas(app), *init_shards(app)])
     login_manager.init_app(app)
     csrf.init_app(app)
     limiter.init_app(app)
+    init_sql_counter(app)
+    init_compression(app)
+    timer.mark('extensions')
 
     # Security hooks
     app.before_request(set_csp_nonce)
@@ -43,28 +70,12 @@ def create_app() -> Flask:
     for rule, endpoint, target, methods in alias_rules:
         app.add_url_rule(rule, endpoint=endpoint, view_func=vf[target], methods=methods)
 
+    timer.mark('blueprints')
+
+    # 建表与管理员初始化由 simple-notes bootstrap 完成，这里只用一条查询检查结构版本
     with app.app_context():
-        db.create_all()
-        # Bootstrap default admin(s) and persist admin list
-        try:
-            from .services.admin_service import AdminService
-            from .models import User, AppSetting
-            from werkzeug.security import generate_password_hash
-            # Persist initial admin list if not set yet
-            if not AppSetting.query.filter_by(key='admin_users').first():
-                initial_admins = set(app.config.get('ADMIN_USERS', set()))
-                if initial_admins:
-                    AdminService().set_admin_users(initial_admins)
-            admin_users = AdminService().get_admin_users()
-            default_pw = app.config.get('ADMIN_DEFAULT_PASSWORD', 'ChangeMe123!')
-            for uname in admin_users:
-                if not User.query.filter_by(username=uname).first():
-                    u = User(username=uname, email=f"{uname}@local", password_hash=generate_password_hash(default_pw))
-                    db.session.add(u)
-            db.session.commit()
-        except Exception:
-            # Avoid startup failure due to bootstrap issues; log in server output
-            import traceback
-            traceback.print_exc()
+        check_schema(app)
+    timer.mark('db_check')
+    timer.report(app)
 
     return app
\ No newline at end of file
@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from typing import Dict, Optional
+
+from flask import Flask, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+"""
+静态文件指纹与预压缩
+
+- simple-notes build-assets 把 static/ 下的文件按内容哈希复制到 ASSET_BUILD_DIR（默认 instance/assets），
+  文件名形如 base.<哈希>.css，并写出 .gz 与 .br（需要安装 brotli）压缩副本和 manifest.json
+- CSS 中 url(...) 引用的文件先改写为带哈希的文件名，再计算 CSS 自身的哈希
+- 应用启动时读取 manifest.json：url_for('static', ...) 生成带哈希的地址；这些文件以
+  Cache-Control: public, max-age=ASSET_MAX_AGE, immutable 发送，并按 Accept-Encoding 选择预压缩副本
+- 未构建或不在清单中的文件仍由 static/ 目录按原样提供
+"""
+
+MANIFEST_NAME = 'manifest.json'
+# 已压缩的格式（woff2、图片）不再生成压缩副本
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.html', '.xml')
+# 只是源文件，不对外提供
+SKIPPED = ('.less',)
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：未安装时只生成 .gz
+    brotli = None
+
+
+def build_dir(app: Flask) -> str:
+    return app.config.get('ASSET_BUILD_DIR') or os.path.join(app.instance_path, 'assets')
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    """在扩展名前插入内容哈希：css/base.css -> css/base.<12位哈希>.css"""
+    stem, ext = posixpath.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def rewrite_css_urls(name: str, css: str, manifest: Dict[str, str]) -> str:
+    """把 CSS 中指向本地静态文件的 url(...) 改写为带哈希的文件名（查询串由哈希取代）"""
+    base = posixpath.dirname(name)
+
+    def replace(match):
+        quote, url = match.group(1), match.group(2).strip()
+        if url.startswith(('data:', '#', '/')) or '://' in url:
+            return match.group(0)
+        path, _, fragment = url.partition('#')
+        path = path.split('?', 1)[0]
+        target = posixpath.normpath(posixpath.join(base, path))
+        if target not in manifest:
+            return match.group(0)
+        rewritten = posixpath.relpath(manifest[target], base or '.')
+        if not rewritten.startswith('.'):
+            rewritten = './' + rewritten
+        return f'url({quote}{rewritten}{"#" + fragment if fragment else ""}{quote})'
+
+    return CSS_URL.sub(replace, css)
+
+
+def _write(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def build_assets(app: Flask) -> dict:
+    """生成带哈希的静态文件、压缩副本与清单，返回各类字节数统计
+
+    旧的哈希文件保留在构建目录中，部署切换期间仍引用旧页面的客户端可以继续下载。
+    """
+    source, target = app.static_folder, build_dir(app)
+    names = []
+    for root, _dirs, files in os.walk(source):
+        for filename in sorted(files):
+            if filename.endswith(SKIPPED):
+                continue
+            names.append(posixpath.join(*os.path.relpath(os.path.join(root, filename), source).split(os.sep)))
+    # CSS 最后处理，其中引用的字体与图片此时已有哈希名
+    names.sort(key=lambda n: (n.endswith('.css'), n))
+
+    manifest: Dict[str, str] = {}
+    stats = {'files': 0, 'original': 0, 'gzip': 0, 'brotli': 0, 'brotli_available': brotli is not None}
+    for name in names:
+        with open(os.path.join(source, name), 'rb') as f:
+            content = f.read()
+        if name.endswith('.css'):
+            content = rewrite_css_urls(name, content.decode('utf-8'), manifest).encode('utf-8')
+        hashed = manifest[name] = hashed_name(name, content)
+        path = os.path.join(target, hashed)
+        _write(path, content)
+        stats['files'] += 1
+        stats['original'] += len(content)
+        gz = br = content
+        if name.endswith(COMPRESSIBLE):
+            gz = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(gz) < len(content):
+                _write(path + '.gz', gz)
+            if brotli is not None:
+                br = brotli.compress(content, quality=11)
+                if len(br) < len(content):
+                    _write(path + '.br', br)
+        stats['gzip'] += min(len(gz), len(content))
+        stats['brotli'] += min(len(br), len(content))
+
+    _write(os.path.join(target, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return stats
+
+
+def load_manifest(app: Flask) -> Optional[Dict[str, str]]:
+    path = os.path.join(build_dir(app), MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def send_static(filename: str):
+    """静态文件视图：带哈希的文件从构建目录发送（长期缓存、预压缩），其余交给 static/"""
+    directory = current_app.extensions.get('asset_build_dir')
+    path = safe_join(directory, filename) if directory else None
+    if path is None or not os.path.isfile(path):
+        return current_app.send_static_file(filename)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[coding] and os.path.isfile(path + suffix):
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype)
+            response.content_encoding = coding
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('ASSET_MAX_AGE', 31536000)
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app: Flask) -> None:
+    """读取构建清单；存在时让 url_for('static') 生成带哈希的地址，并接管 static 视图"""
+    manifest = load_manifest(app)
+    if manifest is None:
+        return
+    app.extensions['asset_manifest'] = manifest
+    app.extensions['asset_build_dir'] = build_dir(app)
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.get(values['filename'], values['filename'])
+
+    app.view_functions['static'] = send_static
@@ -1,10 +1,12 @@
-from flask import Blueprint, jsonify, request, abort, current_app, render_template
+from flask import Blueprint, jsonify, request, abort, current_app, render_template, url_for
 from flask_login import login_required, current_user
 
 from simple_notes.services.admin_service import AdminService
 from simple_notes.repositories.user_repo import UserRepository
-from simple_notes.repositories.note_repo import NoteRepository
+from simple_notes.repositories.note_repo import NoteRepository, SHARDED_PAGE_WINDOW
+from simple_notes.repositories.settings_repo import get_settings
 from simple_notes.models import User, NoteEntry
+from simple_notes.sharding import get_shard_map
 
 bp_admin = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -29,6 +31,7 @@ def api_list_users():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     pagination = get_admin_service().list_users(page=page, per_page=per_page)
+    lock_threshold = get_settings().get('login_attempts_limit')
     return jsonify({
         'page': pagination.page,
         'pages': pagination.pages,
@@ -39,7 +42,7 @@ def api_list_users():
                 'username': u.username,
                 'email': u.email,
                 'created_at': u.created_at.isoformat(),
-                'locked': bool(u.security_profile and ((u.security_profile.failed_count or 0) >= 3)),
+                'locked': bool(u.security_profile and ((u.security_profile.failed_count or 0) >= lock_threshold)),
             } for u in pagination.items
         ]
     })
@@ -64,25 +67,48 @@ def api_unlock_user(user_id):
 @login_required
 def api_list_entries():
     require_admin()
-    page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     user_id = request.args.get('user_id', type=int)
-    pagination = get_admin_service().list_entries(page=page, per_page=per_page, user_id=user_id)
+    if 'page' in request.args:
+        # 兼容旧的页码分页
+        page = request.args.get('page', 1, type=int)
+        if not user_id and get_shard_map().sharded and page * per_page > SHARDED_PAGE_WINDOW:
+            # 多分片时深页需要每个分片各读 page * per_page 行
+            return jsonify({'ok': False, 'message': f'多分片时页码分页只支持前 {SHARDED_PAGE_WINDOW} 条，请改用游标分页（after/before）'}), 400
+        pagination = get_admin_service().list_entries(page=page, per_page=per_page, user_id=user_id)
+        return jsonify({
+            'page': pagination.page,
+            'pages': pagination.pages,
+            'total': pagination.total,
+            'items': [_entry_to_dict(e) for e in pagination.items]
+        })
+    pagination = get_admin_service().list_entries_keyset(
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=per_page,
+        user_id=user_id,
+    )
     return jsonify({
-        'page': pagination.page,
-        'pages': pagination.pages,
-        'total': pagination.total,
-        'items': [
-            {
-                'id': e.id,
-                'user_id': e.user_id,
-                'title': e.title,
-                'created_at': e.created_at.isoformat(),
-                'updated_at': e.updated_at.isoformat(),
-            } for e in pagination.items
-        ]
+        'per_page': pagination.per_page,
+        'next_cursor': pagination.next_cursor,
+        'prev_cursor': pagination.prev_cursor,
+        'next': url_for('admin.api_list_entries', after=pagination.next_cursor, per_page=per_page, user_id=user_id) if pagination.has_next else None,
+        'prev': url_for('admin.api_list_entries', before=pagination.prev_cursor, per_page=per_page, user_id=user_id) if pagination.has_prev else None,
+        'items': [_entry_to_dict(e) for e in pagination.items]
     })
 
+def _entry_to_dict(e: NoteEntry) -> dict:
+    return {
+        'id': e.id,
+        'user_id': e.user_id,
+        'title': e.title,
+        'excerpt': e.excerpt,
+        'word_count': e.word_count,
+        'char_count': e.char_count,
+        'created_at': e.created_at.isoformat(),
+        'updated_at': e.updated_at.isoformat(),
+    }
+
 @bp_admin.route('/api/entries/<int:entry_id>', methods=['DELETE'])
 @login_required
 def api_delete_entry(entry_id):
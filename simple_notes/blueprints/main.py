@@ -1,31 +1,60 @@
 from datetime import datetime, timedelta
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, g, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, g, current_app, make_response
 from flask_login import login_user, login_required, logout_user, current_user, UserMixin
 
 from simple_notes.extensions import db, login_manager, limiter
 from simple_notes.forms import RegisterForm, LoginForm, NoteForm
+from simple_notes.cache import TTLCache
+from simple_notes.conditional import conditional_response, is_not_modified, page_validators
+from simple_notes.hashing import HashingBusy
 from simple_notes.models import User, NoteEntry
+from simple_notes.repositories.user_repo import UserRepository
+from simple_notes.repositories.settings_repo import get_settings
 from simple_notes.services.auth_service import AuthService
 from simple_notes.services.note_service import NoteService
+from simple_notes.services.identity_service import load_identity
 from flask import session
 
 bp = Blueprint('main', __name__)
-auth_service = AuthService()
-note_service = NoteService()
+
+# 服务在第一次请求使用时才创建
+_auth_service = None
+_note_service = None
+
+
+def get_auth_service() -> AuthService:
+    global _auth_service
+    if _auth_service is None:
+        _auth_service = AuthService()
+    return _auth_service
+
+
+def get_note_service() -> NoteService:
+    global _note_service
+    if _note_service is None:
+        _note_service = NoteService()
+    return _note_service
+
 
 # Helper to fetch admin contact emails from configured admin usernames
 def _get_admin_contact_email() -> str:
-    admins = current_app.config.get('ADMIN_USERS', set()) or set()
-    emails = []
-    for username in admins:
-        u = User.query.filter_by(username=username).first()
-        if u and u.email:
-            emails.append(u.email)
-    return ', '.join(emails) if emails else ''
+    admins = frozenset(current_app.config.get('ADMIN_USERS', set()) or set())
+    if not admins:
+        return ''
+    cache = current_app.extensions.get('admin_contact_cache')
+    if cache is None:
+        cache = TTLCache(maxsize=8, ttl=current_app.config.get('ADMIN_CONTACT_CACHE_TTL', 300))
+        current_app.extensions['admin_contact_cache'] = cache
+
+    def load():
+        emails = UserRepository().emails_by_username(admins)
+        return ', '.join(emails[u] for u in sorted(emails) if emails[u])
+
+    return cache.get_or_set(admins, load)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.get(User, int(user_id))
+    return load_identity(int(user_id))
 
 @login_manager.unauthorized_handler
 def unauthorized():
@@ -35,9 +64,19 @@ def unauthorized():
 @bp.route('/')
 @login_required
 def index():
-    page = request.args.get('page', 1, type=int)
-    pagination = note_service.repo.list_of_user_paginated(current_user.id, page=page, per_page=10)
-    return render_template('index.html', pagination=pagination, entries=pagination.items)
+    validators = page_validators(current_user.id, 'index', request.args.get('after'), request.args.get('before'))
+    if is_not_modified(validators):
+        return conditional_response(None, validators)
+    pagination = get_note_service().repo.list_of_user_keyset(
+        current_user.id,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=get_settings().get('max_entries_per_page'),
+    )
+    total = get_note_service().repo.count_by_user(current_user.id)
+    return conditional_response(
+        render_template('index.html', pagination=pagination, entries=pagination.items, total=total), validators
+    )
 
 @bp.route('/register', methods=['GET', 'POST'])
 def register():
@@ -45,7 +84,7 @@ def register():
         return redirect(url_for('main.index'))
     form = RegisterForm()
     if form.validate_on_submit():
-        ok, msg, _user = auth_service.register(form.username.data, form.email.data, form.password.data)
+        ok, msg, _user = get_auth_service().register(form.username.data, form.email.data, form.password.data)
         if not ok:
             flash(msg, 'danger')
             return render_template('register.html', form=form)
@@ -67,7 +106,7 @@ def login():
     protect_email = ''
     if username_param:
         u = User.query.filter_by(username=username_param.strip()).first()
-        if u and u.security_profile and ((u.security_profile.locked_until and u.security_profile.locked_until > datetime.utcnow()) or (u.security_profile.failed_count or 0) >= 3):
+        if u and u.security_profile and ((u.security_profile.locked_until and u.security_profile.locked_until > datetime.utcnow()) or (u.security_profile.failed_count or 0) >= get_settings().get('login_attempts_limit')):
             locked_user = u.username
             security_question = u.security_profile.question
             # remaining attempts for auxiliary verification (max 5)
@@ -78,7 +117,7 @@ def login():
                 protect_email = _get_admin_contact_email()
     form = LoginForm()
     if form.validate_on_submit():
-         ok, msg, user, sec_q = auth_service.validate_login(form.username.data, form.password.data)
+         ok, msg, user, sec_q = get_auth_service().validate_login(form.username.data, form.password.data)
          if not ok:
              category = 'warning' if '锁定' in msg else 'danger'
              flash(msg, category)
@@ -110,7 +149,7 @@ def logout():
 def create_entry():
     form = NoteForm()
     if form.validate_on_submit():
-        ok, msg, _entry = note_service.create_entry(current_user.id, form.title.data, form.content.data)
+        ok, msg, _entry = get_note_service().create_entry(current_user.id, form.title.data, form.content.data)
         flash(msg, 'success' if ok else 'danger')
         if ok:
             return redirect(url_for('main.index'))
@@ -126,7 +165,7 @@ def aux_verify():
     if attempts >= 5:
         # already exceeded attempts; show protect modal
         return redirect(url_for('main.login', u=username, protect=1))
-    ok, msg = auth_service.aux_verify(username, answer)
+    ok, msg = get_auth_service().aux_verify(username, answer)
     if not ok:
         attempts += 1
         session[attempt_key] = attempts
@@ -146,38 +185,43 @@ def aux_verify():
 @bp.route('/entry/<int:entry_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_entry(entry_id):
-    entry = note_service.repo.get_by_id_for_user(entry_id, current_user.id)
+    validators = page_validators(current_user.id, 'edit', entry_id) if request.method == 'GET' else None
+    if is_not_modified(validators):
+        return conditional_response(None, validators)
+    entry = get_note_service().repo.get_by_id_for_user(entry_id, current_user.id)
     if not entry:
         abort(404)
     form = NoteForm(obj=entry)
     if form.validate_on_submit():
-        ok, msg = note_service.update_entry(entry, form.title.data, form.content.data)
+        ok, msg = get_note_service().update_entry(entry, form.title.data, form.content.data)
         flash(msg, 'success' if ok else 'danger')
         if ok:
             return redirect(url_for('main.index'))
-    return render_template('entry_form.html', form=form, mode='edit')
+    return conditional_response(render_template('entry_form.html', form=form, mode='edit'), validators)
 
 @bp.route('/entry/<int:entry_id>/delete', methods=['POST'])
 @login_required
 def delete_entry(entry_id):
-    entry = note_service.repo.get_by_id_for_user(entry_id, current_user.id)
+    entry = get_note_service().repo.get_by_id_for_user(entry_id, current_user.id)
     if not entry:
         abort(404)
-    ok, msg = note_service.delete_entry(entry)
+    ok, msg = get_note_service().delete_entry(entry)
     flash(msg, 'info' if ok else 'danger')
     return redirect(url_for('main.index'))
 
 @bp.route('/settings', methods=['GET', 'POST'])
 @login_required
 def settings():
-    profile = current_user.security_profile
+    # current_user 是缓存的只读身份，修改密码和安全配置需要 ORM 用户对象
+    user = get_auth_service().user_repo.get_by_id(current_user.id)
+    profile = user.security_profile
     if not profile:
-        profile = auth_service.user_repo.ensure_profile(current_user)
+        profile = get_auth_service().user_repo.ensure_profile(user)
     if request.method == 'POST':
         form_name = request.form.get('form')
         if form_name == 'password':
-            ok, msg = auth_service.change_password(
-                current_user,
+            ok, msg = get_auth_service().change_password(
+                user,
                 request.form.get('old_password', ''),
                 request.form.get('new_password', ''),
                 request.form.get('confirm_new', ''),
@@ -186,8 +230,8 @@ def settings():
             if ok:
                 return redirect(url_for('main.settings') + '#password')
         elif form_name == 'security':
-            ok, msg = auth_service.save_security(
-                current_user,
+            ok, msg = get_auth_service().save_security(
+                user,
                 request.form.get('question', ''),
                 request.form.get('answer', ''),
                 request.form.get('auth_password', ''),
@@ -195,12 +239,19 @@ def settings():
             flash(msg, 'success' if ok else 'danger')
             if ok:
                 return redirect(url_for('main.settings') + '#security')
-    return render_template('settings.html', profile=profile)
+    return render_template('settings.html', profile=profile, lock_threshold=get_settings().get('login_attempts_limit'))
 
 @bp.app_errorhandler(404)
 def not_found(e):
     return render_template('errors/404.html'), 404
 
+@bp.app_errorhandler(HashingBusy)
+def hashing_busy(e):
+    # 口令哈希排队已满：快速失败，让客户端稍后重试，而不是占住请求线程
+    response = make_response(render_template('errors/503.html'), 503)
+    response.headers['Retry-After'] = '1'
+    return response
+
 @bp.app_errorhandler(500)
 def server_error(e):
     return render_template('errors/500.html'), 500
@@ -210,24 +261,19 @@ def inject_sidebar_and_csp():
     ctx = {'csp_nonce': getattr(g, 'csp_nonce', '')}
     try:
         if current_user.is_authenticated and request.endpoint not in ['main.login', 'main.register']:
-            entries = note_service.repo.recent_entries(current_user.id, limit=50)
+            # 分组数据按用户缓存，命中时不访问数据库；只有相对日期标签在渲染时计算
+            days = get_note_service().get_sidebar_days(current_user.id)
             today = datetime.utcnow().date()
-            groups_map = {}
-            for e in entries:
-                d = e.created_at.date()
+            groups = []
+            for d, items in days:
                 if d == today:
                     label = '今天'
                 elif d == today - timedelta(days=1):
                     label = '昨天'
                 else:
                     label = d.strftime('%Y-%m-%d')
-                groups_map.setdefault(label, []).append(e)
-            sorted_groups = sorted(
-                groups_map.items(),
-                key=lambda kv: max(x.created_at for x in kv[1]),
-                reverse=True
-            )
-            ctx['sidebar_groups'] = [{'label': k, 'items': v} for k, v in sorted_groups]
+                groups.append({'label': label, 'items': items})
+            ctx['sidebar_groups'] = groups
     except Exception:
         pass
     return ctx
@@ -257,7 +303,7 @@ def reset_password():
         if new_password != confirm_new:
             flash('两次输入的密码不一致', 'danger')
             return render_template('reset_password.html', username=username)
-        ok, msg = auth_service.reset_password(user, new_password)
+        ok, msg = get_auth_service().reset_password(user, new_password)
         flash(msg, 'success' if ok else 'danger')
         if ok:
             # clear aux verified flag and redirect to login
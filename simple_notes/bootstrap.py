@@ -0,0 +1,79 @@
+from typing import Optional
+
+from flask import Flask
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from simple_notes.extensions import db
+from simple_notes.models import AppSetting, User
+from simple_notes.sharding import ensure_shard_schema
+
+"""
+数据库初始化（每次部署执行一次：simple-notes bootstrap）
+
+- 创建缺失的表与分片表、补充模型中新增的可空列、写入初始管理员列表并创建缺失的管理员账户
+- 完成后在 app_settings 中写入 schema_version；工作进程启动时只用一条查询比对版本号，
+  一致时不再执行建表与管理员检查
+- 模型结构变化（新表、新列）时递增 SCHEMA_VERSION
+"""
+
+SCHEMA_VERSION = 2
+SCHEMA_VERSION_KEY = 'schema_version'
+
+
+def schema_version() -> Optional[int]:
+    """数据库中记录的结构版本号；表不存在或未记录时返回 None"""
+    try:
+        with db.engine.connect() as conn:
+            value = conn.execute(
+                text('SELECT value FROM app_settings WHERE key = :key'), {'key': SCHEMA_VERSION_KEY}
+            ).scalar()
+    except (OperationalError, ProgrammingError):
+        return None
+    return int(value) if value is not None else None
+
+
+def bootstrap(app: Flask) -> None:
+    """建表、补列并创建初始管理员，最后记录结构版本号（可重复执行）"""
+    from simple_notes.hashing import hash_password
+    from simple_notes.repositories.stats_repo import UserStatsRepository
+    from simple_notes.repositories.settings_repo import get_settings
+    from simple_notes.scripts.migrate_columns import apply_migration, scan
+    from simple_notes.services.admin_service import AdminService
+
+    db.create_all()
+    # 表可能刚被重建（init-db），不沿用进程内缓存的设置
+    get_settings().invalidate()
+    ensure_shard_schema(app, db.engine)
+    _dialect, stats = scan()
+    if any(s['missing'] for s in stats.values()):
+        apply_migration()
+
+    # Persist initial admin list if not set yet
+    if not get_settings().has('admin_users'):
+        initial_admins = set(app.config.get('ADMIN_USERS', set()))
+        if initial_admins:
+            AdminService().set_admin_users(initial_admins)
+    admin_users = sorted(AdminService().get_admin_users())
+    existing = set(db.session.execute(select(User.username).where(User.username.in_(admin_users))).scalars())
+    default_pw = app.config.get('ADMIN_DEFAULT_PASSWORD', 'ChangeMe123!')
+    for uname in admin_users:
+        if uname not in existing:
+            db.session.add(User(username=uname, email=f"{uname}@local", password_hash=hash_password(default_pw)))
+    db.session.commit()
+    # 存量用户补建统计行，管理员统计的总数不再依赖回退查询
+    UserStatsRepository().backfill_missing()
+    db.session.merge(AppSetting(key=SCHEMA_VERSION_KEY, value=str(SCHEMA_VERSION)))
+    db.session.commit()
+
+
+def check_schema(app: Flask) -> bool:
+    """启动时的结构版本检查（一条查询）；版本不一致时按 AUTO_BOOTSTRAP 自动初始化或记录警告"""
+    version = schema_version()
+    if version == SCHEMA_VERSION:
+        return True
+    if app.config.get('AUTO_BOOTSTRAP'):
+        bootstrap(app)
+        return True
+    app.logger.warning('数据库结构版本为 %s，应为 %s；请先执行 simple-notes bootstrap', version, SCHEMA_VERSION)
+    return False
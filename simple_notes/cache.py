@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """线程安全的进程内缓存，按最近最少使用（LRU）淘汰，条目带过期时间
+
+    缓存只存放与会话无关的普通数据（元组、字符串等），不要放入 ORM 对象。
+    多进程部署时每个进程各有一份，写操作只能使本进程的条目失效，
+    因此 ttl 同时作为跨进程数据陈旧时间的上限。
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0,
+                 timer: Callable[[], float] = time.monotonic):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self._timer = timer
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取条目，不存在或已过期时返回 default"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at <= self._timer():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入条目，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = (self._timer() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """读取条目，未命中时调用 loader 加载并写入"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """使单个条目失效"""
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[1] if item else None
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
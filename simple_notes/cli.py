@@ -1,83 +1,351 @@
 import click
-from diary_app import create_app
-import os
+from flask import current_app
+from flask.cli import FlaskGroup, with_appcontext
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db():
+    """初始化数据库"""
+    from simple_notes.extensions import db
+    from simple_notes.repositories.settings_repo import get_settings
+    from simple_notes.bootstrap import bootstrap
+
+    click.echo("删除现有数据库表...")
+    db.drop_all()
+
+    click.echo("创建数据库表...")
+    bootstrap(current_app)
+
+    click.echo("初始化默认设置...")
+    # 创建默认应用设置（经注册表写入，同时递增设置版本号）
+    get_settings().set_many({
+        'site_name': '日记Web应用',
+        'site_description': '一个简单而安全的个人日记应用',
+        'max_entries_per_page': 10,
+        'login_attempts_limit': 5,
+        'lockout_duration_minutes': 30,
+    })
+    click.echo("数据库初始化完成！")
+
+
+@click.command("bootstrap")
+@with_appcontext
+def bootstrap_db():
+    """建表、补充新增列并创建初始管理员（每次部署执行一次）"""
+    from simple_notes.bootstrap import SCHEMA_VERSION, bootstrap, schema_version
+
+    before = schema_version()
+    bootstrap(current_app)
+    click.echo(f"数据库结构版本: {before} -> {SCHEMA_VERSION}")
+
+
+@click.command("create-admin")
+@with_appcontext
+@click.argument("username")
+@click.password_option()
+@click.option("--email", prompt="Admin email")
+@click.option("--question", prompt="Security question")
+@click.password_option("--answer", confirmation_prompt=False, prompt="Security answer")
+def create_admin(username, password, email, question, answer):
+    """创建管理员用户"""
+    from simple_notes.models import User, SecurityProfile
+    from simple_notes.services.admin_service import AdminService
+    from simple_notes.hashing import hash_password
+
+    # 检查用户是否已存在
+    existing_user = User.query.filter_by(username=username).first()
+    if existing_user:
+        click.echo(f"错误: 用户 '{username}' 已存在")
+        return
+
+    # 创建管理员用户
+    admin_user = User(username=username, email=email)
+    admin_user.set_password(password)
+
+    # 创建安全配置文件
+    security_profile = SecurityProfile(
+        user=admin_user,
+        question=question,
+        answer_hash=hash_password(answer)
+    )
+
+    from simple_notes.extensions import db
+    db.session.add(admin_user)
+    db.session.add(security_profile)
+    db.session.commit()
+    AdminService().add_admin_user(username)
+
+    click.echo(f"管理员用户 '{username}' 创建成功！")
+
+
+@click.command("rebuild-stats")
+@with_appcontext
+@click.option("--batch-size", default=500, show_default=True, help="每批处理的用户数")
+def rebuild_stats(batch_size):
+    """从笔记数据重建每用户统计计数器"""
+    from simple_notes.repositories.stats_repo import UserStatsRepository
+
+    repo = UserStatsRepository()
+    processed = 0
+    for user_ids in repo.iter_user_id_batches(batch_size):
+        repo.recompute(user_ids)
+        repo.commit()
+        processed += len(user_ids)
+        click.echo(f"已重建 {processed} 个用户的统计...")
+    click.echo(f"统计重建完成，共 {processed} 个用户。")
+
+
+@click.command("rebalance-user")
+@with_appcontext
+@click.argument("username")
+@click.option("--to", "target", required=True, help="目标分片名（NOTE_SHARDS 中的名称）")
+@click.option("--batch-size", default=500, show_default=True, help="每批搬运的笔记数")
+@click.option("--wait", type=float, default=None, help="开始搬运前的等待秒数，默认为 NOTE_SHARD_CACHE_TTL")
+def rebalance_user(username, target, batch_size, wait):
+    """在线将一个用户的笔记迁移到另一个分片"""
+    from simple_notes.repositories.user_repo import UserRepository
+    from simple_notes.services.shard_service import ShardService
+
+    user = UserRepository().get_by_username(username)
+    if user is None:
+        click.echo(f"错误: 用户 '{username}' 不存在")
+        return
+    service = ShardService()
+    reads = service.placement(user.id).reads
+    click.echo(f"用户 {username} 当前位于分片 {', '.join(reads)}，迁移到 {target}...")
+
+    def progress(moved):
+        click.echo(f"已迁移 {moved} 篇笔记...")
+
+    try:
+        moved = service.move_user(user.id, target, batch_size=batch_size, wait=wait, progress=progress)
+    except ValueError as e:
+        click.echo(f"错误: {e}")
+        return
+    click.echo(f"迁移完成，共 {moved} 篇笔记，用户 {username} 现位于分片 {target}。")
+
+
+@click.command("backfill-excerpts")
+@with_appcontext
+@click.option("--batch-size", default=500, show_default=True, help="每批读取的笔记数")
+def backfill_excerpts(batch_size):
+    """为存量笔记回填摘要、字数与字符数"""
+    from simple_notes.scripts.migrate_columns import scan, apply_migration
+    from simple_notes.services.note_service import NoteService
+
+    _dialect, stats = scan()
+    if any(s['missing'] for s in stats.values()):
+        click.echo("补充缺失的列...")
+        apply_migration()
+
+    def progress(done, total):
+        click.echo(f"已回填 {done}/{total} 篇笔记...")
+
+    done = NoteService().backfill_summaries(batch_size=batch_size, progress=progress)
+    click.echo(f"摘要回填完成，共 {done} 篇笔记。")
+
+
+@click.command("rehash-credentials")
+@with_appcontext
+@click.option("--batch-size", default=1000, show_default=True, help="统计时每批读取的行数")
+@click.option("--dry-run", is_flag=True, help="只统计哈希参数分布，不做标记")
+@click.option("--force", is_flag=True, help="标记全部哈希，而不仅是参数过期的")
+@click.option("--answers", type=click.File("r", encoding="utf-8"), default=None,
+              help="迁移导入的明文答案 CSV（username,answer），用于直接重算答案哈希")
+@click.option("--processes", type=int, default=None, help="计算答案哈希的进程数，默认为 CPU 核数")
+def rehash_credentials(batch_size, dry_run, force, answers, processes):
+    """统计口令/答案哈希参数分布，并批量标记过期哈希在下次验证时重算"""
+    import csv
+    from simple_notes.hashing import current_method
+    from simple_notes.scripts.migrate_columns import scan, apply_migration
+    from simple_notes.services.credential_service import CredentialService
+
+    _dialect, stats = scan()
+    missing = [f"{table}.{column}" for table, s in stats.items() for column in s['missing']]
+    if missing and dry_run:
+        # 只统计时不改表结构，补列留给正式执行
+        click.echo(f"缺少列 {', '.join(missing)}，正式执行时会先补充。")
+    elif missing:
+        click.echo("补充缺失的列...")
+        apply_migration()
+
+    service = CredentialService()
+    click.echo(f"当前哈希参数: {current_method()}")
+    for column, counter in service.hash_distribution(batch_size=batch_size).items():
+        click.echo(f"{column}:")
+        for prefix, count in counter.most_common():
+            click.echo(f"  {prefix}: {count}")
+    if dry_run:
+        return
+
+    if answers is not None:
+        rows = ((row[0].strip(), row[1].strip()) for row in csv.reader(answers) if len(row) >= 2 and row[1].strip())
+
+        def progress(done):
+            click.echo(f"已重算 {done} 个答案哈希...")
+
+        updated, skipped = service.import_answers(rows, processes=processes, progress=progress)
+        click.echo(f"答案哈希重算完成，共 {updated} 个，跳过 {skipped} 个（用户不存在或未设置辅助验证）。")
+
+    counts = service.mark_stale(force=force)
+    click.echo(f"已标记 {counts['password_hash']} 个口令哈希、{counts['answer_hash']} 个答案哈希，将在下次验证成功时重算。")
+
+
+@click.command("reindex")
+@with_appcontext
+@click.option("--batch-size", default=500, show_default=True, help="每批索引的笔记数")
+def reindex(batch_size):
+    """重建全文检索索引"""
+    from simple_notes.repositories.search_repo import get_search_backend
+
+    backend = get_search_backend()
+    if backend.name == 'like':
+        click.echo("当前数据库不支持全文检索，搜索将使用 ILIKE。")
+        return
+
+    def progress(done, total):
+        click.echo(f"已索引 {done}/{total} 篇笔记...")
+
+    click.echo(f"使用 {backend.name} 重建索引...")
+    done = backend.rebuild(batch_size=batch_size, progress=progress)
+    click.echo(f"索引重建完成，共 {done} 篇笔记。")
+
+
+@click.command("precompile-templates")
+@with_appcontext
+def precompile_templates_cmd():
+    """预先编译全部模板，写入 Jinja 字节码缓存"""
+    from simple_notes.templating import precompile_templates
+
+    if not current_app.config.get('TEMPLATE_BYTECODE_CACHE'):
+        click.echo("未启用模板字节码缓存（TEMPLATE_BYTECODE_CACHE=0）。")
+        return
+    count = precompile_templates(current_app)
+    click.echo(f"已编译 {count} 个模板。")
+
+
+@click.command("build-css")
+@with_appcontext
+@click.option("--report", type=click.Path(dir_okay=False), default=None,
+              help="把本次各阶段字节数追加到该 JSON Lines 文件")
+def build_css_cmd(report):
+    """编译 LESS、与 Bootstrap 合并、清除未使用的选择器并压缩为 bundle.min.css"""
+    import json
+    from datetime import datetime
+    from simple_notes.stylesheets import BUNDLE_NAME, build_stylesheet
+
+    sizes = build_stylesheet(current_app)
+    for name, size in sizes.items():
+        click.echo(f"{name:>40}: {size / 1024:8.1f} KB")
+    click.echo(f"已写入 {BUNDLE_NAME}：合并后 {sizes['bundle'] / 1024:.1f} KB -> "
+               f"{sizes['minified'] / 1024:.1f} KB（gzip {sizes['gzip'] / 1024:.1f} KB）")
+    if report:
+        with open(report, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'built_at': datetime.utcnow().isoformat(timespec='seconds'), **sizes}) + '\n')
+
+
+@click.command("build-icons")
+@with_appcontext
+def build_icons_cmd():
+    """按模板中用到的 bi-* 图标裁剪 bootstrap-icons 的字体与样式表"""
+    import importlib.util
+    from simple_notes.icons import SUBSET_CSS, SUBSET_FONT, build_icons
+
+    if importlib.util.find_spec('fontTools') is None or importlib.util.find_spec('brotli') is None:
+        click.echo("错误: 裁剪 WOFF2 字体需要安装 fonttools 与 brotli（pip install fonttools brotli）")
+        return
+    stats = build_icons(current_app)
+    click.echo(f"使用的图标 {len(stats['icons'])} 个: {', '.join(stats['icons'])}")
+    if stats['missing']:
+        click.echo(f"警告: bootstrap-icons 中没有这些图标: {', '.join(stats['missing'])}")
+    click.echo(f"{SUBSET_CSS}: {stats['css_before'] / 1024:.1f} KB -> {stats['css_after'] / 1024:.1f} KB")
+    click.echo(f"{SUBSET_FONT}: {stats['font_before'] / 1024:.1f} KB -> {stats['font_after'] / 1024:.1f} KB")
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets_cmd():
+    """为静态文件生成带内容哈希的副本、gzip/brotli 压缩副本与清单"""
+    from simple_notes.assets import build_assets, build_dir
+
+    stats = build_assets(current_app)
+    click.echo(f"已生成 {stats['files']} 个静态文件: {build_dir(current_app)}")
+    click.echo(f"原始 {stats['original'] / 1024:.1f} KB，gzip {stats['gzip'] / 1024:.1f} KB"
+               + (f"，brotli {stats['brotli'] / 1024:.1f} KB" if stats['brotli_available'] else "（未安装 brotli，跳过 .br）"))
+
+
+@click.command("sweep-sessions")
+@with_appcontext
+def sweep_sessions():
+    """清理过期的服务端会话"""
+    store = current_app.extensions.get('session_store')
+    if store is None:
+        click.echo("未启用服务端会话（SESSION_BACKEND=cookie）。")
+        return
+    click.echo(f"已清理 {store.sweep()} 个过期会话。")
+
+
+@click.command("run-dev")
+@with_appcontext
+@click.option("--host", default="127.0.0.1", help="主机地址")
+@click.option("--port", default=5000, help="端口号")
+def run_dev(host, port):
+    """运行开发服务器"""
+    current_app.run(host=host, port=port, debug=True)
+
+
+COMMANDS = (
+    init_db,
+    bootstrap_db,
+    create_admin,
+    rebuild_stats,
+    rebalance_user,
+    backfill_excerpts,
+    rehash_credentials,
+    reindex,
+    precompile_templates_cmd,
+    build_css_cmd,
+    build_icons_cmd,
+    build_assets_cmd,
+    sweep_sessions,
+    run_dev,
+)
+
+
+def register_commands(app):
+    """注册命令行命令"""
+    for command in COMMANDS:
+        app.cli.add_command(command)
+
+
+def create_cli_app():
+    """命令行使用的应用工厂：只在真正执行命令时才创建应用"""
+    from simple_notes import create_app
+
+    app = create_app()
+    register_commands(app)
+    return app
+
+
+class NotesGroup(FlaskGroup):
+    """命令在组上静态注册，列出命令（--help）时不加载应用
+
+    FlaskGroup 默认会为列出应用命令而调用工厂，导致 --help 也要导入整个 Web 栈并检查数据库结构。
+    """
+
+    def list_commands(self, ctx):
+        self._load_plugin_commands()
+        return sorted(super(FlaskGroup, self).list_commands(ctx))
+
 
 def main():
-    """日记Web应用的命令行入口"""
-    app = create_app(config_name=os.environ.get('FLASK_ENV', 'development'))
-    
-    @app.cli.command("init-db")
-    def init_db():
-        """初始化数据库"""
-        from diary_app.extensions import db
-        from diary_app.models import User, DiaryEntry, SecurityProfile, AppSetting
-        
-        click.echo("删除现有数据库表...")
-        db.drop_all()
-        
-        click.echo("创建数据库表...")
-        db.create_all()
-        
-        click.echo("初始化默认设置...")
-        # 创建默认应用设置
-        default_settings = [
-            AppSetting(key='site_name', value='日记Web应用'),
-            AppSetting(key='site_description', value='一个简单而安全的个人日记应用'),
-            AppSetting(key='max_entries_per_page', value='10'),
-            AppSetting(key='login_attempts_limit', value='5'),
-            AppSetting(key='lockout_duration_minutes', value='30'),
-        ]
-        
-        for setting in default_settings:
-            db.session.add(setting)
-        
-        db.session.commit()
-        click.echo("数据库初始化完成！")
-    
-    @app.cli.command("create-admin")
-    @click.argument("username")
-    @click.password_option()
-    @click.option("--email", prompt="Admin email")
-    @click.option("--question", prompt="Security question")
-    @click.password_option("--answer", confirmation_prompt=False, prompt="Security answer")
-    def create_admin(username, password, email, question, answer):
-        """创建管理员用户"""
-        from diary_app.models import User, SecurityProfile
-        from werkzeug.security import generate_password_hash
-        
-        # 检查用户是否已存在
-        existing_user = User.query.filter_by(username=username).first()
-        if existing_user:
-            click.echo(f"错误: 用户 '{username}' 已存在")
-            return
-        
-        # 创建管理员用户
-        admin_user = User(username=username, email=email, is_admin=True)
-        admin_user.set_password(password)
-        
-        # 创建安全配置文件
-        security_profile = SecurityProfile(
-            user=admin_user,
-            question=question,
-            answer_hash=generate_password_hash(answer)
-        )
-        
-        from diary_app.extensions import db
-        db.session.add(admin_user)
-        db.session.add(security_profile)
-        db.session.commit()
-        
-        click.echo(f"管理员用户 '{username}' 创建成功！")
-    
-    @app.cli.command("run-dev")
-    @click.option("--host", default="127.0.0.1", help="主机地址")
-    @click.option("--port", default=5000, help="端口号")
-    def run_dev(host, port):
-        """运行开发服务器"""
-        app.run(host=host, port=port, debug=True)
-    
+    """简笔记应用的命令行入口"""
+    cli = NotesGroup(name='simple-notes', create_app=create_cli_app)
+    for command in COMMANDS:
+        cli.add_command(command)
     # 运行Flask命令行接口
-    app.cli()
+    cli()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
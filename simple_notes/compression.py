@@ -0,0 +1,109 @@
+import gzip
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Response, current_app, g, request
+
+"""
+动态响应压缩（默认只压缩 JSON 等非 HTML 响应）
+
+- after_request 阶段按 Accept-Encoding 用 brotli（需要安装 brotli）或 gzip 压缩响应体，
+  级别由 COMPRESS_LEVEL / COMPRESS_BR_LEVEL 配置
+- 小于 COMPRESS_MIN_SIZE 字节的响应不压缩；流式响应（生成器）逐块压缩并立即刷新，不缓冲整个响应体
+- 跳过静态文件（由 build-assets 的预压缩副本提供）、已带 Content-Encoding 的响应、
+  直接透传的文件响应以及 HEAD/204/206/304
+- 压缩后的强 ETag 改为弱 ETag，并添加 Vary: Accept-Encoding
+- HTML 默认不压缩（BREACH）：页面里同时有 CSRF 令牌与回显的请求参数（如 login.html 回显 ?u=）时，
+  攻击者可以构造参数、观察压缩后长度逐字节猜出令牌。COMPRESS_HTML=1 才压缩 HTML，
+  且即使开启，本次请求生成过 CSRF 令牌的页面仍不压缩
+- CPU 与节省字节数的取舍可用 python -m simple_notes.scripts.bench_compression 对比
+"""
+
+COMPRESSIBLE_TYPES = frozenset({
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+})
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：未安装时只使用 gzip
+    brotli = None
+
+
+def choose_encoding() -> Optional[str]:
+    """按客户端声明的质量值选择编码；都不接受时返回 None"""
+    accept = request.accept_encodings
+    gzip_q = accept['gzip']
+    if brotli is not None and accept['br'] and accept['br'] >= gzip_q:
+        return 'br'
+    return 'gzip' if gzip_q else None
+
+
+def compress(data: bytes, coding: str, level: int) -> bytes:
+    if coding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks: Iterable, coding: str, level: int) -> Iterator[bytes]:
+    """逐块压缩并刷新，客户端可以边收边解压"""
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield process(chunk) + flush()
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def has_secret(response: Response) -> bool:
+    """HTML 响应是否可能成为 BREACH 的目标：未开启 COMPRESS_HTML，或本次请求生成过 CSRF 令牌"""
+    if response.mimetype != 'text/html':
+        return False
+    config = current_app.config
+    return not config.get('COMPRESS_HTML') or config.get('WTF_CSRF_FIELD_NAME', 'csrf_token') in g
+
+
+def compress_response(response: Response) -> Response:
+    config = current_app.config
+    if (not config.get('COMPRESS_ENABLED')
+            or request.method == 'HEAD'
+            or request.endpoint == 'static'
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or has_secret(response)):
+        return response
+    if not response.is_streamed and response.calculate_content_length() < config.get('COMPRESS_MIN_SIZE', 500):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    coding = choose_encoding()
+    if coding is None:
+        return response
+    level = config.get('COMPRESS_BR_LEVEL', 4) if coding == 'br' else config.get('COMPRESS_LEVEL', 6)
+    if response.is_streamed:
+        response.response = compress_stream(response.response, coding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compress(response.get_data(), coding, level))
+    response.content_encoding = coding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app: Flask) -> None:
+    app.after_request(compress_response)
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from flask import Response, current_app, g, make_response, request, session
+
+from simple_notes.repositories.settings_repo import get_settings
+from simple_notes.repositories.stats_repo import UserStatsRepository
+
+"""
+用户页面的条件请求（ETag / Last-Modified / 304）
+
+- 页面内容由用户的 user_stats 行（笔记数、写入版本号、更新时间）决定，一次主键查询即可算出弱 ETag，
+  在列表、计数与侧栏查询之前判断 If-None-Match，命中时直接返回 304
+- ETag 还包含：设置版本号、当天日期（侧栏的“今天/昨天”）、会话的 CSRF 密钥与其有效期分段
+  （缓存页面中的令牌仍然有效）、模板与静态文件的部署标识，以及页面自身的参数
+- 有待显示的闪现消息时不做条件处理；响应带 Cache-Control: private, no-cache，浏览器每次都会重新验证
+"""
+
+
+class PageValidators(NamedTuple):
+    etag: str
+    last_modified: datetime
+
+
+def _deploy_token() -> str:
+    """模板与静态文件的修改时间摘要；同一次部署的所有 worker 相同"""
+    token = current_app.extensions.get('page_deploy_token')
+    if token is None:
+        digest = hashlib.sha1()
+        for folder in (os.path.join(current_app.root_path, current_app.template_folder), current_app.static_folder):
+            for root, _dirs, files in os.walk(folder):
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    digest.update(f'{path}:{os.stat(path).st_mtime_ns}'.encode())
+        token = current_app.extensions['page_deploy_token'] = digest.hexdigest()
+    return token
+
+
+def page_validators(user_id: int, *parts) -> Optional[PageValidators]:
+    """计算用户页面的验证器；无法判断页面是否变化时返回 None"""
+    if session.get('_flashes'):
+        return None
+    stats = UserStatsRepository().get(user_id)
+    if stats is None:
+        return None
+    # 标识映射只弱引用未修改的对象；保留引用使页面后续读取笔记总数时不再查询
+    g.user_stats = stats
+    settings = get_settings()
+    per_page = settings.get('max_entries_per_page')
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    csrf_window = int(time.time() // max(1, time_limit // 2)) if time_limit else 0
+    key = (
+        user_id, stats.note_count, stats.version or 0, stats.updated_at.isoformat(),
+        settings.version, per_page, datetime.utcnow().date().isoformat(),
+        session.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'), ''), csrf_window,
+        _deploy_token(), *parts,
+    )
+    return PageValidators(hashlib.sha1(repr(key).encode()).hexdigest(), stats.updated_at)
+
+
+def is_not_modified(validators: Optional[PageValidators]) -> bool:
+    """请求的 If-None-Match 是否与当前 ETag 一致"""
+    return validators is not None and request.if_none_match.contains_weak(validators.etag)
+
+
+def conditional_response(body, validators: Optional[PageValidators], status: int = 200) -> Response:
+    """为响应附加验证器；body 为 None 时返回 304"""
+    response = make_response('', 304) if body is None else make_response(body, status)
+    if validators is not None:
+        response.set_etag(validators.etag, weak=True)
+        response.last_modified = validators.last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
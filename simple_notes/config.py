@@ -2,6 +2,9 @@ import os
 import pathlib
 from dotenv import load_dotenv
 import simple_notes
+from simple_notes.engine import engine_options, resolve_profile, sqlite_pragmas
+from simple_notes.hashing import normalize_method
+from simple_notes.sharding import parse_shard_map
 
 load_dotenv()
 
@@ -11,7 +14,85 @@ class Config:
     SESSION_COOKIE_SAMESITE = "Lax"
     SESSION_COOKIE_SECURE = False  # enable True when using HTTPS
 
+    # Sessions: sqlite keeps session data server-side (cookie holds only a signed id); cookie = Flask default
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")
+    SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "")  # default: <instance>/sessions.db, in memory for in-memory databases
+    SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "4096"))
+    SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "300"))
+
     LOGIN_RATE_LIMIT = os.getenv("LOGIN_RATE_LIMIT", "10 per minute")
+    # Limiter storage: memory:// is per process; sqlite:///path/ratelimit.db is shared by all workers on the host
+    RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI", "memory://")
+    RATELIMIT_STRATEGY = os.getenv("RATELIMIT_STRATEGY", "sliding-window-counter")
+
+    # Run `simple-notes bootstrap` automatically when the schema version is missing/outdated at startup;
+    # unset = only for the dev profile (production deployments run bootstrap once per release)
+    AUTO_BOOTSTRAP = os.getenv("AUTO_BOOTSTRAP", "")
+
+    # Engine profile: dev | prod-sqlite | prod-mysql (pool sizing uses WEB_CONCURRENCY / WEB_THREADS)
+    DB_PROFILE = os.getenv("DB_PROFILE", "dev")
+
+    # Read replicas: comma-separated URLs; reads stick to the primary for a while after a write
+    DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+    # Note shards: "primary,shard1=<url>,..." (primary = the main database); unset keeps a single database
+    NOTE_SHARDS = os.getenv("NOTE_SHARDS", "")
+    NOTE_SHARD_CACHE_TTL = float(os.getenv("NOTE_SHARD_CACHE_TTL", "30"))
+
+    # Password hashing: Werkzeug method string (scrypt:N:r:p | pbkdf2:sha256:iterations);
+    # HASH_WORKERS > 0 runs hashing in a process pool, HASH_QUEUE_SIZE bounds in-flight jobs (503 when full)
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", "16"))
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", "0"))
+    HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "32"))
+    HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "10"))
+
+    # Full-text search: auto (by database dialect) | fts | ngram | like
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+    SEARCH_FTS_TOKENIZER = os.getenv("SEARCH_FTS_TOKENIZER", "trigram")
+    # Seconds a worker caches whether the search index exists; reindex waits this long before catching up
+    SEARCH_CHECK_INTERVAL = float(os.getenv("SEARCH_CHECK_INTERVAL", "5"))
+
+    # Per-user sidebar cache (in-process; TTL bounds staleness across workers)
+    SIDEBAR_CACHE_TTL = int(os.getenv("SIDEBAR_CACHE_TTL", "300"))
+    SIDEBAR_CACHE_SIZE = int(os.getenv("SIDEBAR_CACHE_SIZE", "1024"))
+    ADMIN_CONTACT_CACHE_TTL = int(os.getenv("ADMIN_CONTACT_CACHE_TTL", "300"))
+
+    # Flask-Login identity cache; set USER_CACHE_ENABLED=0 to compare throughput without it
+    USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "1") == "1"
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "4096"))
+
+    # Jinja bytecode cache on disk (default <instance>/jinja_cache), off by default so tests and
+    # development runs don't write into the tree; enable in deployments and fill it with `simple-notes precompile-templates`
+    TEMPLATE_BYTECODE_CACHE = os.getenv("TEMPLATE_BYTECODE_CACHE", "0") == "1"
+    TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "")
+
+    # Fingerprinted static files written by `simple-notes build-assets` (default <instance>/assets)
+    ASSET_BUILD_DIR = os.getenv("ASSET_BUILD_DIR", "")
+    ASSET_MAX_AGE = int(os.getenv("ASSET_MAX_AGE", "31536000"))
+
+    # Single purged stylesheet written by `simple-notes build-css`; LESSC points at an external lessc binary
+    CSS_BUNDLE = os.getenv("CSS_BUNDLE", "1") == "1"
+    LESSC = os.getenv("LESSC", "")
+    # Use the bootstrap-icons subset written by `simple-notes build-icons` when it exists
+    ICON_SUBSET = os.getenv("ICON_SUBSET", "1") == "1"
+
+    # gzip/brotli compression of JSON (and other non-HTML) responses larger than COMPRESS_MIN_SIZE bytes
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+    # HTML compression is opt-in: pages that pair a CSRF token with reflected input are a BREACH
+    # target. Even when enabled, pages that rendered a CSRF token are sent uncompressed.
+    COMPRESS_HTML = os.getenv("COMPRESS_HTML", "0") == "1"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", "4"))
+
+    # Seconds between settings version checks; bounds how long workers serve stale settings
+    SETTINGS_CHECK_INTERVAL = float(os.getenv("SETTINGS_CHECK_INTERVAL", "5"))
+
+    # Expose the per-request SQL statement count as an X-SQL-Statements header
+    SQL_COUNT_HEADER = os.getenv("SQL_COUNT_HEADER", "0") == "1"
 
     @staticmethod
     def build_database_url(instance_path: str) -> str:
@@ -37,11 +118,58 @@ class Config:
         app.config["SESSION_COOKIE_SAMESITE"] = cls.SESSION_COOKIE_SAMESITE
         app.config["SESSION_COOKIE_SECURE"] = cls.SESSION_COOKIE_SECURE
 
+        app.config["SESSION_BACKEND"] = cls.SESSION_BACKEND
+        app.config["SESSION_STORE_PATH"] = cls.SESSION_STORE_PATH
+        app.config["SESSION_CACHE_SIZE"] = cls.SESSION_CACHE_SIZE
+        app.config["SESSION_SWEEP_INTERVAL"] = cls.SESSION_SWEEP_INTERVAL
+
         db_url = cls.build_database_url(app.instance_path)
         app.config["SQLALCHEMY_DATABASE_URI"] = db_url
         app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+        profile = resolve_profile(db_url, cls.DB_PROFILE)
+        app.config["DB_PROFILE"] = profile
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(db_url, profile)
+        if profile == "prod-sqlite":
+            app.config["SQLITE_PRAGMAS"] = sqlite_pragmas()
+        app.config["AUTO_BOOTSTRAP"] = cls.AUTO_BOOTSTRAP == "1" if cls.AUTO_BOOTSTRAP else profile == "dev"
+
+        app.config["DATABASE_REPLICA_URLS"] = list(cls.DATABASE_REPLICA_URLS)
+        app.config["REPLICA_STICKY_SECONDS"] = cls.REPLICA_STICKY_SECONDS
+        app.config["NOTE_SHARDS"] = parse_shard_map(cls.NOTE_SHARDS)
+        app.config["NOTE_SHARD_CACHE_TTL"] = cls.NOTE_SHARD_CACHE_TTL
+
         app.config["LOGIN_RATE_LIMIT"] = cls.LOGIN_RATE_LIMIT
+        app.config["RATELIMIT_STORAGE_URI"] = cls.RATELIMIT_STORAGE_URI
+        app.config["RATELIMIT_STRATEGY"] = cls.RATELIMIT_STRATEGY
+        app.config["PASSWORD_HASH_METHOD"] = normalize_method(cls.PASSWORD_HASH_METHOD)
+        app.config["PASSWORD_SALT_LENGTH"] = cls.PASSWORD_SALT_LENGTH
+        app.config["HASH_WORKERS"] = cls.HASH_WORKERS
+        app.config["HASH_QUEUE_SIZE"] = cls.HASH_QUEUE_SIZE
+        app.config["HASH_TIMEOUT"] = cls.HASH_TIMEOUT
+        app.config["SEARCH_BACKEND"] = cls.SEARCH_BACKEND
+        app.config["SEARCH_FTS_TOKENIZER"] = cls.SEARCH_FTS_TOKENIZER
+        app.config["SEARCH_CHECK_INTERVAL"] = cls.SEARCH_CHECK_INTERVAL
+        app.config["SIDEBAR_CACHE_TTL"] = cls.SIDEBAR_CACHE_TTL
+        app.config["SIDEBAR_CACHE_SIZE"] = cls.SIDEBAR_CACHE_SIZE
+        app.config["ADMIN_CONTACT_CACHE_TTL"] = cls.ADMIN_CONTACT_CACHE_TTL
+        app.config["SETTINGS_CHECK_INTERVAL"] = cls.SETTINGS_CHECK_INTERVAL
+        app.config["TEMPLATE_BYTECODE_CACHE"] = cls.TEMPLATE_BYTECODE_CACHE
+        app.config["TEMPLATE_CACHE_DIR"] = cls.TEMPLATE_CACHE_DIR
+        app.config["ASSET_BUILD_DIR"] = cls.ASSET_BUILD_DIR
+        app.config["ASSET_MAX_AGE"] = cls.ASSET_MAX_AGE
+        app.config["CSS_BUNDLE"] = cls.CSS_BUNDLE
+        app.config["LESSC"] = cls.LESSC
+        app.config["ICON_SUBSET"] = cls.ICON_SUBSET
+        app.config["COMPRESS_ENABLED"] = cls.COMPRESS_ENABLED
+        app.config["COMPRESS_HTML"] = cls.COMPRESS_HTML
+        app.config["COMPRESS_MIN_SIZE"] = cls.COMPRESS_MIN_SIZE
+        app.config["COMPRESS_LEVEL"] = cls.COMPRESS_LEVEL
+        app.config["COMPRESS_BR_LEVEL"] = cls.COMPRESS_BR_LEVEL
+        app.config["USER_CACHE_ENABLED"] = cls.USER_CACHE_ENABLED
+        app.config["USER_CACHE_TTL"] = cls.USER_CACHE_TTL
+        app.config["USER_CACHE_SIZE"] = cls.USER_CACHE_SIZE
+        app.config["SQL_COUNT_HEADER"] = cls.SQL_COUNT_HEADER
 
         # Admin settings via env: comma-separated usernames
         admin_users = set(
@@ -0,0 +1,109 @@
+import os
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+"""
+数据库引擎配置档（DB_PROFILE）
+
+- dev：SQLAlchemy 默认连接池与 SQLite 默认日志模式，适合本地开发与测试
+- prod-sqlite：WAL、synchronous=NORMAL、mmap 与 busy_timeout，读写互不阻塞，写冲突时等待而非立即报错
+- prod-mysql：pool_pre_ping、pool_recycle，按工作进程数与线程数计算连接池大小
+"""
+
+PROFILES = ('dev', 'prod-sqlite', 'prod-mysql')
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def pool_sizing(workers: int, threads: int, max_connections: int) -> Dict[str, int]:
+    """按并发数计算单个进程的连接池大小
+
+    每个线程常驻一个连接（pool_size = threads），溢出连接受数据库总连接数约束：
+    workers * (pool_size + max_overflow) 不超过 max_connections。
+    """
+    workers = max(1, workers)
+    threads = max(1, threads)
+    per_worker = max(1, max_connections // workers)
+    pool_size = min(threads, per_worker)
+    max_overflow = max(0, min(threads, per_worker - pool_size))
+    return {'pool_size': pool_size, 'max_overflow': max_overflow}
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """prod-sqlite 档在每个新连接上执行的 PRAGMA"""
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'temp_store': 'MEMORY',
+        'cache_size': -_env_int('SQLITE_CACHE_KB', 16 * 1024),
+    }
+
+
+def resolve_profile(database_url: str, profile: Optional[str] = None) -> str:
+    """确定引擎配置档；未指定时为 dev"""
+    profile = (profile or 'dev').strip().lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE: {profile} (expected one of {', '.join(PROFILES)})")
+    backend = make_url(database_url).get_backend_name()
+    if profile == 'prod-sqlite' and backend != 'sqlite':
+        raise ValueError(f"DB_PROFILE=prod-sqlite requires a SQLite database, got {backend}")
+    if profile == 'prod-mysql' and backend != 'mysql':
+        raise ValueError(f"DB_PROFILE=prod-mysql requires a MySQL database, got {backend}")
+    return profile
+
+
+def engine_options(database_url: str, profile: str) -> Dict[str, Any]:
+    """返回配置档对应的 SQLALCHEMY_ENGINE_OPTIONS"""
+    if profile == 'dev':
+        return {}
+    sizing = pool_sizing(
+        workers=_env_int('WEB_CONCURRENCY', 2),
+        threads=_env_int('WEB_THREADS', 4),
+        max_connections=_env_int('DB_MAX_CONNECTIONS', 100),
+    )
+    if profile == 'prod-mysql':
+        return {
+            **sizing,
+            'pool_pre_ping': True,
+            # 小于 MySQL wait_timeout，避免拿到服务端已关闭的连接
+            'pool_recycle': _env_int('DB_POOL_RECYCLE', 280),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 10),
+        }
+    options: Dict[str, Any] = {
+        # 驱动层的锁等待（秒），与 busy_timeout 一致
+        'connect_args': {'timeout': sqlite_pragmas()['busy_timeout'] / 1000.0, 'check_same_thread': False},
+    }
+    if make_url(database_url).database not in (None, '', ':memory:'):
+        options.update(sizing)
+    return options
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """在引擎的每个新连接上执行 PRAGMA"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def init_engine(app, engines) -> None:
+    """按应用配置为已创建的引擎（主库及只读副本）安装连接钩子"""
+    if app.config.get('DB_PROFILE') == 'prod-sqlite':
+        for engine in engines:
+            install_sqlite_pragmas(engine, app.config.get('SQLITE_PRAGMAS') or sqlite_pragmas())
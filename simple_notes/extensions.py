@@ -1,15 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_wtf import CSRFProtect
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+
+from simple_notes.routing import RoutingSession
 
 # Flask extensions singletons
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
-csrf = CSRFProtect()
-limiter = Limiter(get_remote_address, default_limits=[])
+
+
+def __getattr__(name):
+    """csrf 与 limiter 在第一次访问时创建，导入 models 等模块时不加载 flask_wtf / flask_limiter"""
+    if name == 'csrf':
+        from flask_wtf.csrf import CSRFProtect
+        value = CSRFProtect()
+    elif name == 'limiter':
+        from flask_limiter import Limiter
+        from flask_limiter.util import get_remote_address
+        from simple_notes import ratelimit  # noqa: F401  注册 sqlite:// 限流存储
+        value = Limiter(get_remote_address, default_limits=[])
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "db",
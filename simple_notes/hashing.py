@@ -0,0 +1,139 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Optional
+
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+"""
+口令哈希
+
+- 算法与代价由 PASSWORD_HASH_METHOD（Werkzeug 方法串，如 scrypt:32768:8:1、pbkdf2:sha256:600000）
+  与 PASSWORD_SALT_LENGTH 配置
+- HASH_WORKERS > 0 时哈希在独立的进程池中计算，请求线程只等待结果；0 表示在请求线程内计算
+- 进程池同时受理的任务数不超过 HASH_QUEUE_SIZE，满时抛出 HashingBusy，由错误处理器返回 503
+- 存储的哈希参数与当前配置不一致（或被 rehash-credentials 标记）时 needs_rehash 为真，
+  验证成功后用本次提交的口令重新计算
+"""
+
+DEFAULT_METHOD = 'scrypt'
+DEFAULT_SALT_LENGTH = 16
+
+
+class HashingBusy(Exception):
+    """哈希进程池已满（或等待超时），请求应稍后重试"""
+
+
+def normalize_method(method: str) -> str:
+    """补全方法串中省略的默认参数，得到与存储哈希前缀一致的形式"""
+    name, *args = (method or DEFAULT_METHOD).split(':')
+    if name == 'scrypt':
+        n, r, p = args if args else (2 ** 15, 8, 1)
+        return f'scrypt:{int(n)}:{int(r)}:{int(p)}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f"Invalid hash method '{method}'")
+
+
+class HashPool:
+    """有界的哈希进程池
+
+    进程池在第一次使用时创建（spawn 方式，避免在多线程的服务进程中 fork）。
+    信号量在任务完成时才释放，因此 queue_size 同时约束排队与执行中的任务数。
+    """
+
+    def __init__(self, workers: int = 0, queue_size: int = 32, timeout: float = 10.0):
+        self.workers = max(0, workers)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, queue_size))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        if self.workers == 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy() from None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def get_hash_pool() -> HashPool:
+    """获取当前应用的哈希进程池（每个应用实例一个）"""
+    pool = current_app.extensions.get('hash_pool')
+    if pool is None:
+        pool = HashPool(
+            workers=current_app.config.get('HASH_WORKERS', 0),
+            queue_size=current_app.config.get('HASH_QUEUE_SIZE', 32),
+            timeout=current_app.config.get('HASH_TIMEOUT', 10.0),
+        )
+        current_app.extensions['hash_pool'] = pool
+    return pool
+
+
+def _configured_method() -> str:
+    if has_app_context():
+        return normalize_method(current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD))
+    return normalize_method(DEFAULT_METHOD)
+
+
+def _run(fn: Callable[..., Any], *args) -> Any:
+    if has_app_context():
+        return get_hash_pool().run(fn, *args)
+    return fn(*args)
+
+
+def hash_password(password: str) -> str:
+    """按当前配置计算口令哈希"""
+    salt_length = current_app.config.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH) if has_app_context() \
+        else DEFAULT_SALT_LENGTH
+    return _run(generate_password_hash, password, _configured_method(), salt_length)
+
+
+def verify_password(pwhash: Optional[str], password: str) -> bool:
+    """校验口令；空哈希直接视为不匹配"""
+    if not pwhash:
+        return False
+    return _run(check_password_hash, pwhash, password)
+
+
+def hash_prefix(pwhash: Optional[str]) -> str:
+    """哈希串中的方法与参数部分，如 scrypt:32768:8:1"""
+    return (pwhash or '').split('$', 1)[0]
+
+
+def current_method() -> str:
+    """当前配置的（补全默认参数后的）哈希方法串"""
+    return _configured_method()
+
+
+def needs_rehash(pwhash: Optional[str], flagged: Optional[bool] = False) -> bool:
+    """存储的哈希是否需要重新计算：已被批量标记，或参数与当前配置不同"""
+    if not pwhash:
+        return False
+    return bool(flagged) or hash_prefix(pwhash) != _configured_method()
@@ -0,0 +1,111 @@
+import glob
+import hashlib
+import os
+import re
+from typing import Dict, List, Set, Tuple
+
+from flask import Flask
+
+"""
+bootstrap-icons 子集化
+
+- simple-notes build-icons 扫描 templates/**/*.html 中的 bi-* 类名（含脚本里切换的类名），
+  从 bootstrap-icons.css 中只保留这些图标的规则，并用 fontTools 把 WOFF2 字体裁剪为对应字形，
+  输出 bootstrap-icons.subset.css 与 fonts/bootstrap-icons.subset.woff2
+- 字体裁剪需要安装 fonttools 与 brotli（WOFF2 压缩）；未安装时命令报错退出，不生成半成品
+- ICON_SUBSET=1 且子集文件存在时，base.html 改为引用子集样式表；之后执行 build-assets 生成指纹文件名
+- 在模板中使用新图标后须重新执行 build-icons，否则该图标显示为空白
+"""
+
+ICON_DIR = 'vendor/bootstrap-icons'
+ICON_CSS = f'{ICON_DIR}/bootstrap-icons.css'
+ICON_FONT = f'{ICON_DIR}/fonts/bootstrap-icons.woff2'
+SUBSET_CSS = f'{ICON_DIR}/bootstrap-icons.subset.css'
+SUBSET_FONT = f'{ICON_DIR}/fonts/bootstrap-icons.subset.woff2'
+
+ICON_CLASS = re.compile(r'(?<![\w-])bi-([a-z0-9][a-z0-9-]*)')
+ICON_RULE = re.compile(r'^\.bi-([a-z0-9-]+)::before\s*\{\s*content:\s*"\\([0-9a-f]+)";\s*\}[ \t]*\n?', re.M)
+FONT_SRC = re.compile(r'src:[^;]*;')
+
+
+def used_icons(app: Flask) -> Set[str]:
+    """模板中出现的图标名（不含 bi- 前缀）"""
+    names: Set[str] = set()
+    for path in glob.glob(os.path.join(app.root_path, app.template_folder, '**', '*.html'), recursive=True):
+        with open(path, encoding='utf-8') as f:
+            names.update(ICON_CLASS.findall(f.read()))
+    return names
+
+
+def trim_icon_rules(css: str, names: Set[str]) -> Tuple[str, Dict[str, int], List[str]]:
+    """只保留 names 对应的 .bi-*::before 规则
+
+    返回 (样式表, {图标名: 码位}, 样式表中不存在的图标名)。
+    """
+    codepoints: Dict[str, int] = {}
+
+    def keep(match):
+        name, code = match.group(1), match.group(2)
+        if name not in names:
+            return ''
+        codepoints[name] = int(code, 16)
+        return match.group(0)
+
+    trimmed = ICON_RULE.sub(keep, css)
+    return trimmed, codepoints, sorted(names - set(codepoints))
+
+
+def point_font_face(css: str, font_url: str) -> str:
+    """把 @font-face 的 src 改为只引用子集 WOFF2"""
+    return FONT_SRC.sub(f'src: url("{font_url}") format("woff2");', css, count=1)
+
+
+def subset_font(source: str, target: str, codepoints: Set[int]) -> None:
+    """把 WOFF2 字体裁剪为给定码位的字形"""
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = []
+    options.name_IDs = []
+    options.notdef_outline = True
+    options.hinting = False
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=sorted(codepoints))
+    subsetter.subset(font)
+    subset.save_font(font, target, options)
+
+
+def build_icons(app: Flask) -> dict:
+    """生成子集样式表与字体，返回图标数与前后字节数"""
+    static = app.static_folder
+    names = used_icons(app)
+    with open(os.path.join(static, ICON_CSS), encoding='utf-8') as f:
+        css = f.read()
+
+    font_path = os.path.join(static, SUBSET_FONT)
+    trimmed, codepoints, missing = trim_icon_rules(css, names)
+    subset_font(os.path.join(static, ICON_FONT), font_path, set(codepoints.values()))
+    with open(font_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    # 查询串随字体内容变化，未执行 build-assets 时浏览器也不会沿用旧字体
+    font_url = f'./fonts/{os.path.basename(SUBSET_FONT)}?{digest}'
+    trimmed = point_font_face(trimmed, font_url)
+    with open(os.path.join(static, SUBSET_CSS), 'w', encoding='utf-8') as f:
+        f.write(trimmed)
+
+    return {
+        'icons': sorted(codepoints),
+        'missing': missing,
+        'css_before': len(css.encode('utf-8')),
+        'css_after': len(trimmed.encode('utf-8')),
+        'font_before': os.path.getsize(os.path.join(static, ICON_FONT)),
+        'font_after': os.path.getsize(font_path),
+    }
+
+
+def icon_stylesheet(app: Flask) -> str:
+    """base.html 引用的图标样式表：子集存在且 ICON_SUBSET=1 时使用子集"""
+    subset = app.config.get('ICON_SUBSET') and os.path.isfile(os.path.join(app.static_folder, SUBSET_CSS))
+    return SUBSET_CSS if subset else ICON_CSS
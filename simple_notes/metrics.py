@@ -0,0 +1,65 @@
+import time
+from typing import Dict
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
+
+from simple_notes.extensions import db
+from simple_notes.routing import replica_engines
+from simple_notes.sharding import get_shard_map
+
+# 每个请求执行的 SQL 语句数，用于测试中断言各端点的查询预算、以及排查 N+1
+
+SQL_COUNT_HEADER = 'X-SQL-Statements'
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_statement_count = g.get('sql_statement_count', 0) + 1
+
+
+def sql_statement_count() -> int:
+    """返回当前请求已执行的 SQL 语句数"""
+    return g.get('sql_statement_count', 0)
+
+
+def reset_sql_statement_count():
+    # 测试中常预先推入应用上下文，多个请求会共享同一个 g，因此每个请求开始时清零
+    g.sql_statement_count = 0
+
+
+def add_sql_count_header(response):
+    if current_app.config.get('SQL_COUNT_HEADER'):
+        response.headers[SQL_COUNT_HEADER] = str(sql_statement_count())
+    return response
+
+
+def init_sql_counter(app):
+    """在应用的所有数据库引擎（含只读副本与笔记分片）上注册语句计数器"""
+    with app.app_context():
+        for engine in [*db.engines.values(), *replica_engines(app), *get_shard_map().engines.values()]:
+            if not event.contains(engine, 'before_cursor_execute', _count_statement):
+                event.listen(engine, 'before_cursor_execute', _count_statement)
+    app.before_request(reset_sql_statement_count)
+    app.after_request(add_sql_count_header)
+
+
+class StartupTimer:
+    """记录应用启动各阶段的耗时（秒）
+
+    阶段依次为 import（create_app 中导入扩展、蓝图与服务）、config、extensions、blueprints、db_check，
+    结果保存在 app.extensions['startup_timing']，并以 INFO 级别写入应用日志。
+    """
+
+    def __init__(self, import_seconds: float = 0.0):
+        self.phases: Dict[str, float] = {'import': import_seconds}
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    def report(self, app) -> None:
+        app.extensions['startup_timing'] = dict(self.phases)
+        app.logger.info('启动耗时: %s', ', '.join(f'{k}={v * 1000:.1f}ms' for k, v in self.phases.items()))
@@ -1,7 +1,7 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from .extensions import db
+from .hashing import hash_password, verify_password
 from flask_login import UserMixin
 
 class User(UserMixin, db.Model):
@@ -10,32 +10,82 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(50), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # 由 rehash-credentials 批量标记；下次登录成功时重新计算哈希并清除
+    password_rehash = db.Column(db.Boolean, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     # 角色由配置控制（ADMIN_USERS），避免迁移破坏现有表结构
 
     notes = db.relationship('NoteEntry', backref='user', lazy=True, cascade="all, delete-orphan")
+    stats = db.relationship('UserStats', uselist=False, lazy=True, cascade="all, delete-orphan")
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
 class NoteEntry(db.Model):
     __tablename__ = 'note_entries'
+    __table_args__ = (
+        # 按用户筛选并按 created_at DESC, id DESC 排序/游标翻页
+        db.Index('ix_note_entries_user_created', 'user_id', 'created_at', 'id'),
+        # 管理员跨用户按时间列表
+        db.Index('ix_note_entries_created', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    # 正文默认延迟加载，列表页只读取下面的摘要与统计列；需要正文时用 undefer 显式加载
+    content = db.deferred(db.Column(db.Text, nullable=False))
+    # 由 NoteService 写入时计算；NULL 表示存量记录尚未回填（simple-notes backfill-excerpts）
+    excerpt = db.Column(db.String(255), nullable=True)
+    word_count = db.Column(db.Integer, nullable=True)
+    char_count = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+class UserStats(db.Model):
+    # 反规范化的每用户统计，由 NoteService/AdminService 在同一事务中维护，避免分页时 COUNT(*)
+    __tablename__ = 'user_stats'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    note_count = db.Column(db.Integer, default=0, nullable=False)
+    content_bytes = db.Column(db.BigInteger, default=0, nullable=False)
+    # 写入计数，每次笔记增删改时递增，用作页面 ETag 的一部分
+    version = db.Column(db.Integer, default=0, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+class NotePosting(db.Model):
+    # 笔记二元组（bigram）倒排索引，作为派生数据不设外键；删除由 NoteService 维护，孤立记录在检索时被校验过滤
+    __tablename__ = 'note_postings'
+    __table_args__ = (
+        db.Index('ix_note_postings_note', 'note_id'),
+    )
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    # UTF-8 编码的二元组，使用二进制列保证 MySQL 与 SQLite 上的比较一致
+    gram = db.Column(db.VARBINARY(8), primary_key=True)
+    note_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+class NoteShardAssignment(db.Model):
+    # 用户笔记的固定分片（仅主库）；无记录时按一致性哈希定位。target 非空表示正在迁移到 target
+    __tablename__ = 'note_shard_assignments'
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    shard = db.Column(db.String(50), nullable=False)
+    target = db.Column(db.String(50), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+class NoteIdSequence(db.Model):
+    # 多分片时的笔记 ID 分配器（仅主库），只有一行，id 为已分配的最大笔记 ID；分配时原子地加上所需个数
+    __tablename__ = 'note_id_sequence'
+    id = db.Column(db.Integer, primary_key=True)
+
 class SecurityProfile(db.Model):
     __tablename__ = 'security_profiles'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
     question = db.Column(db.String(255), nullable=False)
     answer_hash = db.Column(db.String(255), nullable=False)
+    # 由 rehash-credentials 批量标记；下次辅助验证成功时重新计算哈希并清除
+    answer_rehash = db.Column(db.Boolean, nullable=True)
     failed_count = db.Column(db.Integer, default=0, nullable=False)
     locked_until = db.Column(db.DateTime, nullable=True)
 
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+from typing import Optional, Tuple
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+"""
+限流计数的 SQLite 存储
+
+- 以 limits 存储方案 sqlite:///path/to/ratelimit.db 注册，由 RATELIMIT_STORAGE_URI 选择
+- 同一台机器上的多个 worker 进程共享同一个文件，登录限流按全部进程合计生效，重启后计数仍在
+- 计数自增是一条 UPSERT ... RETURNING 语句，滑动窗口的检查与自增在 BEGIN IMMEDIATE 事务内完成，
+  因此多进程并发时也不会超发
+- 每个线程（以及 fork 后的每个进程）使用自己的连接；过期的计数在写入时顺带清理
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ratelimit_counters (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# 计数已过期时从 amount 重新开始，并重新设定过期时间
+INCR = """
+INSERT INTO ratelimit_counters (key, count, expires_at) VALUES (:key, :amount, :expires_at)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN expires_at <= :now THEN excluded.count ELSE count + excluded.count END,
+    expires_at = CASE WHEN expires_at <= :now THEN excluded.expires_at ELSE expires_at END
+RETURNING count
+"""
+
+# 每个连接每写入这么多次清理一次过期计数
+PURGE_EVERY = 1000
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """跨进程共享的限流计数存储，支持 fixed-window 与 sliding-window-counter 策略"""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, timeout: float = 5.0, **options):
+        self.path = uri.split('://', 1)[1][1:] or ':memory:'
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._connection()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(SCHEMA)
+            local.conn, local.pid, local.writes = conn, os.getpid(), 0
+        return local.conn
+
+    def _incr(self, conn: sqlite3.Connection, key: str, expiry: float, amount: int, now: float) -> int:
+        local = self._local
+        local.writes += 1
+        if local.writes % PURGE_EVERY == 0:
+            conn.execute('DELETE FROM ratelimit_counters WHERE expires_at <= ?', (now,))
+        row = conn.execute(INCR, {'key': key, 'amount': amount, 'expires_at': now + expiry, 'now': now}).fetchone()
+        return row[0]
+
+    def _get(self, conn: sqlite3.Connection, key: str, now: float) -> int:
+        row = conn.execute(
+            'SELECT count FROM ratelimit_counters WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        return self._incr(self._connection(), key, expiry, amount, time.time())
+
+    def get(self, key: str) -> int:
+        return self._get(self._connection(), key, time.time())
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._connection().execute(
+            'SELECT expires_at FROM ratelimit_counters WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def clear(self, key: str) -> None:
+        self._connection().execute('DELETE FROM ratelimit_counters WHERE key = ?', (key,))
+
+    def reset(self) -> Optional[int]:
+        return self._connection().execute('DELETE FROM ratelimit_counters').rowcount
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _window(self, conn: sqlite3.Connection, key: str, expiry: int,
+                now: float) -> Tuple[str, int, float, int, float]:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return current_key, previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        conn = self._connection()
+        now = time.time()
+        # IMMEDIATE 事务先取得写锁，读取两个窗口与自增之间不会插入其他进程的写入
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            current_key, previous_count, previous_ttl, current_count, _ttl = self._window(conn, key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                conn.execute('COMMIT')
+                return False
+            self._incr(conn, current_key, 2 * expiry, amount, now)
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        _key, *window = self._window(self._connection(), key, expiry, time.time())
+        return tuple(window)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
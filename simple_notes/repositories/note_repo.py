@@ -1,10 +1,25 @@
 from typing import Optional, List, Dict, Any
-from sqlalchemy import or_, desc
+from sqlalchemy import bindparam, inspect, or_, desc, func, select, update
+from sqlalchemy.orm import undefer
 from simple_notes.models import NoteEntry
 from simple_notes.extensions import db
+from simple_notes.routing import replica_read
+from simple_notes.sharding import gather, get_shard_map, merge_ordered, user_shard
+from simple_notes.repositories.pagination import KeysetPage, ResultPage, keyset_paginate
+from simple_notes.repositories.stats_repo import UserStatsRepository
+
+# 多分片时页码分页在每个分片上最多读取的行数（page * per_page）；更深的页请用游标分页
+SHARDED_PAGE_WINDOW = 1000
 
 class NoteRepository:
-    """笔记仓库，负责笔记数据的CRUD操作"""
+    """笔记仓库，负责笔记数据的CRUD操作
+
+    按用户的查询在 user_shard 范围内执行，只访问该用户所在的分片；
+    跨用户的列表在各分片上分别取数后按 created_at 归并（见 sharding.py）。
+    """
+    
+    def __init__(self, stats_repo: Optional[UserStatsRepository] = None):
+        self.stats_repo = stats_repo or UserStatsRepository()
     
     def add(self, entry: NoteEntry) -> None:
         """添加新笔记"""
@@ -18,6 +33,10 @@ class NoteRepository:
         """删除笔记"""
         db.session.delete(entry)
     
+    def flush(self) -> None:
+        """刷新会话，使新笔记获得主键"""
+        db.session.flush()
+    
     def commit(self) -> None:
         """提交事务"""
         db.session.commit()
@@ -27,66 +46,173 @@ class NoteRepository:
         db.session.rollback()
     
     def get_by_id(self, entry_id: int) -> Optional[NoteEntry]:
-        """根据ID获取笔记"""
-        return NoteEntry.query.get(entry_id)
+        """根据ID获取笔记（含正文）"""
+        return NoteEntry.query.options(undefer(NoteEntry.content)).get(entry_id)
     
     def get_by_id_for_user(self, entry_id: int, user_id: int) -> Optional[NoteEntry]:
-        """根据ID和用户ID获取笔记"""
-        return NoteEntry.query.filter_by(id=entry_id, user_id=user_id).first()
+        """根据ID和用户ID获取笔记（含正文）"""
+        with user_shard(user_id):
+            return NoteEntry.query.options(undefer(NoteEntry.content)).filter_by(id=entry_id, user_id=user_id).first()
     
+    @replica_read
     def list_by_user(self, user_id: int) -> List[NoteEntry]:
         """获取用户的所有笔记"""
-        return NoteEntry.query.filter_by(user_id=user_id).order_by(desc(NoteEntry.created_at)).all()
+        with user_shard(user_id):
+            return NoteEntry.query.filter_by(user_id=user_id).order_by(desc(NoteEntry.created_at)).all()
     
+    @replica_read
     def list_of_user_paginated(self, user_id: int, page: int = 1, per_page: int = 10):
-        """分页获取用户的笔记"""
-        return NoteEntry.query.filter_by(user_id=user_id).order_by(desc(NoteEntry.created_at)).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        """分页获取用户的笔记（总数取自 user_stats，不执行 COUNT(*)）"""
+        with user_shard(user_id):
+            pagination = NoteEntry.query.filter_by(user_id=user_id).order_by(desc(NoteEntry.created_at)).paginate(
+                page=page, per_page=per_page, error_out=False, count=False
+            )
+        pagination.total = self.stats_repo.note_count(user_id)
+        return pagination
+    
+    @replica_read
+    def list_of_user_keyset(self, user_id: int, after: Optional[str] = None,
+                            before: Optional[str] = None, per_page: int = 10) -> KeysetPage:
+        """游标分页获取用户的笔记"""
+        with user_shard(user_id):
+            return keyset_paginate(
+                NoteEntry.query.filter_by(user_id=user_id), NoteEntry,
+                after=after, before=before, per_page=per_page, gather=gather
+            )
     
+    @replica_read
     def list_paginated(self, page: int = 1, per_page: int = 20):
         """分页获取所有笔记（管理员用）"""
-        return NoteEntry.query.order_by(desc(NoteEntry.created_at)).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        return self.paginate_all(page=page, per_page=per_page)
     
+    @replica_read
     def paginate_all(self, page: int = 1, per_page: int = 20):
-        """分页获取所有笔记"""
-        return NoteEntry.query.order_by(desc(NoteEntry.created_at)).paginate(
-            page=page, per_page=per_page, error_out=False
+        """分页获取所有笔记（总数取自 user_stats 汇总）
+
+        多分片时每个分片各取前 page * per_page 条，再按 created_at 归并后切出当前页；
+        超过 SHARDED_PAGE_WINDOW 的页不再读取，返回空页。
+        """
+        if get_shard_map().sharded:
+            page, per_page = max(1, page), max(1, per_page)
+            window = page * per_page
+            if window > SHARDED_PAGE_WINDOW:
+                return ResultPage([], page, per_page, self.stats_repo.total_note_count())
+            parts = gather(lambda: NoteEntry.query.order_by(
+                desc(NoteEntry.created_at), desc(NoteEntry.id)
+            ).limit(window).all())
+            items = merge_ordered(parts, window)[(page - 1) * per_page:]
+            return ResultPage(items, page, per_page, self.stats_repo.total_note_count())
+        pagination = NoteEntry.query.order_by(desc(NoteEntry.created_at)).paginate(
+            page=page, per_page=per_page, error_out=False, count=False
         )
-    
+        pagination.total = self.stats_repo.total_note_count()
+        return pagination
+    
+    @replica_read
+    def paginate_all_keyset(self, after: Optional[str] = None, before: Optional[str] = None,
+                            per_page: int = 20, user_id: Optional[int] = None) -> KeysetPage:
+        """游标分页获取所有笔记，可按用户过滤（管理员用）"""
+        if user_id:
+            return self.list_of_user_keyset(user_id, after=after, before=before, per_page=per_page)
+        return keyset_paginate(NoteEntry.query, NoteEntry, after=after, before=before,
+                               per_page=per_page, gather=gather)
+    
+    @replica_read
     def search_user_entries(self, user_id: int, keyword: str, page: int = 1, per_page: int = 10):
         """搜索用户的笔记"""
         search_pattern = f"%{keyword}%"
-        return NoteEntry.query.filter(
-            NoteEntry.user_id == user_id,
-            or_(
-                NoteEntry.title.ilike(search_pattern),
-                NoteEntry.content.ilike(search_pattern)
+        with user_shard(user_id):
+            return NoteEntry.query.filter(
+                NoteEntry.user_id == user_id,
+                or_(
+                    NoteEntry.title.ilike(search_pattern),
+                    NoteEntry.content.ilike(search_pattern)
+                )
+            ).order_by(desc(NoteEntry.created_at)).paginate(
+                page=page, per_page=per_page, error_out=False
             )
-        ).order_by(desc(NoteEntry.created_at)).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
     
+    @replica_read
     def recent_entries(self, user_id: int, limit: int = 50) -> List[NoteEntry]:
         """获取用户最近的笔记"""
-        return NoteEntry.query.filter_by(user_id=user_id).order_by(
-            desc(NoteEntry.created_at)
-        ).limit(limit).all()
+        with user_shard(user_id):
+            return NoteEntry.query.filter_by(user_id=user_id).order_by(
+                desc(NoteEntry.created_at)
+            ).limit(limit).all()
+    
+    @replica_read
+    def sidebar_rows(self, user_id: int, limit: int = 50) -> List[Any]:
+        """获取侧边栏所需的最近笔记投影
+
+        只选取 id、title、created_at 以及按日期分桶用的 day 列，
+        不加载笔记正文。结果按创建时间倒序，同一天的记录相邻。
+        """
+        stmt = select(
+            NoteEntry.id,
+            NoteEntry.title,
+            NoteEntry.created_at,
+            func.date(NoteEntry.created_at).label('day'),
+        ).where(NoteEntry.user_id == user_id).order_by(
+            desc(NoteEntry.created_at), desc(NoteEntry.id)
+        ).limit(limit)
+        with user_shard(user_id):
+            return db.session.execute(stmt).all()
+    
+    def iter_missing_summaries(self, batch_size: int = 500):
+        """按主键分批读取尚未回填摘要的笔记，按批产出 [(id, content), ...]
+
+        每批是一条独立的 id > 上一批末尾 的查询，不保留打开的游标，
+        调用方可以在两批之间写入并提交（MySQL 的非缓冲游标在同一连接上执行其他语句时会被丢弃）。
+        多分片时应在 shard_scope 内逐个分片调用。
+        """
+        last_id = 0
+        while True:
+            rows = db.session.execute(select(NoteEntry.id, NoteEntry.content).where(
+                NoteEntry.excerpt.is_(None), NoteEntry.id > last_id
+            ).order_by(NoteEntry.id).limit(batch_size)).all()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+    
+    def count_missing_summaries(self) -> int:
+        """统计尚未回填摘要的笔记数量（各分片之和）"""
+        return sum(gather(lambda: db.session.execute(
+            select(func.count()).select_from(NoteEntry).where(NoteEntry.excerpt.is_(None))
+        ).scalar() or 0))
+    
+    def bulk_update_summaries(self, rows: List[Dict[str, Any]]) -> None:
+        """按主键批量写入摘要字段，rows 形如 [{'id', 'excerpt', 'word_count', 'char_count'}]"""
+        if not rows:
+            return
+        # ORM 按主键批量更新不支持分片会话，这里用 Core executemany，并按映射类选择当前分片
+        table = NoteEntry.__table__
+        stmt = update(table).where(table.c.id == bindparam('entry_id')).values(
+            excerpt=bindparam('excerpt'),
+            word_count=bindparam('word_count'),
+            char_count=bindparam('char_count'),
+        )
+        db.session.execute(
+            stmt, [{**row, 'entry_id': row['id']} for row in rows],
+            bind_arguments={'mapper': inspect(NoteEntry)},
+        )
     
+    @replica_read
     def get_entries_by_date_range(self, user_id: int, start_date, end_date):
         """根据日期范围获取笔记"""
-        return NoteEntry.query.filter(
-            NoteEntry.user_id == user_id,
-            NoteEntry.created_at >= start_date,
-            NoteEntry.created_at <= end_date
-        ).order_by(desc(NoteEntry.created_at)).all()
-    
+        with user_shard(user_id):
+            return NoteEntry.query.filter(
+                NoteEntry.user_id == user_id,
+                NoteEntry.created_at >= start_date,
+                NoteEntry.created_at <= end_date
+            ).order_by(desc(NoteEntry.created_at)).all()
+    
+    @replica_read
     def count_by_user(self, user_id: int) -> int:
         """统计用户的笔记数量"""
-        return NoteEntry.query.filter_by(user_id=user_id).count()
+        return self.stats_repo.note_count(user_id)
     
+    @replica_read
     def get_total_count(self) -> int:
         """获取所有笔记的总数"""
-        return NoteEntry.query.count()
\ No newline at end of file
+        return self.stats_repo.total_note_count()
\ No newline at end of file
@@ -0,0 +1,153 @@
+import base64
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from simple_notes.sharding import merge_ordered
+
+
+class KeysetPage:
+    """游标（seek）分页结果
+
+    按 (created_at DESC, id DESC) 排序，翻页时只按游标定位，
+    不执行 OFFSET 与 COUNT(*)，因此任意深度的页面开销一致。
+    """
+
+    def __init__(self, items: List[Any], per_page: int,
+                 next_cursor: Optional[str] = None,
+                 prev_cursor: Optional[str] = None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def encode_cursor(created_at: datetime, entry_id: int) -> str:
+    """将 (created_at, id) 编码为不透明的游标字符串"""
+    raw = f"{created_at.isoformat()}|{entry_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """解析游标，格式非法时返回 None"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        ts, _, entry_id = raw.rpartition('|')
+        return datetime.fromisoformat(ts), int(entry_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def _fetch(query, order, limit: int, gather: Optional[Callable], newest_first: bool) -> List[Any]:
+    """执行排序后的限量查询；给定 gather 时在每个分片上执行并按同一顺序归并"""
+    def run():
+        return query.order_by(*order).limit(limit).all()
+    if gather is None:
+        return run()
+    return merge_ordered(gather(run), limit, newest_first=newest_first)
+
+
+def keyset_paginate(query, model, after: Optional[str] = None,
+                    before: Optional[str] = None,
+                    per_page: int = 10, gather: Optional[Callable] = None) -> KeysetPage:
+    """对查询执行游标分页
+
+    Args:
+        query: 已附加过滤条件的查询（不含排序）
+        model: 含 created_at 与 id 列的模型类
+        after: 向后翻页的游标（取比游标更早的记录）
+        before: 向前翻页的游标（取比游标更新的记录）
+        per_page: 每页条数
+        gather: 分片场景下的 sharding.gather，各分片各取一页后归并
+
+    Returns:
+        KeysetPage 分页结果
+    """
+    per_page = max(1, per_page)
+    created_col, id_col = model.created_at, model.id
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before) if not after_key else None
+
+    if before_key:
+        ts, entry_id = before_key
+        rows = _fetch(query.filter(or_(
+            created_col > ts,
+            and_(created_col == ts, id_col > entry_id),
+        )), (created_col.asc(), id_col.asc()), per_page + 1, gather, newest_first=False)
+        if not rows:
+            # 游标之前已无数据（例如记录被删除），回到第一页
+            return keyset_paginate(query, model, per_page=per_page, gather=gather)
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        return KeysetPage(
+            items, per_page,
+            next_cursor=encode_cursor(items[-1].created_at, items[-1].id),
+            prev_cursor=encode_cursor(items[0].created_at, items[0].id) if has_prev else None,
+        )
+
+    if after_key:
+        ts, entry_id = after_key
+        query = query.filter(or_(
+            created_col < ts,
+            and_(created_col == ts, id_col < entry_id),
+        ))
+    rows = _fetch(query, (created_col.desc(), id_col.desc()), per_page + 1, gather, newest_first=True)
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = None
+    prev_cursor = None
+    if items and has_next:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    if items and after_key:
+        prev_cursor = encode_cursor(items[0].created_at, items[0].id)
+    return KeysetPage(items, per_page, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+class ResultPage:
+    """页码分页结果，接口与 Flask-SQLAlchemy 的 Pagination 保持一致
+
+    用于结果顺序不由 ORM 查询决定的场景（例如按相关度排序的全文检索）。
+    """
+
+    def __init__(self, items: List[Any], page: int, per_page: int, total: int):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self) -> int:
+        if self.per_page <= 0 or self.total <= 0:
+            return 0
+        return (self.total + self.per_page - 1) // self.per_page
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def prev_num(self) -> Optional[int]:
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.pages
+
+    @property
+    def next_num(self) -> Optional[int]:
+        return self.page + 1 if self.has_next else None
+
+    def __iter__(self):
+        return iter(self.items)
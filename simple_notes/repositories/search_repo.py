@@ -0,0 +1,440 @@
+import abc
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+from flask import current_app
+from sqlalchemy import text, func, or_, desc, select, delete
+from sqlalchemy.orm import undefer
+from simple_notes.models import NoteEntry, NotePosting, AppSetting
+from simple_notes.extensions import db
+from simple_notes.routing import replica_read
+from simple_notes.sharding import gather, get_shard_map, shard_scope, user_shard
+from simple_notes.repositories.pagination import ResultPage
+
+FTS_TABLE = 'note_entries_fts'
+FTS_BUILD_TABLE = 'note_entries_fts_build'
+MYSQL_FULLTEXT_INDEX = 'ft_note_entries_title_content'
+NGRAM_BUILT_SETTING = 'search_ngram_built'
+# 追补重建期间的写入时，向前多取的时间，容忍各进程时钟的微小偏差
+CATCH_UP_MARGIN = timedelta(seconds=1)
+
+
+class SearchBackend(abc.ABC):
+    """全文检索后端基类
+
+    后端不可用（索引未建立、数据库不支持）或关键词过短时，
+    supports() 返回 False，调用方应回退到 ILIKE 查询。
+
+    索引是否可用的探测结果（包括不可用）缓存 check_interval 秒，
+    其他进程执行 reindex 后，本进程最迟在该间隔后看到变化。
+    """
+
+    name = None
+    min_keyword_length = 1
+
+    def __init__(self, check_interval: float = 5.0, timer: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.check_interval = float(check_interval)
+        self._timer = timer
+        self._sleep = sleep
+        self._available = False
+        self._next_check = 0.0
+
+    def is_available(self) -> bool:
+        now = self._timer()
+        if now >= self._next_check:
+            self._available = self._probe()
+            self._next_check = now + self.check_interval
+        return self._available
+
+    def _set_available(self, available: bool) -> None:
+        self._available = available
+        self._next_check = self._timer() + self.check_interval
+
+    @abc.abstractmethod
+    def _probe(self) -> bool:
+        """查询数据库，判断索引是否已建立"""
+
+    def supports(self, keyword: str) -> bool:
+        """判断当前后端能否处理该关键词"""
+        return len(keyword.strip()) >= self.min_keyword_length and self.is_available()
+
+    def index_entry(self, entry: NoteEntry) -> None:
+        """新增或更新一条笔记的索引（不提交）"""
+
+    def remove_entry(self, entry_id: int) -> None:
+        """删除一条笔记的索引（不提交）"""
+
+    @abc.abstractmethod
+    def search_ids(self, user_id: int, keyword: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        """按相关度返回 (笔记ID列表, 命中总数)"""
+
+    @replica_read
+    def search(self, user_id: int, keyword: str, page: int = 1, per_page: int = 10) -> ResultPage:
+        """按相关度分页检索用户的笔记"""
+        page = max(1, page)
+        ids, total = self.search_ids(user_id, keyword.strip(), per_page, (page - 1) * per_page)
+        entries = {}
+        if ids:
+            with user_shard(user_id):
+                entries = {e.id: e for e in NoteEntry.query.filter(
+                    NoteEntry.id.in_(ids), NoteEntry.user_id == user_id
+                ).all()}
+        return ResultPage([entries[i] for i in ids if i in entries], page, per_page, total)
+
+    @abc.abstractmethod
+    def create_index(self) -> None:
+        """创建一份空的待构建索引；在 activate_index() 之前不影响检索"""
+
+    def index_batch(self, entries: Iterable[NoteEntry]) -> None:
+        """批量写入待构建的索引（不提交）；同一笔记重复写入时覆盖"""
+        for entry in entries:
+            self.index_entry(entry)
+
+    def activate_index(self) -> None:
+        """启用构建完成的索引（不提交）"""
+
+    def catch_up(self, since: datetime) -> int:
+        """重新索引 since 之后新增或修改的笔记，返回处理的笔记数
+
+        这些笔记可能在重建期间已被扫描过，或写入时本进程以外的
+        工作进程尚未看到新索引。
+        """
+        done = 0
+        for shard in get_shard_map().names:
+            with shard_scope(shard):
+                entries = NoteEntry.query.options(undefer(NoteEntry.content)).filter(
+                    NoteEntry.updated_at >= since
+                ).all()
+            for entry in entries:
+                self.index_entry(entry)
+            done += len(entries)
+        return done
+
+    def rebuild(self, batch_size: int = 500, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """重建索引，逐个分片按主键分批读取笔记并逐批提交，返回处理的笔记数
+
+        构建期间检索与写入仍使用原索引；构建完成后启用新索引，
+        等待其他工作进程的可用性缓存过期，再追补重建期间的写入。
+        """
+        started = datetime.utcnow() - CATCH_UP_MARGIN
+        self.create_index()
+        db.session.commit()
+        total = sum(gather(lambda: NoteEntry.query.count()))
+        done = 0
+        for shard in get_shard_map().names:
+            last_id = 0
+            while True:
+                with shard_scope(shard):
+                    batch = NoteEntry.query.options(undefer(NoteEntry.content)).filter(
+                        NoteEntry.id > last_id
+                    ).order_by(NoteEntry.id).limit(batch_size).all()
+                if not batch:
+                    break
+                self.index_batch(batch)
+                db.session.commit()
+                done += len(batch)
+                last_id = batch[-1].id
+                # 释放已处理的对象，避免大表重建时会话无限增长
+                for entry in batch:
+                    db.session.expunge(entry)
+                if progress:
+                    progress(done, total)
+        self.activate_index()
+        db.session.commit()
+        self._set_available(True)
+        self._sleep(self.check_interval)
+        self.catch_up(started)
+        db.session.commit()
+        return done
+
+
+class LikeBackend(SearchBackend):
+    """不建立索引，始终回退到 ILIKE 查询"""
+
+    name = 'like'
+
+    def _probe(self) -> bool:
+        return False
+
+    def search_ids(self, user_id: int, keyword: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        search_pattern = f"%{keyword}%"
+        with user_shard(user_id):
+            query = db.session.query(NoteEntry.id).filter(
+                NoteEntry.user_id == user_id,
+                or_(NoteEntry.title.ilike(search_pattern), NoteEntry.content.ilike(search_pattern))
+            )
+            total = query.count()
+            ids = [r[0] for r in query.order_by(desc(NoteEntry.created_at)).limit(limit).offset(offset)]
+        return ids, total
+
+    def create_index(self) -> None:
+        pass
+
+    def rebuild(self, batch_size: int = 500, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        return 0
+
+
+class SqliteFtsBackend(SearchBackend):
+    """SQLite FTS5 后端，使用 trigram 分词以支持中文子串匹配
+
+    重建时写入另一张表，写完后在同一事务内替换原表，
+    重建期间检索与写入照常使用原表。
+    """
+
+    name = 'fts5'
+    min_keyword_length = 3
+
+    def __init__(self, tokenizer: str = 'trigram', **kwargs):
+        super().__init__(**kwargs)
+        self.tokenizer = tokenizer
+
+    def _probe(self) -> bool:
+        row = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE},
+        ).first()
+        return row is not None
+
+    def index_entry(self, entry: NoteEntry) -> None:
+        if not self.is_available():
+            return
+        db.session.execute(
+            text(f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, content, user_id) "
+                 "VALUES (:id, :title, :content, :user_id)"),
+            {'id': entry.id, 'title': entry.title, 'content': entry.content, 'user_id': entry.user_id},
+        )
+
+    def remove_entry(self, entry_id: int) -> None:
+        if not self.is_available():
+            return
+        db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': entry_id})
+
+    def search_ids(self, user_id: int, keyword: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        # 整体作为短语查询，trigram 分词下即为子串匹配
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        params = {'q': phrase, 'user_id': user_id, 'limit': limit, 'offset': offset}
+        # bm25 越小越相关；标题命中权重高于正文
+        rows = db.session.execute(text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q AND user_id = :user_id "
+            f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0, 0.0) LIMIT :limit OFFSET :offset"
+        ), params).all()
+        total = db.session.execute(text(
+            f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q AND user_id = :user_id"
+        ), params).scalar() or 0
+        return [r[0] for r in rows], total
+
+    def create_index(self) -> None:
+        db.session.execute(text(f"DROP TABLE IF EXISTS {FTS_BUILD_TABLE}"))
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE {FTS_BUILD_TABLE} USING fts5("
+            f"title, content, user_id UNINDEXED, tokenize = '{self.tokenizer}')"
+        ))
+
+    def index_batch(self, entries: Iterable[NoteEntry]) -> None:
+        rows = [
+            {'id': e.id, 'title': e.title, 'content': e.content, 'user_id': e.user_id}
+            for e in entries
+        ]
+        if rows:
+            db.session.execute(
+                text(f"INSERT OR REPLACE INTO {FTS_BUILD_TABLE} (rowid, title, content, user_id) "
+                     "VALUES (:id, :title, :content, :user_id)"),
+                rows,
+            )
+
+    def activate_index(self) -> None:
+        # pysqlite 只在 DML 前隐式开启事务；先执行一条空删除，
+        # 使删除原表与改名在同一事务中完成，其他连接不会看到缺表的中间状态
+        db.session.execute(text(f"DELETE FROM {FTS_BUILD_TABLE} WHERE rowid < 0"))
+        db.session.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        db.session.execute(text(f"ALTER TABLE {FTS_BUILD_TABLE} RENAME TO {FTS_TABLE}"))
+
+
+class MysqlFulltextBackend(SearchBackend):
+    """MySQL FULLTEXT 后端（ngram 解析器），索引随 note_entries 自动维护"""
+
+    name = 'mysql-fulltext'
+    # ngram_token_size 默认为 2
+    min_keyword_length = 2
+
+    def _probe(self) -> bool:
+        row = db.session.execute(text(
+            "SELECT 1 FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'note_entries' "
+            "AND INDEX_NAME = :name AND INDEX_TYPE = 'FULLTEXT' LIMIT 1"
+        ), {'name': MYSQL_FULLTEXT_INDEX}).first()
+        return row is not None
+
+    def search_ids(self, user_id: int, keyword: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        phrase = '"' + keyword.replace('"', ' ') + '"'
+        params = {'q': phrase, 'user_id': user_id, 'limit': limit, 'offset': offset}
+        match = "MATCH (title, content) AGAINST (:q IN BOOLEAN MODE)"
+        rows = db.session.execute(text(
+            f"SELECT id, {match} AS score FROM note_entries WHERE user_id = :user_id AND {match} "
+            "ORDER BY score DESC, created_at DESC LIMIT :limit OFFSET :offset"
+        ), params).all()
+        total = db.session.execute(text(
+            f"SELECT COUNT(*) FROM note_entries WHERE user_id = :user_id AND {match}"
+        ), params).scalar() or 0
+        return [r[0] for r in rows], total
+
+    def create_index(self) -> None:
+        if self._probe():
+            db.session.execute(text(f"ALTER TABLE note_entries DROP INDEX {MYSQL_FULLTEXT_INDEX}"))
+        db.session.execute(text(
+            f"ALTER TABLE note_entries ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} (title, content) WITH PARSER ngram"
+        ))
+
+    def rebuild(self, batch_size: int = 500, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        # FULLTEXT 索引由 MySQL 在建索引时一次性构建并随写入自动维护，无需逐批写入与追补
+        self.create_index()
+        db.session.commit()
+        self._set_available(True)
+        total = NoteEntry.query.count()
+        if progress:
+            progress(total, total)
+        return total
+
+
+def note_grams(text_value: Optional[str]) -> Set[bytes]:
+    """提取文本的二元组集合（小写，UTF-8 编码）"""
+    value = (text_value or '').lower()
+    return {value[i:i + 2].encode('utf-8') for i in range(len(value) - 1)}
+
+
+class NgramIndexBackend(SearchBackend):
+    """基于应用数据库的二元组倒排索引，适用于中文子串检索
+
+    查询时对关键词的全部二元组求倒排表交集得到候选笔记，
+    再对候选行执行 ILIKE 校验，结果与原 ILIKE 查询完全一致，
+    但只读取候选行。SQLite 与 MySQL 上行为相同。
+    """
+
+    name = 'ngram'
+    min_keyword_length = 2
+
+    def _probe(self) -> bool:
+        # 需先执行 reindex 为存量笔记建立倒排表
+        return db.session.get(AppSetting, NGRAM_BUILT_SETTING) is not None
+
+    def entry_grams(self, entry: NoteEntry) -> Set[bytes]:
+        # 标题与正文分别切分，避免跨字段产生二元组
+        return note_grams(entry.title) | note_grams(entry.content)
+
+    def entry_postings(self, note_id: int) -> Set[Tuple[int, bytes]]:
+        """笔记当前的倒排记录 (user_id, gram)"""
+        return set(db.session.query(NotePosting.user_id, NotePosting.gram).filter(
+            NotePosting.note_id == note_id
+        ).all())
+
+    def index_entry(self, entry: NoteEntry) -> None:
+        """对比新旧二元组集合，只写入差异部分"""
+        if not self.is_available():
+            return
+        # 以 (user_id, gram) 比较，顺带清除该笔记ID上残留的其他用户倒排记录
+        old = self.entry_postings(entry.id)
+        new = {(entry.user_id, g) for g in self.entry_grams(entry)}
+        removed = old - new
+        added = new - old
+        for user_id in {u for u, _g in removed}:
+            db.session.execute(delete(NotePosting).where(
+                NotePosting.note_id == entry.id,
+                NotePosting.user_id == user_id,
+                NotePosting.gram.in_([g for u, g in removed if u == user_id]),
+            ))
+        if added:
+            db.session.execute(NotePosting.__table__.insert(), [
+                {'user_id': user_id, 'gram': g, 'note_id': entry.id} for user_id, g in added
+            ])
+
+    def remove_entry(self, entry_id: int) -> None:
+        if not self.is_available():
+            return
+        db.session.execute(delete(NotePosting).where(NotePosting.note_id == entry_id))
+
+    def candidate_ids(self, user_id: int, keyword: str):
+        """返回包含关键词全部二元组的笔记ID子查询"""
+        grams = note_grams(keyword)
+        return select(NotePosting.note_id).where(
+            NotePosting.user_id == user_id, NotePosting.gram.in_(grams)
+        ).group_by(NotePosting.note_id).having(
+            func.count(NotePosting.gram) == len(grams)
+        )
+
+    def search_ids(self, user_id: int, keyword: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        """按创建时间倒序返回命中的笔记ID"""
+        search_pattern = f"%{keyword}%"
+        candidates = self.candidate_ids(user_id, keyword)
+        if get_shard_map().sharded:
+            # 倒排表在主库、笔记在分片上，不能作为子查询，先取出候选ID
+            candidates = db.session.execute(candidates).scalars().all()
+        # 候选集合已按用户限定；此处不再按 user_id 过滤，
+        # 以免优化器改走用户索引遍历该用户的全部笔记
+        with user_shard(user_id):
+            query = db.session.query(NoteEntry.id).filter(
+                NoteEntry.id.in_(candidates),
+                or_(
+                    NoteEntry.title.ilike(search_pattern),
+                    NoteEntry.content.ilike(search_pattern)
+                )
+            )
+            total = query.count()
+            ids = [r[0] for r in query.order_by(desc(NoteEntry.created_at)).limit(limit).offset(offset)]
+        return ids, total
+
+    def create_index(self) -> None:
+        db.session.execute(delete(NotePosting))
+
+    def index_batch(self, entries: Iterable[NoteEntry]) -> None:
+        entries = list(entries)
+        # 先删后插，重复写入同一笔记不会触发主键冲突
+        db.session.execute(delete(NotePosting).where(NotePosting.note_id.in_([e.id for e in entries])))
+        rows = [
+            {'user_id': e.user_id, 'gram': g, 'note_id': e.id}
+            for e in entries for g in self.entry_grams(e)
+        ]
+        if rows:
+            db.session.execute(NotePosting.__table__.insert(), rows)
+
+    def activate_index(self) -> None:
+        # 全部写完后才标记可用，重建期间检索回退到 ILIKE
+        db.session.add(AppSetting(key=NGRAM_BUILT_SETTING, value='1'))
+
+    def rebuild(self, batch_size: int = 500, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        # 先撤销可用标记，并等待各工作进程的缓存过期、停止维护倒排表，
+        # 再清空重建；重建期间的写入由 catch_up() 补齐
+        marker = db.session.get(AppSetting, NGRAM_BUILT_SETTING)
+        if marker is not None:
+            db.session.delete(marker)
+            db.session.commit()
+            self._set_available(False)
+            self._sleep(self.check_interval)
+        return super().rebuild(batch_size=batch_size, progress=progress)
+
+
+def create_search_backend(name: str, dialect: str) -> SearchBackend:
+    """根据配置名与数据库方言创建检索后端"""
+    if name == 'auto':
+        name = 'fts' if dialect in ('sqlite', 'mysql') else 'like'
+    options = {'check_interval': current_app.config.get('SEARCH_CHECK_INTERVAL', 5)}
+    if name == 'ngram':
+        return NgramIndexBackend(**options)
+    if name == 'fts':
+        if dialect == 'sqlite':
+            return SqliteFtsBackend(current_app.config.get('SEARCH_FTS_TOKENIZER', 'trigram'), **options)
+        if dialect == 'mysql' and not get_shard_map().sharded:
+            # FULLTEXT 索引建在 note_entries 上，笔记分片后主库上的索引不再完整
+            return MysqlFulltextBackend(**options)
+    return LikeBackend(**options)
+
+
+def get_search_backend() -> SearchBackend:
+    """获取当前应用的检索后端（每个应用实例一个）"""
+    backend = current_app.extensions.get('search_backend')
+    if backend is None:
+        backend = create_search_backend(
+            current_app.config.get('SEARCH_BACKEND', 'auto'), db.engine.dialect.name
+        )
+        current_app.extensions['search_backend'] = backend
+    return backend
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional
+
+from flask import current_app
+from sqlalchemy import Integer, String, cast, select, update
+
+from simple_notes.extensions import db
+from simple_notes.models import AppSetting
+
+VERSION_KEY = 'settings_version'
+
+
+class SettingDef(NamedTuple):
+    """单个设置项的定义：值在数据库中以文本保存，读写时按类型转换"""
+    parse: Callable[[str], Any]
+    dump: Callable[[Any], str]
+    default: Any
+
+
+def _parse_user_set(value: str) -> frozenset:
+    return frozenset(u.strip() for u in json.loads(value) if isinstance(u, str) and u.strip())
+
+
+def _dump_user_set(value) -> str:
+    return json.dumps(sorted(set(value)))
+
+
+SETTINGS: Dict[str, SettingDef] = {
+    'site_name': SettingDef(str, str, '日记Web应用'),
+    'site_description': SettingDef(str, str, '一个简单而安全的个人日记应用'),
+    'max_entries_per_page': SettingDef(int, str, 10),
+    # 连续输错密码达到该次数后锁定账户，需辅助验证解锁
+    'login_attempts_limit': SettingDef(int, str, 3),
+    'lockout_duration_minutes': SettingDef(int, str, 30),
+    # None 表示尚未写入，调用方回退到 ADMIN_USERS 配置
+    'admin_users': SettingDef(_parse_user_set, _dump_user_set, None),
+}
+
+
+class SettingsRegistry:
+    """带进程内缓存的应用设置注册表
+
+    读取直接返回内存中的值；每隔 check_interval 秒最多查询一次版本号，
+    版本号变化时才重新加载全部设置。写入设置时在同一事务中递增版本号，
+    因此其他工作进程最迟在 check_interval 秒后看到变更。
+    """
+
+    def __init__(self, check_interval: float = 5.0, timer: Callable[[], float] = time.monotonic):
+        self.check_interval = float(check_interval)
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._version: Optional[int] = None
+        self._next_check = 0.0
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def get(self, key: str) -> Any:
+        """读取设置的类型化值，未写入时返回默认值"""
+        definition = SETTINGS[key]
+        self._refresh()
+        return self._values.get(key, definition.default)
+
+    def has(self, key: str) -> bool:
+        """判断设置是否已写入数据库"""
+        if key not in SETTINGS:
+            raise KeyError(key)
+        self._refresh()
+        return key in self._values
+
+    def set(self, key: str, value: Any) -> None:
+        """写入单个设置并提交"""
+        self.set_many({key: value})
+
+    def set_many(self, values: Mapping[str, Any]) -> None:
+        """写入多个设置、递增版本号并提交"""
+        for key, value in values.items():
+            text = SETTINGS[key].dump(value)
+            setting = db.session.get(AppSetting, key)
+            if setting is None:
+                db.session.add(AppSetting(key=key, value=text))
+            else:
+                setting.value = text
+        self._bump_version()
+        db.session.commit()
+        # 本进程的写入立即可见：清空已知版本号，下一次读取必然重新加载
+        self._version = None
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """使下一次读取立即检查版本号"""
+        self._next_check = 0.0
+
+    def _bump_version(self) -> None:
+        bumped = db.session.execute(
+            update(AppSetting).where(AppSetting.key == VERSION_KEY).values(
+                value=cast(cast(AppSetting.value, Integer) + 1, String)
+            )
+        ).rowcount
+        if not bumped:
+            db.session.add(AppSetting(key=VERSION_KEY, value='1'))
+
+    def _refresh(self) -> None:
+        now = self._timer()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            raw_version = db.session.execute(
+                select(AppSetting.value).where(AppSetting.key == VERSION_KEY)
+            ).scalar()
+            version = int(raw_version or 0)
+            if version != self._version:
+                self._values = self._load()
+                self._version = version
+            self._next_check = now + self.check_interval
+
+    def _load(self) -> Dict[str, Any]:
+        rows = db.session.execute(
+            select(AppSetting.key, AppSetting.value).where(AppSetting.key.in_(list(SETTINGS)))
+        ).all()
+        values = {}
+        for key, text in rows:
+            try:
+                values[key] = SETTINGS[key].parse(text)
+            except (TypeError, ValueError):
+                current_app.logger.warning('设置 %s 的值无效，使用默认值: %r', key, text)
+        return values
+
+
+def get_settings() -> SettingsRegistry:
+    """获取当前应用的设置注册表（每个应用实例一个）"""
+    registry = current_app.extensions.get('settings_registry')
+    if registry is None:
+        registry = SettingsRegistry(check_interval=current_app.config.get('SETTINGS_CHECK_INTERVAL', 5))
+        current_app.extensions['settings_registry'] = registry
+    return registry
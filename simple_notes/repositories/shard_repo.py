@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, bindparam, delete, insert, select
+
+from simple_notes.extensions import db
+from simple_notes.models import NoteEntry, NoteShardAssignment
+from simple_notes.sharding import get_shard_map
+
+
+class NoteShardRepository:
+    """笔记分片仓库：维护用户的分片指派，并在分片之间搬运笔记行
+
+    指派记录在主库，通过 ORM 会话读写；搬运直接使用各分片引擎的连接，
+    每批独立提交，不占用请求会话。
+    """
+
+    def get_assignment(self, user_id: int) -> Optional[NoteShardAssignment]:
+        return db.session.get(NoteShardAssignment, user_id)
+
+    def set_assignment(self, user_id: int, shard: str, target: Optional[str] = None) -> None:
+        """写入用户的分片指派（不提交）；target 非空表示正在迁移"""
+        assignment = self.get_assignment(user_id)
+        if assignment is None:
+            db.session.add(NoteShardAssignment(user_id=user_id, shard=shard, target=target))
+        else:
+            assignment.shard = shard
+            assignment.target = target
+
+    def commit(self) -> None:
+        db.session.commit()
+        get_shard_map().invalidate()
+
+    def engine(self, shard: str):
+        return get_shard_map().bind_for(shard, db.engine)
+
+    def fetch_user_batch(self, shard: str, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        """按创建时间顺序读取用户在某分片上的一批笔记（完整行）"""
+        table = NoteEntry.__table__
+        # 与 ix_note_entries_user_created 的列顺序一致，按索引顺序读取而不是对该用户的全部笔记排序
+        with self.engine(shard).connect() as conn:
+            rows = conn.execute(
+                select(table).where(table.c.user_id == user_id).order_by(
+                    table.c.created_at, table.c.id
+                ).limit(limit)
+            ).mappings().all()
+        return [dict(row) for row in rows]
+
+    def copy_rows(self, shard: str, rows: List[Dict[str, Any]]) -> None:
+        """把笔记行写入目标分片，已存在的同 ID 行被覆盖"""
+        table = NoteEntry.__table__
+        with self.engine(shard).begin() as conn:
+            conn.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+            conn.execute(insert(table), rows)
+
+    def release_rows(self, source: str, target: str, rows: List[Dict[str, Any]]) -> int:
+        """从源分片删除已复制且未被改动的行，返回删除数
+
+        复制之后被修改的行（updated_at 变化）保留在源分片，下一轮重新复制；
+        复制之后被用户删除的行，同步从目标分片删除。
+        """
+        table = NoteEntry.__table__
+        copied = {row['id']: row['updated_at'] for row in rows}
+        with self.engine(source).begin() as conn:
+            current = dict(conn.execute(
+                select(table.c.id, table.c.updated_at).where(table.c.id.in_(list(copied)))
+            ).all())
+            unchanged = [
+                {'entry_id': entry_id, 'stamp': stamp}
+                for entry_id, stamp in copied.items() if current.get(entry_id) == stamp
+            ]
+            if unchanged:
+                conn.execute(delete(table).where(and_(
+                    table.c.id == bindparam('entry_id'),
+                    table.c.updated_at == bindparam('stamp'),
+                )), unchanged)
+        vanished = [entry_id for entry_id in copied if entry_id not in current]
+        if vanished:
+            with self.engine(target).begin() as conn:
+                conn.execute(delete(table).where(table.c.id.in_(vanished)))
+        return len(unchanged)
@@ -0,0 +1,160 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, cast, insert, select, LargeBinary
+from simple_notes.models import User, NoteEntry, NoteShardAssignment, UserStats
+from simple_notes.extensions import db
+from simple_notes.sharding import PRIMARY_SHARD, shard_scope, user_shard
+
+
+def content_size(content: Optional[str]) -> int:
+    """笔记内容的字节数（UTF-8）"""
+    return len((content or '').encode('utf-8'))
+
+
+class UserStatsRepository:
+    """每用户统计仓库，维护笔记数与内容字节数计数器"""
+
+    def get(self, user_id: int) -> Optional[UserStats]:
+        """获取用户统计行"""
+        return db.session.get(UserStats, user_id)
+
+    def note_count(self, user_id: int) -> int:
+        """读取用户笔记数；统计行缺失时回退为 COUNT(*)"""
+        stats = self.get(user_id)
+        if stats is not None:
+            return stats.note_count
+        with user_shard(user_id):
+            return NoteEntry.query.filter_by(user_id=user_id).count()
+
+    def total_note_count(self) -> int:
+        """所有用户笔记总数；缺少统计行的用户按实际数据补足"""
+        total = db.session.query(func.coalesce(func.sum(UserStats.note_count), 0)).scalar()
+        missing = self.users_without_stats()
+        if missing:
+            total += sum(count for count, _size in self.aggregate(missing).values())
+        return total
+
+    def users_without_stats(self, limit: Optional[int] = None) -> List[int]:
+        """还没有统计行的用户ID（统计表上线前注册、之后未写过笔记的用户）"""
+        query = db.session.query(User.id).outerjoin(UserStats, UserStats.user_id == User.id).filter(
+            UserStats.user_id.is_(None)
+        ).order_by(User.id)
+        if limit:
+            query = query.limit(limit)
+        return [row[0] for row in query.all()]
+
+    def _increment(self, user_id: int, notes: int, content_bytes: int) -> int:
+        return UserStats.query.filter_by(user_id=user_id).update({
+            UserStats.note_count: UserStats.note_count + notes,
+            UserStats.content_bytes: UserStats.content_bytes + content_bytes,
+            UserStats.version: func.coalesce(UserStats.version, 0) + 1,
+        }, synchronize_session=False)
+
+    def apply_delta(self, user_id: int, notes: int = 0, content_bytes: int = 0) -> None:
+        """在当前事务中原子地调整计数器
+
+        统计行不存在时按当前数据（已含本次改动）计算并插入，保证计数从正确的基数开始；
+        插入时忽略主键冲突，并发的首次写入先插入时改为累加本次改动。
+        """
+        if not self._increment(user_id, notes, content_bytes):
+            db.session.flush()
+            count, size = self.aggregate([user_id]).get(user_id, (0, 0))
+            inserted = db.session.execute(
+                insert(UserStats.__table__).prefix_with('OR IGNORE', dialect='sqlite').prefix_with('IGNORE', dialect='mysql'),
+                {'user_id': user_id, 'note_count': count, 'content_bytes': size, 'version': 1},
+                bind_arguments={'shard_id': PRIMARY_SHARD},
+            ).rowcount
+            if not inserted:
+                # 对方插入的计数不含本事务尚未提交的改动
+                self._increment(user_id, notes, content_bytes)
+        # 使会话中已加载的统计行在下次访问时重新读取
+        stats = db.session.identity_map.get(db.session.identity_key(UserStats, user_id, identity_token=PRIMARY_SHARD))
+        if stats is not None:
+            db.session.expire(stats)
+
+    def aggregate(self, user_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+        """从 note_entries 聚合指定用户的 (笔记数, 字节数)"""
+        ids = list(user_ids)
+        if not ids:
+            return {}
+        size = func.coalesce(func.length(cast(NoteEntry.content, LargeBinary)), 0)
+        # 迁移中的用户同一笔记可能在源、目标分片上各有一行，逐行按笔记 ID 去重
+        moving = db.session.execute(
+            select(NoteShardAssignment.user_id, NoteShardAssignment.shard, NoteShardAssignment.target).where(
+                NoteShardAssignment.user_id.in_(ids), NoteShardAssignment.target.is_not(None)
+            )
+        ).all()
+        totals: Dict[int, Tuple[int, int]] = {}
+        for user_id, source, target in moving:
+            copies: Dict[int, Tuple[Any, int]] = {}
+            for shard in (source, target):
+                with shard_scope(shard):
+                    rows = db.session.execute(select(NoteEntry.id, NoteEntry.updated_at, size).where(
+                        NoteEntry.user_id == user_id
+                    )).all()
+                for note_id, updated_at, note_size in rows:
+                    # 与 sharding.preferred_copy 一致：较新的一份优先，相同时取目标分片上的
+                    if note_id not in copies or updated_at >= copies[note_id][0]:
+                        copies[note_id] = (updated_at, int(note_size))
+            totals[user_id] = (len(copies), sum(note_size for _stamp, note_size in copies.values()))
+
+        rest = [user_id for user_id in ids if user_id not in totals]
+        if not rest:
+            return totals
+        rows = db.session.query(
+            NoteEntry.user_id,
+            func.count(NoteEntry.id),
+            func.coalesce(func.sum(size), 0),
+        ).filter(NoteEntry.user_id.in_(rest)).group_by(NoteEntry.user_id).all()
+        # 多分片时结果来自各分片，逐行累加
+        for user_id, count, total in rows:
+            prev_count, prev_size = totals.get(user_id, (0, 0))
+            totals[user_id] = (prev_count + int(count), prev_size + int(total))
+        return totals
+
+    def recompute(self, user_ids: Iterable[int]) -> None:
+        """按实际数据重写指定用户的统计行（不提交）"""
+        ids = list(user_ids)
+        totals = self.aggregate(ids)
+        existing = {s.user_id: s for s in UserStats.query.filter(UserStats.user_id.in_(ids)).all()}
+        for user_id in ids:
+            count, size = totals.get(user_id, (0, 0))
+            stats = existing.get(user_id)
+            if stats is None:
+                db.session.add(UserStats(user_id=user_id, note_count=count, content_bytes=size))
+            else:
+                stats.note_count = count
+                stats.content_bytes = size
+                stats.version = (stats.version or 0) + 1
+
+    def backfill_missing(self, batch_size: int = 500) -> int:
+        """为缺少统计行的用户分批补建统计行并提交，返回补建的用户数"""
+        done = 0
+        while True:
+            ids = self.users_without_stats(limit=batch_size)
+            if not ids:
+                return done
+            self.recompute(ids)
+            db.session.commit()
+            done += len(ids)
+
+    def bump_versions(self) -> None:
+        """递增所有用户的写入计数（批量改写笔记后使页面 ETag 失效，不提交）"""
+        UserStats.query.update({
+            UserStats.version: func.coalesce(UserStats.version, 0) + 1,
+        }, synchronize_session=False)
+
+    def iter_user_id_batches(self, batch_size: int = 500):
+        """按主键顺序分批产出用户ID"""
+        last_id = 0
+        while True:
+            ids: List[int] = [row[0] for row in db.session.query(User.id).filter(
+                User.id > last_id
+            ).order_by(User.id).limit(batch_size).all()]
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+
+    def commit(self) -> None:
+        """提交事务"""
+        db.session.commit()
@@ -1,7 +1,9 @@
-from typing import Optional
-from sqlalchemy import or_
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import bindparam, false, inspect, or_, select, update
+from sqlalchemy.orm import selectinload
 
 from simple_notes.extensions import db
+from simple_notes.routing import replica_read
 from simple_notes.models import User, SecurityProfile
 
 class UserRepository:
@@ -34,8 +36,73 @@ class UserRepository:
         # Do not flush here; let caller decide when to commit/flush to avoid premature INSERT
         return profile
 
+    @replica_read
     def list_users(self, page: int = 1, per_page: int = 20):
-        return User.query.order_by(User.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        # 一次 IN 查询预加载当前页所有用户的安全配置，避免逐行访问 security_profile 产生 N+1
+        return User.query.options(selectinload(User.security_profile)).order_by(
+            User.created_at.desc()
+        ).paginate(page=page, per_page=per_page, error_out=False)
+
+    @replica_read
+    def emails_by_username(self, usernames: Iterable[str]) -> Dict[str, str]:
+        """用一次 IN 查询获取多个用户名对应的邮箱"""
+        usernames = sorted(set(usernames))
+        if not usernames:
+            return {}
+        rows = db.session.execute(
+            select(User.username, User.email).where(User.username.in_(usernames))
+        ).all()
+        return {username: email for username, email in rows}
+
+    def iter_credential_hashes(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        """流式读取全部口令与答案哈希，逐行产出 (列名, 哈希)，每次从游标取 batch_size 行"""
+        for column in (User.password_hash, SecurityProfile.answer_hash):
+            result = db.session.execute(select(column).execution_options(yield_per=batch_size))
+            for (pwhash,) in result:
+                yield column.key, pwhash
+
+    def mark_stale_hashes(self, method: str, force: bool = False) -> Dict[str, int]:
+        """把参数不是 method 的口令与答案哈希标记为待重算（force 时标记全部），返回各列标记的行数
+
+        用集合式 UPDATE 完成，不逐行读取；空的答案哈希（尚未设置安全问题）不标记。
+        """
+        counts = {}
+        for model, column, flag in (
+            (User, User.password_hash, 'password_rehash'),
+            (SecurityProfile, SecurityProfile.answer_hash, 'answer_rehash'),
+        ):
+            stmt = update(model).where(column != '')
+            if not force:
+                stmt = stmt.where(~column.startswith(method + '$', autoescape=True))
+            result = db.session.execute(
+                stmt.values({flag: True}), execution_options={'synchronize_session': False}
+            )
+            counts[column.key] = result.rowcount
+        return counts
+
+    def profile_user_ids(self, usernames: Iterable[str]) -> Dict[str, int]:
+        """用一次 IN 查询获取已设置安全配置的用户名到用户 id 的映射"""
+        usernames = sorted(set(usernames))
+        if not usernames:
+            return {}
+        rows = db.session.execute(
+            select(User.username, User.id).join(SecurityProfile, SecurityProfile.user_id == User.id)
+            .where(User.username.in_(usernames))
+        ).all()
+        return {username: user_id for username, user_id in rows}
+
+    def bulk_update_answer_hashes(self, rows: List[Dict[str, Any]]) -> None:
+        """按用户 id 批量写入答案哈希并清除重算标记，rows 形如 [{'user_id', 'answer_hash'}]"""
+        if not rows:
+            return
+        table = SecurityProfile.__table__
+        stmt = update(table).where(table.c.user_id == bindparam('uid')).values(
+            answer_hash=bindparam('new_hash'), answer_rehash=false()
+        )
+        db.session.execute(
+            stmt, [{'uid': row['user_id'], 'new_hash': row['answer_hash']} for row in rows],
+            bind_arguments={'mapper': inspect(SecurityProfile)},
+        )
 
     def commit(self):
         db.session.commit()
\ No newline at end of file
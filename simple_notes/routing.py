@@ -0,0 +1,192 @@
+import functools
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, inspect, select
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+
+from simple_notes.sharding import NOTE_TABLE, PRIMARY_SHARD, allocate_note_ids, current_scope, get_shard_map
+
+"""
+读写分离
+
+- 只读副本通过 DATABASE_REPLICA_URLS 配置，每个副本一个引擎，保存在 app.extensions['db_replicas']
+  （不使用 SQLALCHEMY_BINDS：绑定会为共享的 db 对象注册额外的 metadata）
+- 仓库层的只读方法用 @replica_read 标记，方法内执行的查询路由到随机一个副本
+- 写入（flush、INSERT/UPDATE/DELETE）以及未标记的查询一律走主库
+- 请求中发生写入后，本请求剩余的读取以及该用户 REPLICA_STICKY_SECONDS 秒内的后续请求都读主库，
+  保证用户能读到自己刚写入的数据
+- 会话同时负责笔记分片路由（见 sharding.py）：note_entries 上的语句按用户发往所在分片，
+  其余表以及副本路由只涉及主库
+"""
+
+_use_replica: ContextVar[bool] = ContextVar('use_replica', default=False)
+
+STICKY_SESSION_KEY = '_db_primary_until'
+
+
+@contextmanager
+def replica_reads():
+    """在该上下文内允许查询路由到只读副本"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_read(func):
+    """标记仓库的只读方法，其中的查询可由只读副本提供"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def init_replicas(app) -> list:
+    """按配置为只读副本创建引擎，返回引擎列表"""
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    engines = [create_engine(url, **options) for url in app.config.get('DATABASE_REPLICA_URLS') or ()]
+    app.extensions['db_replicas'] = engines
+    return engines
+
+
+def replica_engines(app) -> list:
+    return app.extensions.get('db_replicas') or []
+
+
+def _sticky_to_primary() -> bool:
+    if not has_request_context():
+        return False
+    return flask_session.get(STICKY_SESSION_KEY, 0) > time.time()
+
+
+def _is_note_mapper(mapper) -> bool:
+    return mapper is not None and mapper.local_table.name == NOTE_TABLE
+
+
+class RoutingSession(ShardedSession, Session):
+    """按分片与读写类型选择主库、笔记分片或只读副本的会话"""
+
+    def __init__(self, db, **kwargs):
+        shard_map = get_shard_map()
+        shards = {name: shard_map.bind_for(name, db.engine) for name in shard_map.names}
+        shards.setdefault(PRIMARY_SHARD, db.engine)
+        super().__init__(
+            shard_chooser=self._choose_shard,
+            identity_chooser=self._choose_identity_shards,
+            execute_chooser=self._choose_execute_shards,
+            shards=shards,
+            db=db,
+            **kwargs,
+        )
+        self._shard_map = shard_map
+
+    def get_bind(self, mapper=None, *, shard_id=None, instance=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        if mapper is not None:
+            mapper = inspect(mapper)
+        if shard_id is None:
+            if mapper is None and instance is None:
+                # 文本 SQL 等不涉及映射类的语句
+                shard_id = PRIMARY_SHARD
+            else:
+                shard_id = self._choose_shard_and_assign(mapper, instance, clause=clause)
+        if shard_id == PRIMARY_SHARD and self._use_replica(clause):
+            replicas = replica_engines(current_app)
+            if replicas:
+                return random.choice(replicas)
+        return super().get_bind(mapper, shard_id=shard_id, instance=instance, clause=clause, **kwargs)
+
+    def _use_replica(self, clause) -> bool:
+        if not _use_replica.get() or self._flushing or self.info.get('wrote'):
+            return False
+        if clause is not None and getattr(clause, 'is_dml', False):
+            return False
+        return not _sticky_to_primary()
+
+    def note_placement(self, user_id: int):
+        """用户笔记所在的分片（Placement）"""
+        return self._shard_map.placement(user_id, self._load_assignment)
+
+    def _load_assignment(self, user_id: int):
+        from simple_notes.models import NoteShardAssignment
+        # 显式绑定主库，不经过副本
+        conn = self.connection(bind_arguments={'bind': self._db.engine})
+        row = conn.execute(select(NoteShardAssignment.shard, NoteShardAssignment.target).where(
+            NoteShardAssignment.user_id == user_id
+        )).first()
+        return tuple(row) if row else None
+
+    def _default_note_shards(self):
+        return current_scope() or tuple(self._shard_map.names)
+
+    def _choose_shard(self, mapper, instance, clause=None, **kwargs):
+        if not _is_note_mapper(mapper):
+            return PRIMARY_SHARD
+        if instance is not None and instance.user_id is not None:
+            return self.note_placement(instance.user_id).write
+        return self._default_note_shards()[-1]
+
+    def _choose_identity_shards(self, mapper, primary_key, **kwargs):
+        if not _is_note_mapper(mapper):
+            return [PRIMARY_SHARD]
+        return list(self._default_note_shards())
+
+    def _choose_execute_shards(self, orm_execute_state):
+        mapper = orm_execute_state.bind_mapper
+        if not _is_note_mapper(mapper):
+            return [PRIMARY_SHARD]
+        owner = orm_execute_state.lazy_loaded_from if orm_execute_state.is_select else None
+        if owner is not None and not _is_note_mapper(owner.mapper):
+            # User.notes 等关系加载：按所属用户定位分片
+            return list(self.note_placement(owner.identity[0]).reads)
+        return list(self._default_note_shards())
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _allocate_note_ids(session, flush_context, instances):
+    """多分片时由主库序列为新笔记分配全局唯一的 ID"""
+    if not session._shard_map.sharded:
+        return
+    pending = [obj for obj in session.new if _is_note_mapper(getattr(obj, '__mapper__', None)) and obj.id is None]
+    if not pending:
+        return
+    if session._db.engine.dialect.name == 'mysql':
+        # 单独的短事务：计数器行锁立即释放，不随本次写入持有到提交
+        with session._db.engine.begin() as conn:
+            ids = allocate_note_ids(conn, len(pending))
+    else:
+        # SQLite 只有一个写入者；另开连接会等待本事务已持有的写锁
+        ids = allocate_note_ids(session.connection(bind_arguments={'bind': session._db.engine}), len(pending))
+    for obj, note_id in zip(pending, ids):
+        obj.id = note_id
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_after_commit(session):
+    if session.info.pop('wrote', False) and has_request_context() and replica_engines(current_app):
+        window = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+        flask_session[STICKY_SESSION_KEY] = time.time() + window
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _clear_after_rollback(session):
+    session.info.pop('wrote', None)
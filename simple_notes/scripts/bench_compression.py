@@ -0,0 +1,77 @@
+import argparse
+import os
+import time
+
+"""
+CPU cost versus bytes saved for dynamic response compression.
+- Builds an in-memory app with --users users and notes, logs in as the admin and fetches the
+  uncompressed bodies of /login, /settings, /admin/api/users and /admin/api/entries (with --per-page).
+- Compresses each body at every gzip level (and brotli quality when brotli is installed) and prints
+  the compressed size, the ratio and the median compression time per response.
+- Use it to pick COMPRESS_LEVEL / COMPRESS_BR_LEVEL: past level 6 gzip usually costs more CPU
+  than the extra bytes are worth.
+- The HTML rows only matter with COMPRESS_HTML=1; by default pages are sent uncompressed (BREACH).
+Run: python -m simple_notes.scripts.bench_compression --users 200 --per-page 200
+"""
+
+
+def fetch_bodies(users: int, per_page: int) -> dict:
+    os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+    from .. import create_app
+    from ..extensions import db
+    from ..models import User
+    from ..services.note_service import NoteService
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False, COMPRESS_ENABLED=False)
+    with app.app_context():
+        for i in range(users):
+            user = User(username=f'bench{i}', email=f'bench{i}@example.com', password_hash='x')
+            db.session.add(user)
+        db.session.commit()
+        admin = User.query.filter_by(username='admin').first()
+        for i in range(per_page):
+            NoteService().create_entry(admin.id, f'note {i}', 'benchmark content ' * 20)
+        db.session.remove()
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': app.config['ADMIN_DEFAULT_PASSWORD']})
+    paths = ('/login', '/settings', f'/admin/api/users?per_page={per_page}', f'/admin/api/entries?per_page={per_page}')
+    bodies = {}
+    for path in paths:
+        if path == '/login':
+            bodies[path] = app.test_client().get(path).get_data()
+        else:
+            bodies[path] = client.get(path).get_data()
+    return bodies
+
+
+def measure(body: bytes, coding: str, level: int, repeat: int):
+    from ..compression import compress
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(compress(body, coding, level))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return size, timings[len(timings) // 2]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare compression levels for HTML and JSON responses')
+    parser.add_argument('--users', type=int, default=200, help='Users to create')
+    parser.add_argument('--per-page', type=int, default=200, help='per_page for the admin JSON endpoints')
+    parser.add_argument('--repeat', type=int, default=20, help='Compressions per measurement')
+    args = parser.parse_args()
+
+    from ..compression import brotli
+
+    levels = [('gzip', level) for level in range(1, 10)]
+    if brotli is not None:
+        levels += [('br', quality) for quality in (1, 4, 6, 9, 11)]
+    for path, body in fetch_bodies(args.users, args.per_page).items():
+        print(f"{path}: {len(body)} bytes uncompressed")
+        for coding, level in levels:
+            size, seconds = measure(body, coding, level, args.repeat)
+            print(f"  {coding:>4} {level:>2}: {size:8d} bytes ({size / len(body):6.1%})  {seconds * 1000:7.3f} ms")
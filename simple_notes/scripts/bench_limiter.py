@@ -0,0 +1,71 @@
+import argparse
+import os
+import tempfile
+import time
+from unittest import mock
+
+"""
+Rate limiter storage benchmark.
+- Times limiter hits directly against each storage (memory:// and the shared sqlite:// store)
+  and reports microseconds per hit.
+- Then replays GET /login with the limiter disabled and with each storage, so the per-request
+  overhead the limiter adds to /login can be read off as the difference in mean latency.
+Run: python -m simple_notes.scripts.bench_limiter --hits 20000 --requests 2000
+"""
+
+
+def bench_storage(uri: str, hits: int, strategy: str) -> float:
+    from limits import parse
+    from limits.storage import storage_from_string
+    from limits.strategies import STRATEGIES
+
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = parse('1000000 per minute')
+    started = time.perf_counter()
+    for i in range(hits):
+        limiter.hit(item, f'10.0.{i % 256}.{i % 251}')
+    return (time.perf_counter() - started) / hits
+
+
+def bench_login(uri: str, requests: int, enabled: bool) -> float:
+    from .. import create_app
+    from ..config import Config
+
+    with mock.patch.object(Config, 'RATELIMIT_STORAGE_URI', uri), \
+            mock.patch.object(Config, 'LOGIN_RATE_LIMIT', '1000000 per minute'):
+        app = create_app()
+    app.config['RATELIMIT_ENABLED'] = enabled
+    client = app.test_client()
+    client.get('/login')
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get('/login')
+    return (time.perf_counter() - started) / requests
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure rate limiter storage overhead')
+    parser.add_argument('--hits', type=int, default=20000, help='Direct limiter hits per storage')
+    parser.add_argument('--requests', type=int, default=2000, help='GET /login requests per configuration')
+    parser.add_argument('--strategy', default='sliding-window-counter', help='RATELIMIT_STRATEGY to use')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+    import simple_notes.ratelimit  # noqa: F401  注册 sqlite:// 存储
+
+    fd, path = tempfile.mkstemp(suffix='-ratelimit.db')
+    os.close(fd)
+    storages = {'memory': 'memory://', 'sqlite': f'sqlite:///{path}'}
+    try:
+        for name, uri in storages.items():
+            per_hit = bench_storage(uri, args.hits, args.strategy)
+            print(f"{name:>7}: {per_hit * 1e6:7.1f} us per limiter hit")
+        baseline = bench_login('memory://', args.requests, enabled=False)
+        print(f"/login without limiter: {baseline * 1e6:8.1f} us")
+        for name, uri in storages.items():
+            latency = bench_login(uri, args.requests, enabled=True)
+            print(f"/login with {name:>7}: {latency * 1e6:8.1f} us (+{(latency - baseline) * 1e6:.1f} us)")
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
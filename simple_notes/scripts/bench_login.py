@@ -0,0 +1,86 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+"""
+Login throughput benchmark for the password hashing pool.
+- Builds an app on a scratch SQLite file with one user and replays POST /login from client threads.
+- Runs once per HASH_WORKERS value (0 = hash inline on the request thread) and prints logins/s,
+  503 responses (pool full) and the p95 latency of a cheap GET /login probe running alongside,
+  which shows how much the login burst starves other pages.
+Run: python -m simple_notes.scripts.bench_login --workers 0 1 2 4 --threads 8 --seconds 5
+"""
+
+
+def run(workers: int, threads: int, seconds: float, queue_size: int):
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    from .. import create_app
+    from ..extensions import db
+    from ..hashing import get_hash_pool
+    from ..models import User
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, LOGIN_RATE_LIMIT='1000000 per second',
+                      HASH_WORKERS=workers, HASH_QUEUE_SIZE=queue_size)
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        # 预先启动进程池，不把进程启动时间计入结果
+        get_hash_pool().run(len, 'warm-up')
+
+    counts = {'logins': 0, 'busy': 0, 'other': 0}
+    probe_latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def login_loop():
+        while time.perf_counter() < deadline:
+            # 每次使用新的客户端（无会话 Cookie），否则已登录的请求会直接重定向
+            response = app.test_client().post('/login', data={'username': 'bench', 'password': 'password123'})
+            key = {302: 'logins', 503: 'busy'}.get(response.status_code, 'other')
+            with lock:
+                counts[key] += 1
+
+    def probe_loop():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            client.get('/login')
+            probe_latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    pool = [threading.Thread(target=login_loop) for _ in range(threads)]
+    pool.append(threading.Thread(target=probe_loop))
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    with app.app_context():
+        get_hash_pool().shutdown()
+        db.engine.dispose()
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    probe_latencies.sort()
+    p95 = probe_latencies[int(len(probe_latencies) * 0.95)] if probe_latencies else 0.0
+    return counts['logins'] / seconds, counts['busy'], p95
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure login throughput as the hashing pool grows')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4], help='HASH_WORKERS values to try')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent login client threads')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+    parser.add_argument('--queue-size', type=int, default=32, help='HASH_QUEUE_SIZE for each run')
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        rps, busy, p95 = run(workers, args.threads, args.seconds, args.queue_size)
+        print(f"HASH_WORKERS={workers}: {rps:7.1f} logins/s, {busy} x 503, probe p95={p95 * 1000:.1f} ms")
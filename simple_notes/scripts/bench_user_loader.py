@@ -0,0 +1,57 @@
+import argparse
+import os
+import time
+
+"""
+Throughput benchmark for the Flask-Login user loader cache.
+- Builds an in-memory app with one user and a few notes, logs in and replays GET requests.
+- Runs the same workload with USER_CACHE_ENABLED off and on and prints requests/second
+  and SQL statements per request for each.
+Run: python -m simple_notes.scripts.bench_user_loader --requests 2000 --path /
+"""
+
+
+def run(enabled: bool, requests: int, path: str):
+    os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+    from .. import create_app
+    from ..extensions import db
+    from ..metrics import SQL_COUNT_HEADER
+    from ..models import User
+    from ..services.note_service import NoteService
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, SQL_COUNT_HEADER=True,
+                      USER_CACHE_ENABLED=enabled, RATELIMIT_ENABLED=False)
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        for i in range(20):
+            NoteService().create_entry(user.id, f'note {i}', 'benchmark content ' * 50)
+        db.session.remove()
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'password123'})
+    client.get(path)  # warm up caches
+    statements = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path)
+        statements += int(response.headers.get(SQL_COUNT_HEADER, 0))
+    elapsed = time.perf_counter() - started
+    with app.app_context():
+        db.drop_all()
+    return requests / elapsed, statements / requests
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare request throughput with and without the user loader cache')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per run')
+    parser.add_argument('--path', default='/', help='Authenticated path to request')
+    args = parser.parse_args()
+
+    for enabled in (False, True):
+        rps, per_request = run(enabled, args.requests, args.path)
+        label = 'on ' if enabled else 'off'
+        print(f"USER_CACHE_ENABLED={label}: {rps:8.1f} req/s, {per_request:.1f} SQL statements/request")
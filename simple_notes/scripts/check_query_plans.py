@@ -0,0 +1,174 @@
+import argparse
+import re
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import event
+from ..extensions import db
+from ..repositories.note_repo import NoteRepository
+from ..repositories.user_repo import UserRepository
+from ..repositories.stats_repo import UserStatsRepository
+from ..repositories.settings_repo import SettingsRegistry
+from ..repositories.shard_repo import NoteShardRepository
+from ..repositories.search_repo import LikeBackend, MysqlFulltextBackend, NgramIndexBackend, SqliteFtsBackend
+from ..repositories.pagination import encode_cursor
+from ..sharding import PRIMARY_SHARD
+
+"""
+Query plan checker for the repository layer.
+- Calls every read method of the repositories and captures the SQL they emit.
+- Runs EXPLAIN QUERY PLAN (SQLite) / EXPLAIN (MySQL) on each statement.
+- Fails when a statement scans a whole table or sorts without an index. Scans are only
+  accepted for the admin-wide listings/totals that have no filter by design; their sort
+  must still be served by an index. Sorts are only accepted in SORT_ALLOWED.
+- Full-text index queries are checked once the index exists (simple-notes reindex).
+Run: python -m simple_notes.scripts.check_query_plans
+"""
+
+# 在倒排表求交得到的候选行上排序：行数受命中数限制，是预期的执行计划
+SORT_ALLOWED = {'NgramIndexBackend.search'}
+
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$')
+
+
+def repository_queries() -> List[Tuple[str, Callable, bool]]:
+    """返回 (查询名, 调用, 是否允许扫描) 列表"""
+    notes = NoteRepository()
+    users = UserRepository()
+    stats = UserStatsRepository()
+    shards = NoteShardRepository()
+    ngram = NgramIndexBackend()
+    like = LikeBackend()
+    now = datetime.utcnow()
+    cursor = encode_cursor(now, 1)
+    queries = [
+        ('NoteRepository.get_by_id', lambda: notes.get_by_id(1), False),
+        ('NoteRepository.get_by_id_for_user', lambda: notes.get_by_id_for_user(1, 1), False),
+        ('NoteRepository.list_by_user', lambda: notes.list_by_user(1), False),
+        ('NoteRepository.list_of_user_paginated', lambda: notes.list_of_user_paginated(1, page=2), False),
+        ('NoteRepository.list_of_user_keyset', lambda: notes.list_of_user_keyset(1), False),
+        ('NoteRepository.list_of_user_keyset(after)', lambda: notes.list_of_user_keyset(1, after=cursor), False),
+        ('NoteRepository.list_of_user_keyset(before)', lambda: notes.list_of_user_keyset(1, before=cursor), False),
+        ('NoteRepository.list_paginated', lambda: notes.list_paginated(page=2), True),
+        ('NoteRepository.paginate_all', lambda: notes.paginate_all(page=2), True),
+        ('NoteRepository.paginate_all_keyset', lambda: notes.paginate_all_keyset(after=cursor), True),
+        ('NoteRepository.paginate_all_keyset(user)', lambda: notes.paginate_all_keyset(after=cursor, user_id=1), False),
+        ('NoteRepository.search_user_entries', lambda: notes.search_user_entries(1, 'kw'), False),
+        ('NoteRepository.recent_entries', lambda: notes.recent_entries(1), False),
+        ('NoteRepository.sidebar_rows', lambda: notes.sidebar_rows(1), False),
+        ('NoteRepository.get_entries_by_date_range', lambda: notes.get_entries_by_date_range(1, now - timedelta(days=7), now), False),
+        ('NoteRepository.count_by_user', lambda: notes.count_by_user(1), False),
+        ('NoteRepository.get_total_count', lambda: notes.get_total_count(), True),
+        ('UserStatsRepository.get', lambda: stats.get(1), False),
+        ('UserStatsRepository.note_count', lambda: stats.note_count(1), False),
+        ('UserStatsRepository.total_note_count', lambda: stats.total_note_count(), True),
+        ('UserStatsRepository.users_without_stats', lambda: stats.users_without_stats(limit=500), True),
+        ('UserStatsRepository.aggregate', lambda: stats.aggregate([1, 2]), False),
+        ('UserStatsRepository.iter_user_id_batches', lambda: next(stats.iter_user_id_batches(), None), False),
+        ('SettingsRegistry.load', lambda: SettingsRegistry(check_interval=0).has('login_attempts_limit'), False),
+        ('NoteShardRepository.get_assignment', lambda: shards.get_assignment(1), False),
+        ('NoteShardRepository.fetch_user_batch', lambda: shards.fetch_user_batch(PRIMARY_SHARD, 1, 100), False),
+        ('NgramIndexBackend.search', lambda: ngram.search(1, 'kw'), False),
+        ('NgramIndexBackend.entry_postings', lambda: ngram.entry_postings(1), False),
+        ('NgramIndexBackend.is_available', lambda: ngram.is_available(), False),
+        ('LikeBackend.search', lambda: like.search(1, 'kw'), False),
+        ('UserRepository.get_by_id', lambda: users.get_by_id(1), False),
+        ('UserRepository.get_by_username', lambda: users.get_by_username('admin'), False),
+        ('UserRepository.exists_by_username_or_email', lambda: users.exists_by_username_or_email('admin', 'admin@local'), False),
+        ('UserRepository.list_users', lambda: users.list_users(page=2), True),
+        ('UserRepository.emails_by_username', lambda: users.emails_by_username(['admin', 'root']), False),
+    ]
+    # 全文索引只能在建立之后检查（simple-notes reindex）
+    dialect = db.engine.dialect.name
+    fts = SqliteFtsBackend() if dialect == 'sqlite' else MysqlFulltextBackend() if dialect == 'mysql' else None
+    if fts is not None and fts.is_available():
+        queries.append((f'{type(fts).__name__}.search', lambda: fts.search(1, 'keyword'), False))
+    return queries
+
+
+def capture_statements() -> List[Tuple[str, bool, str, object]]:
+    """执行所有仓库查询并记录其发出的 SQL"""
+    captured = []
+    current = {'name': None, 'allow_scan': False}
+
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((current['name'], current['allow_scan'], statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_execute)
+    try:
+        for name, call, allow_scan in repository_queries():
+            current['name'] = name
+            current['allow_scan'] = allow_scan
+            call()
+            db.session.rollback()
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before_execute)
+    return captured
+
+
+def explain(statement: str, parameters) -> List[Dict]:
+    engine = db.engine
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    with engine.connect() as conn:
+        result = conn.exec_driver_sql(prefix + statement, parameters)
+        return [dict(row._mapping) for row in result]
+
+
+def find_problems(plan: List[Dict], dialect: str, allow_scan: bool = False, allow_sort: bool = False) -> List[str]:
+    """从执行计划中找出全表扫描与无索引排序"""
+    tables = set(db.metadata.tables)
+    problems = []
+    for row in plan:
+        if dialect == 'sqlite':
+            detail = row.get('detail', '')
+            m = _SQLITE_SCAN.match(detail)
+            if m and m.group(1) in tables and not allow_scan:
+                problems.append(f"full scan: {detail}")
+            elif 'USE TEMP B-TREE FOR ORDER BY' in detail and not allow_sort:
+                problems.append(f"unindexed sort: {detail}")
+        else:
+            table = row.get('table')
+            extra = row.get('Extra') or ''
+            scan_type = row.get('type')
+            if table in tables and scan_type in ('ALL', 'index') and not allow_scan:
+                problems.append(f"full scan on {table} (type={scan_type})")
+            if 'Using filesort' in extra and not allow_sort:
+                problems.append(f"unindexed sort on {table}: {extra}")
+    return problems
+
+
+def check(verbose: bool = False) -> List[Tuple[str, str, List[str]]]:
+    """检查全部仓库查询，返回 (查询名, SQL, 问题列表) 的失败列表"""
+    dialect = db.engine.dialect.name
+    failures = []
+    for name, allow_scan, statement, parameters in capture_statements():
+        plan = explain(statement, parameters)
+        problems = find_problems(plan, dialect, allow_scan, name in SORT_ALLOWED)
+        if verbose:
+            print(f"[{'FAIL' if problems else 'OK'}] {name}")
+            for row in plan:
+                print(f"    {row}")
+        if problems:
+            failures.append((name, statement, problems))
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check repository query plans for full scans')
+    parser.add_argument('--verbose', action='store_true', help='Print every query plan')
+    args = parser.parse_args()
+
+    from .. import create_app
+    app = create_app()
+    with app.app_context():
+        failures = check(verbose=args.verbose)
+        for name, statement, problems in failures:
+            print(f"{name}: {'; '.join(problems)}")
+            print(f"    {' '.join(statement.split())}")
+        if failures:
+            print(f"{len(failures)} query plan(s) failed.")
+            sys.exit(1)
+        print('All repository query plans use indexes.')
@@ -0,0 +1,67 @@
+import argparse
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from ..extensions import db
+from ..models import NoteEntry, SecurityProfile, User, UserStats
+
+"""
+Migration script to add nullable columns declared on the models to existing databases.
+- Scans note_entries/users/security_profiles/user_stats and reports which declared columns are missing
+  (e.g. excerpt/word_count/char_count, password_rehash/answer_rehash, user_stats.version).
+- Adds missing nullable columns with ALTER TABLE ... ADD COLUMN (works on SQLite and MySQL).
+- Summary values are filled afterwards by `simple-notes backfill-excerpts`.
+Run: python -m simple_notes.scripts.migrate_columns --apply
+"""
+
+TABLES = (NoteEntry.__table__, User.__table__, SecurityProfile.__table__, UserStats.__table__)
+
+
+def scan():
+    engine = db.engine
+    inspector = inspect(engine)
+    dialect = engine.dialect.name
+    stats = {}
+    for table in TABLES:
+        existing = {col['name'] for col in inspector.get_columns(table.name)}
+        stats[table.name] = {
+            'missing': [col.name for col in table.columns if col.name not in existing],
+        }
+    return dialect, stats
+
+
+def apply_migration():
+    engine = db.engine
+    dialect, stats = scan()
+    print(f"Dialect: {dialect}")
+    print(f"Stats: {stats}")
+    if dialect not in ('sqlite', 'mysql'):
+        raise RuntimeError(f"Unsupported dialect for migration: {dialect}")
+    with engine.begin() as conn:
+        for table in TABLES:
+            for name in stats[table.name]['missing']:
+                column = table.columns[name]
+                if not column.nullable:
+                    raise RuntimeError(f"Refusing to add NOT NULL column {table.name}.{name} without a default")
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                print(f"Adding column {name} to {table.name} ...")
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+    print("Column migration applied.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add missing nullable columns to note_entries, users and security_profiles')
+    parser.add_argument('--apply', action='store_true', help='Apply migration changes')
+    args = parser.parse_args()
+
+    from .. import create_app
+    app = create_app()
+    with app.app_context():
+        dialect, stats = scan()
+        print(f"Dialect: {dialect}")
+        print(f"Current column stats: {stats}")
+        if args.apply:
+            apply_migration()
+            dialect, stats = scan()
+            print(f"Post-migration stats: {stats}")
+        else:
+            print('Dry run complete. Re-run with --apply to perform migration.')
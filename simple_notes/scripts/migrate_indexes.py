@@ -0,0 +1,68 @@
+import argparse
+from sqlalchemy import inspect
+from ..extensions import db
+from ..models import User, NoteEntry
+
+"""
+Migration script to add the composite indexes declared on the models to existing databases.
+- Scans note_entries/users and reports which declared indexes are missing.
+- Creates missing indexes with CREATE INDEX (works on SQLite and MySQL); existing ones are left untouched.
+Run: python -m simple_notes.scripts.migrate_indexes --apply
+"""
+
+TABLES = (NoteEntry.__table__, User.__table__)
+
+
+def scan():
+    engine = db.engine
+    inspector = inspect(engine)
+    dialect = engine.dialect.name
+    stats = {}
+    for table in TABLES:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        declared = {ix.name for ix in table.indexes}
+        stats[table.name] = {
+            'existing': sorted(existing),
+            'missing': sorted(declared - existing),
+        }
+    return dialect, stats
+
+
+def apply_migration():
+    engine = db.engine
+    dialect, stats = scan()
+    print(f"Dialect: {dialect}")
+    print(f"Stats: {stats}")
+    if dialect not in ('sqlite', 'mysql'):
+        raise RuntimeError(f"Unsupported dialect for migration: {dialect}")
+    with engine.begin() as conn:
+        for table in TABLES:
+            missing = set(stats[table.name]['missing'])
+            for index in table.indexes:
+                if index.name in missing:
+                    print(f"Creating index {index.name} on {table.name} ...")
+                    index.create(bind=conn, checkfirst=True)
+    if dialect == 'sqlite':
+        # Refresh planner statistics so the new indexes are picked up
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE;")
+    print("Index migration applied.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add composite indexes for note_entries and users')
+    parser.add_argument('--apply', action='store_true', help='Apply migration changes')
+    args = parser.parse_args()
+
+    from .. import create_app
+    app = create_app()
+    with app.app_context():
+        dialect, stats = scan()
+        print(f"Dialect: {dialect}")
+        print(f"Current index stats: {stats}")
+        if args.apply:
+            apply_migration()
+            dialect, stats = scan()
+            print(f"Post-migration stats: {stats}")
+        else:
+            print('Dry run complete. Re-run with --apply to perform migration.')
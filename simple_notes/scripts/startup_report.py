@@ -0,0 +1,42 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+"""
+Cold-start timing report for create_app.
+- Starts a fresh interpreter per run, builds the app and prints the per-phase breakdown recorded by
+  StartupTimer: import (extensions, blueprints and services loaded by create_app), config, extensions,
+  blueprints and db_check (the schema version query, or the full bootstrap when it has to run).
+- Reports the median of each phase over the runs plus the interpreter's total wall time.
+- Uses the current environment (DATABASE_URL, DB_PROFILE, AUTO_BOOTSTRAP, ...), so point it at the
+  database the workers use; run `simple-notes bootstrap` first to measure the fast path.
+Run: python -m simple_notes.scripts.startup_report --runs 5
+"""
+
+CHILD = (
+    "import json\n"
+    "from simple_notes import create_app\n"
+    "print(json.dumps(create_app().extensions['startup_timing']))\n"
+)
+
+
+def run_once() -> dict:
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD], check=True, capture_output=True, text=True).stdout
+    timing = json.loads(output.strip().splitlines()[-1])
+    timing['process total'] = time.perf_counter() - started
+    return timing
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report create_app startup time by phase')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreter runs')
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    for phase in runs[0]:
+        values = [run[phase] for run in runs]
+        print(f"{phase:>14}: {statistics.median(values) * 1000:8.1f} ms (min {min(values) * 1000:.1f})")
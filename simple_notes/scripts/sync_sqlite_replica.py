@@ -0,0 +1,31 @@
+import argparse
+import sqlite3
+
+"""
+Local stand-in for replication when testing read/write splitting with SQLite files.
+- Copies the primary database file into the replica file with the SQLite online backup API,
+  which is safe while the application is running.
+- Point DATABASE_URL at the primary and DATABASE_REPLICA_URLS at the replica, then run this
+  whenever the replica should "catch up".
+Run: python -m simple_notes.scripts.sync_sqlite_replica instance/notes.db instance/notes-replica.db
+"""
+
+
+def sync_replica(primary_path: str, replica_path: str) -> None:
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Copy a SQLite primary database into a replica file')
+    parser.add_argument('primary', help='Path of the primary database file')
+    parser.add_argument('replica', help='Path of the replica database file')
+    args = parser.parse_args()
+
+    sync_replica(args.primary, args.replica)
+    print(f"Replica {args.replica} synced from {args.primary}.")
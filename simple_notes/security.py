@@ -1,9 +1,10 @@
 import mimetypes
 import secrets
-from flask import request, g
+from flask import g
 
 mimetypes.add_type('application/javascript', '.js')
 mimetypes.add_type('text/css', '.css')
+mimetypes.add_type('font/woff2', '.woff2')
 
 # CSP nonce setter
 
@@ -21,18 +22,11 @@ def set_security_headers(response):
         "font-src 'self' https://cdn.jsdelivr.net",
         "img-src 'self' data:"
     ]
-    response.headers['Content-Security-Policy'] = '; '.join(csp)
+    # 304 沿用浏览器缓存的页面，其中的 nonce 与本次请求不同，不能下发新的策略
+    if response.status_code != 304:
+        response.headers['Content-Security-Policy'] = '; '.join(csp)
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'SAMEORIGIN'
     response.headers['Referrer-Policy'] = 'no-referrer-when-downgrade'
-
-    try:
-        p = request.path
-        if p.startswith('/static/'):
-            if p.endswith('.js'):
-                response.headers['Content-Type'] = 'application/javascript; charset=utf-8'
-            elif p.endswith('.css'):
-                response.headers['Content-Type'] = 'text/css; charset=utf-8'
-    except Exception:
-        pass
+    # 静态文件的 Content-Type 由上面注册的 mimetypes 决定（text/* 与 JavaScript 自动附带 charset）
     return response
\ No newline at end of file
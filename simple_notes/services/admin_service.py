@@ -3,13 +3,15 @@ from datetime import datetime
 
 from simple_notes.repositories.user_repo import UserRepository
 from simple_notes.repositories.note_repo import NoteRepository
+from simple_notes.repositories.stats_repo import content_size
+from simple_notes.repositories.search_repo import get_search_backend
+from simple_notes.repositories.settings_repo import get_settings
+from simple_notes.services.note_service import get_sidebar_cache
+from simple_notes.services.identity_service import invalidate_identity
 from simple_notes.models import User, NoteEntry
 from simple_notes.extensions import db
 
 from typing import Optional, Tuple, Set
-import json
-
-from simple_notes.models import User, NoteEntry, AppSetting
 
 class AdminService:
     def __init__(self, user_repo: Optional[UserRepository] = None, note_repo: Optional[NoteRepository] = None):
@@ -17,26 +19,17 @@ class AdminService:
         self.note_repo = note_repo or NoteRepository()
 
     def get_admin_users(self) -> Set[str]:
-        setting = AppSetting.query.filter_by(key='admin_users').first()
-        if setting and setting.value:
-            try:
-                data = json.loads(setting.value)
-                return set(u for u in data if isinstance(u, str) and u.strip())
-            except Exception:
-                return set()
+        # 从设置注册表的内存缓存读取，不再每次请求查询并解析 JSON
+        admins = get_settings().get('admin_users')
+        if admins is not None:
+            return set(admins)
         # Fallback to config
         from flask import current_app
         return set(current_app.config.get('ADMIN_USERS', set()))
 
     def set_admin_users(self, users: Set[str]):
-        val = json.dumps(sorted(list(users)))
-        setting = AppSetting.query.filter_by(key='admin_users').first()
-        if not setting:
-            setting = AppSetting(key='admin_users', value=val)
-            db.session.add(setting)
-        else:
-            setting.value = val
-        db.session.commit()
+        get_settings().set('admin_users', users)
+        invalidate_identity()
 
     def add_admin_user(self, username: str) -> Tuple[bool, str]:
         users = self.get_admin_users()
@@ -59,9 +52,10 @@ class AdminService:
 
     def lock_user(self, user: User) -> Tuple[bool, str]:
         profile = self.user_repo.ensure_profile(user)
-        profile.failed_count = 3
+        profile.failed_count = get_settings().get('login_attempts_limit')
         profile.locked_until = None
         self.user_repo.commit()
+        invalidate_identity(user.id)
         return True, '账户已锁定'
 
     def unlock_user(self, user: User) -> Tuple[bool, str]:
@@ -69,15 +63,24 @@ class AdminService:
         profile.failed_count = 0
         profile.locked_until = None
         self.user_repo.commit()
+        invalidate_identity(user.id)
         return True, '账户已解锁'
 
     # Entries
     def list_entries(self, page: int = 1, per_page: int = 20, user_id: Optional[int] = None):
         if user_id:
-            return NoteEntry.query.filter_by(user_id=user_id).order_by(NoteEntry.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+            return self.note_repo.list_of_user_paginated(user_id, page=page, per_page=per_page)
         return self.note_repo.paginate_all(page=page, per_page=per_page)
 
+    def list_entries_keyset(self, after: Optional[str] = None, before: Optional[str] = None,
+                            per_page: int = 20, user_id: Optional[int] = None):
+        return self.note_repo.paginate_all_keyset(after=after, before=before, per_page=per_page, user_id=user_id)
+
     def delete_entry(self, entry: NoteEntry) -> Tuple[bool, str]:
+        entry_id, user_id, size = entry.id, entry.user_id, content_size(entry.content)
         self.note_repo.delete(entry)
+        self.note_repo.stats_repo.apply_delta(user_id, notes=-1, content_bytes=-size)
+        get_search_backend().remove_entry(entry_id)
         self.note_repo.commit()
+        get_sidebar_cache().pop(user_id)
         return True, '笔记已删除'
\ No newline at end of file
@@ -1,10 +1,12 @@
 from datetime import datetime
-from werkzeug.security import check_password_hash, generate_password_hash
 from typing import Optional, Tuple
 
 from simple_notes.models import User, SecurityProfile
 from simple_notes.repositories.user_repo import UserRepository
+from simple_notes.repositories.settings_repo import get_settings
+from simple_notes.services.identity_service import invalidate_identity
 from simple_notes.extensions import db
+from simple_notes.hashing import hash_password, needs_rehash, verify_password
 
 class AuthService:
     def __init__(self, user_repo: Optional[UserRepository] = None):
@@ -14,7 +16,7 @@ class AuthService:
         if self.user_repo.exists_by_username_or_email(username.strip(), email.strip()):
             return False, '用户名或邮箱已存在', None
         user = User(username=username.strip(), email=email.strip())
-        user.password_hash = generate_password_hash(password)
+        user.password_hash = hash_password(password)
         self.user_repo.add(user)
         self.user_repo.commit()
         return True, '注册成功，请登录', user
@@ -25,18 +27,23 @@ class AuthService:
             return False, '用户名或密码错误', None, None
         # 账户锁定检查
         profile = user.security_profile
-        if profile and ((profile.locked_until and profile.locked_until > datetime.utcnow()) or (profile.failed_count or 0) >= 3):
+        limit = get_settings().get('login_attempts_limit')
+        if profile and ((profile.locked_until and profile.locked_until > datetime.utcnow()) or (profile.failed_count or 0) >= limit):
             return False, '账户已锁定，请使用辅助验证解锁。', user, profile.question if profile else None
         # 密码检查
-        if not check_password_hash(user.password_hash, password):
+        if not verify_password(user.password_hash, password):
             profile = self.user_repo.ensure_profile(user)
             profile.failed_count = (profile.failed_count or 0) + 1
-            if profile.failed_count >= 3:
+            if profile.failed_count >= limit:
                 profile.locked_until = None
                 db.session.commit()
                 return False, '账户已锁定，请使用辅助验证解锁。', user, profile.question
             db.session.commit()
             return False, '用户名或密码错误', None, None
+        # 哈希参数已过时（算法或代价调整过），用本次提交的明文重新计算
+        if needs_rehash(user.password_hash, user.password_rehash):
+            user.password_hash = hash_password(password)
+            user.password_rehash = False
         # 成功登录，清理失败记录
         if user.security_profile:
             user.security_profile.failed_count = 0
@@ -51,8 +58,11 @@ class AuthService:
         profile = user.security_profile
         if not profile or not profile.question or not profile.answer_hash:
             return False, '未设置辅助验证，无法解锁。'
-        if not check_password_hash(profile.answer_hash, answer):
+        if not verify_password(profile.answer_hash, answer):
             return False, '辅助验证答案错误。'
+        if needs_rehash(profile.answer_hash, profile.answer_rehash):
+            profile.answer_hash = hash_password(answer)
+            profile.answer_rehash = False
         profile.failed_count = 0
         profile.locked_until = None
         db.session.commit()
@@ -65,12 +75,13 @@ class AuthService:
         if not q or not a:
             return False, '请填写问题和答案'
         # secondary password verification
-        if not auth_password or not check_password_hash(user.password_hash, auth_password):
+        if not auth_password or not verify_password(user.password_hash, auth_password):
             return False, '需二次验证密码，密码错误'
         # ensure a single profile and update
         profile = self.user_repo.ensure_profile(user)
         profile.question = q
-        profile.answer_hash = generate_password_hash(a)
+        profile.answer_hash = hash_password(a)
+        profile.answer_rehash = False
         # reset failed count and unlock on successful save
         profile.failed_count = 0
         profile.locked_until = None
@@ -78,14 +89,16 @@ class AuthService:
         return True, '辅助验证已保存'
 
     def change_password(self, user: User, old_password: str, new_password: str, confirm_new: str) -> Tuple[bool, str]:
-        if not check_password_hash(user.password_hash, old_password):
+        if not verify_password(user.password_hash, old_password):
             return False, '旧密码错误'
         if not new_password or len(new_password) < 8:
             return False, '新密码长度至少8位'
         if new_password != confirm_new:
             return False, '两次输入的新密码不一致'
-        user.password_hash = generate_password_hash(new_password)
+        user.password_hash = hash_password(new_password)
+        user.password_rehash = False
         self.user_repo.commit()
+        invalidate_identity(user.id)
         return True, '密码已更新'
 
     def reset_password(self, user, new_password: str):
@@ -96,12 +109,14 @@ class AuthService:
             if not new_password or len(new_password) < 6:
                 return False, '密码长度至少为6位'
             # align with change_password implementation
-            user.password_hash = generate_password_hash(new_password)
+            user.password_hash = hash_password(new_password)
+            user.password_rehash = False
             # clear lock state on security profile
             profile = self.user_repo.ensure_profile(user)
             profile.failed_count = 0
             profile.locked_until = None
             self.user_repo.commit()
+            invalidate_identity(user.id)
             return True, '密码已重置，请使用新密码登录。'
         except Exception:
             return False, '重置密码失败，请稍后再试或联系管理员'
\ No newline at end of file
@@ -0,0 +1,82 @@
+import functools
+import multiprocessing
+from collections import Counter
+from itertools import islice
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+from simple_notes.hashing import DEFAULT_SALT_LENGTH, current_method, hash_prefix
+from simple_notes.repositories.user_repo import UserRepository
+
+
+def _batched(iterable: Iterable, size: int):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+class CredentialService:
+    """口令与安全问题答案哈希的批量迁移"""
+
+    def __init__(self, repo: Optional[UserRepository] = None):
+        self.repo = repo or UserRepository()
+
+    def hash_distribution(self, batch_size: int = 1000) -> Dict[str, Counter]:
+        """统计各列哈希的方法与参数分布，形如 {'password_hash': Counter({'scrypt:32768:8:1': 10})}"""
+        distribution = {'password_hash': Counter(), 'answer_hash': Counter()}
+        for column, pwhash in self.repo.iter_credential_hashes(batch_size=batch_size):
+            distribution[column][hash_prefix(pwhash) or '(empty)'] += 1
+        return distribution
+
+    def mark_stale(self, force: bool = False) -> Dict[str, int]:
+        """标记参数与当前配置不同的哈希，下次验证成功时重算；返回各列标记的行数"""
+        counts = self.repo.mark_stale_hashes(current_method(), force=force)
+        self.repo.commit()
+        return counts
+
+    def import_answers(self, rows: Iterable[Tuple[str, str]], processes: Optional[int] = None,
+                       batch_size: int = 500,
+                       progress: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+        """用明文答案 (username, answer) 重算答案哈希，返回 (更新数, 跳过数)
+
+        哈希在 processes 个进程中并行计算（默认为 CPU 核数，0 表示在当前进程计算），
+        每批结果用一条 executemany UPDATE 写回并提交。没有安全配置的用户会被跳过。
+        """
+        hasher = functools.partial(
+            generate_password_hash,
+            method=current_method(),
+            salt_length=current_app.config.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH),
+        )
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        pool = multiprocessing.get_context('spawn').Pool(processes) if processes > 0 else None
+        updated = skipped = 0
+        try:
+            for batch in _batched(rows, batch_size):
+                user_ids = self.repo.profile_user_ids(username for username, _answer in batch)
+                known = [(user_ids[username], answer) for username, answer in batch if username in user_ids]
+                skipped += len(batch) - len(known)
+                answers = [answer for _user_id, answer in known]
+                if pool is not None:
+                    chunksize = max(1, len(answers) // (processes * 4))
+                    hashes = pool.map(hasher, answers, chunksize=chunksize)
+                else:
+                    hashes = [hasher(answer) for answer in answers]
+                self.repo.bulk_update_answer_hashes([
+                    {'user_id': user_id, 'answer_hash': answer_hash}
+                    for (user_id, _answer), answer_hash in zip(known, hashes)
+                ])
+                self.repo.commit()
+                updated += len(known)
+                if progress:
+                    progress(updated)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return updated, skipped
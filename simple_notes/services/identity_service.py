@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Optional, Union
+
+from flask import current_app
+from sqlalchemy import select
+
+from simple_notes.cache import TTLCache
+from simple_notes.extensions import db
+from simple_notes.models import User
+
+
+class UserIdentity:
+    """供 Flask-Login 使用的轻量用户身份
+
+    只包含不可变的展示字段，可安全地跨请求、跨线程缓存。
+    需要修改用户数据（密码、安全配置等）的视图应按 id 重新加载 User。
+    """
+
+    __slots__ = ('id', 'username', 'email', 'created_at')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id: int, username: str, email: str, created_at: datetime):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'username', username)
+        object.__setattr__(self, 'email', email)
+        object.__setattr__(self, 'created_at', created_at)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'UserIdentity 不可修改: {name}')
+
+    def get_id(self) -> str:
+        return str(self.id)
+
+    def __eq__(self, other):
+        if isinstance(other, (UserIdentity, User)):
+            return self.id == other.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f'<UserIdentity {self.id} {self.username}>'
+
+
+def get_identity_cache() -> TTLCache:
+    """获取当前应用的身份缓存（每个应用实例一个）"""
+    cache = current_app.extensions.get('identity_cache')
+    if cache is None:
+        cache = TTLCache(
+            maxsize=current_app.config.get('USER_CACHE_SIZE', 4096),
+            ttl=current_app.config.get('USER_CACHE_TTL', 60),
+        )
+        current_app.extensions['identity_cache'] = cache
+    return cache
+
+
+def load_identity(user_id: int) -> Optional[Union[UserIdentity, User]]:
+    """按 id 加载登录用户
+
+    USER_CACHE_ENABLED 关闭时返回 ORM User（每个请求一次查询），便于对比开启前后的吞吐量。
+    """
+    if not current_app.config.get('USER_CACHE_ENABLED', True):
+        return db.session.get(User, user_id)
+    cache = get_identity_cache()
+    identity = cache.get(user_id)
+    if identity is None:
+        row = db.session.execute(
+            select(User.id, User.username, User.email, User.created_at).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+        cache.set(user_id, identity)
+    return identity
+
+
+def invalidate_identity(user_id: Optional[int] = None) -> None:
+    """使用户身份缓存失效；不传 user_id 时清空全部"""
+    cache = get_identity_cache()
+    if user_id is None:
+        cache.clear()
+    else:
+        cache.pop(user_id)
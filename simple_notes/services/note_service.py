@@ -1,13 +1,56 @@
-from datetime import datetime
-from typing import Optional, Tuple, List
+from collections import namedtuple
+from datetime import date, datetime
+from itertools import groupby
+from typing import Callable, Optional, Tuple, List
+from simple_notes.cache import TTLCache
 from simple_notes.models import NoteEntry
 from simple_notes.repositories.note_repo import NoteRepository
+from simple_notes.repositories.stats_repo import UserStatsRepository, content_size
+from simple_notes.repositories.search_repo import get_search_backend
 from simple_notes.extensions import db
+from simple_notes.sharding import get_shard_map, shard_scope
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
 import re
 
+SIDEBAR_LIMIT = 50
+EXCERPT_LENGTH = 120
+
+_WORD_RE = re.compile(r'\b\w+\b')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def summarize_content(content: str) -> dict:
+    """计算列表页使用的摘要字段：excerpt、word_count、char_count"""
+    content = content or ''
+    flat = _SPACE_RE.sub(' ', content).strip()
+    excerpt = flat if len(flat) <= EXCERPT_LENGTH else flat[:EXCERPT_LENGTH].rstrip() + '…'
+    return {
+        'excerpt': excerpt,
+        'word_count': len(_WORD_RE.findall(content)),
+        'char_count': len(content),
+    }
+
+# 侧边栏条目：只含渲染链接所需的字段，可安全地跨请求缓存
+SidebarItem = namedtuple('SidebarItem', ['id', 'title', 'created_at'])
+
+
+def get_sidebar_cache() -> TTLCache:
+    """获取当前应用的侧边栏缓存（每个应用实例一个）"""
+    cache = current_app.extensions.get('sidebar_cache')
+    if cache is None:
+        cache = TTLCache(
+            maxsize=current_app.config.get('SIDEBAR_CACHE_SIZE', 1024),
+            ttl=current_app.config.get('SIDEBAR_CACHE_TTL', 300),
+        )
+        current_app.extensions['sidebar_cache'] = cache
+    return cache
+
+
 class NoteService:
-    def __init__(self, repo: Optional[NoteRepository] = None):
+    def __init__(self, repo: Optional[NoteRepository] = None, stats_repo: Optional[UserStatsRepository] = None):
         self.repo = repo or NoteRepository()
+        self.stats_repo = stats_repo or UserStatsRepository()
     
     def create_entry(self, user_id: int, title: str, content: str) -> Tuple[bool, str, Optional[NoteEntry]]:
         """创建新笔记"""
@@ -25,11 +68,16 @@ class NoteService:
                 title=title,
                 content=content,
                 created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
+                updated_at=datetime.utcnow(),
+                **summarize_content(content)
             )
             
             self.repo.add(entry)
+            self.stats_repo.apply_delta(user_id, notes=1, content_bytes=content_size(content))
+            self.repo.flush()
+            get_search_backend().index_entry(entry)
             self.repo.commit()
+            self.invalidate_sidebar(user_id)
             
             return True, '笔记已创建', entry
         except Exception as e:
@@ -47,12 +95,19 @@ class NoteService:
                 return False, '标题长度不能超过200个字符'
             
             # 更新笔记
+            size_delta = content_size(content) - content_size(entry.content)
             entry.title = title
             entry.content = content
+            for key, value in summarize_content(content).items():
+                setattr(entry, key, value)
             entry.updated_at = datetime.utcnow()
             
             self.repo.update(entry)
+            # 即使字节数不变也要更新统计行，写入计数用于页面 ETag
+            self.stats_repo.apply_delta(entry.user_id, content_bytes=size_delta)
+            get_search_backend().index_entry(entry)
             self.repo.commit()
+            self.invalidate_sidebar(entry.user_id)
             
             return True, '笔记已更新'
         except Exception as e:
@@ -62,8 +117,12 @@ class NoteService:
     def delete_entry(self, entry: NoteEntry) -> Tuple[bool, str]:
         """删除笔记"""
         try:
+            entry_id, user_id, size = entry.id, entry.user_id, content_size(entry.content)
             self.repo.delete(entry)
+            self.stats_repo.apply_delta(user_id, notes=-1, content_bytes=-size)
+            get_search_backend().remove_entry(entry_id)
             self.repo.commit()
+            self.invalidate_sidebar(user_id)
             return True, '笔记已删除'
         except Exception as e:
             self.repo.rollback()
@@ -74,16 +133,78 @@ class NoteService:
         return self.repo.get_by_id_for_user(entry_id, user_id)
     
     def search_entries(self, user_id: int, keyword: str, page: int = 1, per_page: int = 10):
-        """搜索用户的笔记"""
+        """搜索用户的笔记
+
+        优先使用全文检索后端按相关度排序；后端不可用或查询失败时回退到 ILIKE。
+        """
         if not keyword or len(keyword.strip()) == 0:
             return self.repo.list_of_user_paginated(user_id, page, per_page)
         
+        backend = get_search_backend()
+        if backend.supports(keyword):
+            try:
+                return backend.search(user_id, keyword, page, per_page)
+            except SQLAlchemyError as e:
+                self.repo.rollback()
+                current_app.logger.warning('全文检索失败，回退到 ILIKE: %s', e)
+        
         return self.repo.search_user_entries(user_id, keyword, page, per_page)
     
     def get_recent_entries(self, user_id: int, limit: int = 10) -> List[NoteEntry]:
         """获取用户最近的笔记"""
         return self.repo.recent_entries(user_id, limit)
     
+    def get_sidebar_days(self, user_id: int) -> List[Tuple[date, Tuple[SidebarItem, ...]]]:
+        """获取侧边栏的按日分组数据
+
+        结果按用户缓存，写笔记后失效；缓存命中时不访问数据库。
+        返回 [(日期, (条目, ...)), ...]，日期倒序。
+        """
+        return get_sidebar_cache().get_or_set(user_id, lambda: self._load_sidebar_days(user_id))
+    
+    def invalidate_sidebar(self, user_id: int) -> None:
+        """使用户的侧边栏缓存失效（在事务提交之后调用）"""
+        get_sidebar_cache().pop(user_id)
+    
+    def _load_sidebar_days(self, user_id: int):
+        rows = self.repo.sidebar_rows(user_id, limit=SIDEBAR_LIMIT)
+        days = []
+        for day, group in groupby(rows, key=lambda r: r.day):
+            # SQLite 的 DATE() 返回字符串，MySQL 返回 date
+            if not isinstance(day, date):
+                day = date.fromisoformat(str(day)[:10])
+            days.append((day, tuple(SidebarItem(r.id, r.title, r.created_at) for r in group)))
+        return days
+    
+    def backfill_summaries(self, batch_size: int = 500,
+                           progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """为存量笔记回填 excerpt/word_count/char_count，返回处理的笔记数
+
+        按主键分批读取，每批只在内存中保留 batch_size 条，写回后立即提交，
+        不长时间持有行锁；中断后重新执行即从未回填的笔记继续。
+        多分片时逐个分片读取并写回同一分片。
+        """
+        total = self.repo.count_missing_summaries()
+        done = 0
+        try:
+            for shard in get_shard_map().names:
+                with shard_scope(shard):
+                    for rows in self.repo.iter_missing_summaries(batch_size):
+                        self.repo.bulk_update_summaries([
+                            {'id': entry_id, **summarize_content(content)} for entry_id, content in rows
+                        ])
+                        self.repo.commit()
+                        done += len(rows)
+                        if progress:
+                            progress(done, total)
+            if done:
+                self.stats_repo.bump_versions()
+            self.repo.commit()
+        except Exception:
+            self.repo.rollback()
+            raise
+        return done
+    
     def analyze_content(self, content: str) -> dict:
         """分析笔记内容，提取关键词和统计信息"""
         # 简单的文本分析
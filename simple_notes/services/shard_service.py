@@ -0,0 +1,61 @@
+import time
+from typing import Callable, Optional
+
+from flask import current_app
+
+from simple_notes.extensions import db
+from simple_notes.repositories.shard_repo import NoteShardRepository
+from simple_notes.sharding import get_shard_map
+
+
+class ShardService:
+    """笔记分片的在线迁移"""
+
+    def __init__(self, repo: Optional[NoteShardRepository] = None):
+        self.repo = repo or NoteShardRepository()
+
+    def placement(self, user_id: int):
+        """用户当前的分片放置（reads, write）"""
+        return db.session().note_placement(user_id)
+
+    def move_user(self, user_id: int, target: str, batch_size: int = 500,
+                  wait: Optional[float] = None,
+                  progress: Optional[Callable[[int], None]] = None) -> int:
+        """把用户的笔记迁移到 target 分片，返回搬运的笔记数
+
+        1. 写入指派 (源, target)：此后读取同时访问两个分片，新笔记写入 target；
+           等待 NOTE_SHARD_CACHE_TTL 秒，让其他进程缓存的旧放置过期
+        2. 分批复制到 target 并从源分片删除，直到源分片上没有该用户的笔记
+        3. 指派改为 target，迁移结束
+        中断后重新执行同一命令即可继续。
+        """
+        shard_map = get_shard_map()
+        if target not in shard_map.names:
+            raise ValueError(f"Unknown shard: {target}")
+        reads = self.placement(user_id).reads
+        source = reads[0]
+        if len(reads) > 1 and reads[1] != target:
+            raise ValueError(f"User {user_id} is already moving from {source} to {reads[1]}")
+        if source == target:
+            return 0
+
+        self.repo.set_assignment(user_id, source, target)
+        self.repo.commit()
+        if wait is None:
+            wait = current_app.config.get('NOTE_SHARD_CACHE_TTL', 30)
+        if wait > 0:
+            time.sleep(wait)
+
+        moved = 0
+        while True:
+            rows = self.repo.fetch_user_batch(source, user_id, batch_size)
+            if not rows:
+                break
+            self.repo.copy_rows(target, rows)
+            moved += self.repo.release_rows(source, target, rows)
+            if progress:
+                progress(moved)
+
+        self.repo.set_assignment(user_id, target)
+        self.repo.commit()
+        return moved
@@ -0,0 +1,227 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from flask import Flask, Request, Response
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+from simple_notes.cache import TTLCache
+
+"""
+服务端会话
+
+- Cookie 中只有签名后的 "<会话 id>.<版本号>"，长度固定；会话内容保存在 SQLite 文件中，
+  同一台机器上的所有 worker 进程共享
+- 每个进程有一层 LRU 缓存（会话 id -> (版本号, 序列化内容)）。每次写入会话版本号加一并重新下发 Cookie，
+  缓存中的版本与 Cookie 一致时直接使用，因此读取会话只需一次缓存查找，也不会读到其他 worker 写入前的旧内容
+- 写入是比较并写入（UPDATE ... WHERE version = 读取时的版本）：两个 worker 基于同一版本并发写入时只有
+  先到的一方成功，后到的一方放弃本次修改并丢弃缓存，不会出现同一版本号对应两份不同内容
+- 登录用户变化（登录、退出）时更换会话 id，防止会话固定攻击
+- 过期会话在写入时按 SESSION_SWEEP_INTERVAL 顺带清理，也可以用 simple-notes sweep-sessions 定期清理
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    sid TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+USER_KEY = '_user_id'
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """服务端会话对象，修改时标记 modified"""
+
+    def __init__(self, initial=None, sid: Optional[str] = None, version: int = 0):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.version = version
+        self.user_id = self.get(USER_KEY)
+        self.modified = False
+        self.accessed = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class SQLiteSessionStore:
+    """会话内容的 SQLite 存储；每个线程（以及 fork 后的每个进程）使用自己的连接"""
+
+    def __init__(self, path: str, sweep_interval: float = 300.0):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = time.time()
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False,
+                                   uri=self.path.startswith('file:'))
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(SCHEMA)
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def load(self, sid: str) -> Optional[Tuple[int, str]]:
+        """读取未过期的会话，返回 (版本号, 序列化内容)"""
+        row = self._connection().execute(
+            'SELECT version, data FROM sessions WHERE sid = ? AND expires_at > ?', (sid, time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save(self, sid: str, expected: int, version: int, data: str, lifetime: float) -> bool:
+        """比较并写入：仅当存储中的版本号仍为 expected 时写入新版本（expected 为 0 表示新会话 id），
+
+        返回是否写入成功。其他 worker 已基于同一版本写入时返回 False，不覆盖对方的内容。
+        """
+        now = time.time()
+        conn = self._connection()
+        if expected:
+            written = conn.execute(
+                'UPDATE sessions SET version = ?, data = ?, expires_at = ? WHERE sid = ? AND version = ?',
+                (version, data, now + lifetime, sid, expected),
+            ).rowcount == 1
+        else:
+            try:
+                conn.execute(
+                    'INSERT INTO sessions (sid, version, data, expires_at) VALUES (?, ?, ?, ?)',
+                    (sid, version, data, now + lifetime),
+                )
+                written = True
+            except sqlite3.IntegrityError:
+                written = False
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self.sweep(now)
+        return written
+
+    def delete(self, sid: str) -> None:
+        self._connection().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """删除过期会话，返回删除的条数"""
+        return self._connection().execute(
+            'DELETE FROM sessions WHERE expires_at <= ?', (now or time.time(),)
+        ).rowcount
+
+
+class ServerSessionInterface(SessionInterface):
+    """把会话内容保存在服务端、Cookie 只携带会话 id 与版本号的会话接口"""
+
+    salt = 'server-session'
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store: SQLiteSessionStore, cache: TTLCache):
+        self.store = store
+        self.cache = cache
+
+    def _signer(self, app: Flask) -> Signer:
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app: Flask, request: Request) -> Optional[ServerSession]:
+        if not app.secret_key:
+            return None
+        value = request.cookies.get(self.get_cookie_name(app))
+        if not value:
+            return ServerSession()
+        try:
+            sid, _, version = self._signer(app).unsign(value).decode().partition('.')
+            version = int(version)
+        except (BadSignature, ValueError):
+            return ServerSession()
+        cached = self.cache.get(sid)
+        if cached is None or cached[0] != version:
+            cached = self.store.load(sid)
+            if cached is None:
+                # 未知或已过期的会话 id 不沿用，写入时会分配新的 id
+                return ServerSession()
+            self.cache.set(sid, cached)
+        return ServerSession(self.serializer.loads(cached[1]), sid=sid, version=cached[0])
+
+    def save_session(self, app: Flask, session: ServerSession, response: Response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                if session.sid:
+                    self.store.delete(session.sid)
+                    self.cache.pop(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add('Cookie')
+            return
+
+        if session.modified:
+            if session.sid is None or session.get(USER_KEY) != session.user_id:
+                if session.sid:
+                    self.store.delete(session.sid)
+                    self.cache.pop(session.sid)
+                session.sid, session.version = secrets.token_hex(16), 0
+            data = self.serializer.dumps(dict(session))
+            lifetime = app.permanent_session_lifetime.total_seconds()
+            if not self.store.save(session.sid, session.version, session.version + 1, data, lifetime):
+                # 其他 worker 已基于同一版本写入：保留对方的内容，丢弃本进程可能过期的缓存，
+                # 也不下发 Cookie，下次请求按存储中的最新版本读取
+                self.cache.pop(session.sid)
+                return
+            session.version += 1
+            self.cache.set(session.sid, (session.version, data))
+        elif not self.should_set_cookie(app, session):
+            return
+
+        value = self._signer(app).sign(f'{session.sid}.{session.version}').decode()
+        response.set_cookie(name, value, expires=self.get_expiration_time(app, session), httponly=httponly,
+                            domain=domain, path=path, secure=secure, samesite=samesite)
+        response.vary.add('Cookie')
+
+
+def init_sessions(app: Flask) -> None:
+    """SESSION_BACKEND=sqlite 时启用服务端会话；cookie 保持 Flask 默认的签名 Cookie 会话"""
+    if app.config.get('SESSION_BACKEND', 'sqlite') != 'sqlite':
+        return
+    path = app.config.get('SESSION_STORE_PATH')
+    if not path and app.config.get('SQLALCHEMY_DATABASE_URI', '').endswith(':memory:'):
+        # 数据库本身在内存中（测试、临时实例）时，会话也放在进程内共享的内存库中，不在磁盘上留下文件
+        path = f'file:sessions-{id(app)}?mode=memory&cache=shared'
+    elif not path:
+        path = os.path.join(app.instance_path, 'sessions.db')
+    if not path.startswith('file:'):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    store = SQLiteSessionStore(path, sweep_interval=app.config.get('SESSION_SWEEP_INTERVAL', 300))
+    cache = TTLCache(maxsize=app.config.get('SESSION_CACHE_SIZE', 4096),
+                     ttl=app.permanent_session_lifetime.total_seconds())
+    app.session_interface = ServerSessionInterface(store, cache)
+    app.extensions['session_store'] = store
@@ -0,0 +1,244 @@
+import bisect
+import hashlib
+import heapq
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import create_engine, inspect, select, text
+
+from simple_notes.cache import TTLCache
+
+"""
+笔记分片（note_entries 按 user_id 水平拆分）
+
+- NOTE_SHARDS 为分片表，形如 "primary,shard1=mysql+pymysql://...,shard2=..."；
+  名称 primary 表示主库本身（不写 URL）。未配置时只有 primary 一个分片，行为与单库完全一致
+- 用户所在分片：优先取主库 note_shard_assignments 中的固定映射（由 rebalance-user 写入），
+  否则按分片名构成的一致性哈希环计算；增删分片只影响环上相邻区间的用户
+- 除 note_entries 外的表（用户、统计、设置、检索索引）都只在主库
+- 多分片时笔记 ID 由主库 note_id_sequence 统一分配，保证跨分片唯一；该表只有一行，保存已分配的最大 ID
+- 迁移中的用户（assignment.target 非空）读取源、目标两个分片，新笔记写入目标分片；
+  复制与删除之间同一笔记在两个分片上各有一行，归并与统计按笔记 ID 去重，优先取目标分片上的副本
+"""
+
+PRIMARY_SHARD = 'primary'
+NOTE_TABLE = 'note_entries'
+RING_REPLICAS = 64
+
+Placement = namedtuple('Placement', ['reads', 'write'])
+
+_note_scope: ContextVar[Optional[Tuple[str, ...]]] = ContextVar('note_scope', default=None)
+
+
+def parse_shard_map(value: str) -> Dict[str, Optional[str]]:
+    """解析 NOTE_SHARDS，返回 {分片名: URL}；primary 的 URL 为 None"""
+    shards: Dict[str, Optional[str]] = {}
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, url = item.partition('=')
+        name, url = name.strip(), url.strip()
+        if name == PRIMARY_SHARD:
+            shards[name] = None
+        elif not url:
+            raise ValueError(f"Shard {name} in NOTE_SHARDS has no database URL")
+        else:
+            shards[name] = url
+    return shards or {PRIMARY_SHARD: None}
+
+
+class HashRing:
+    """一致性哈希环，每个分片在环上放置 replicas 个虚拟节点"""
+
+    def __init__(self, names: Iterable[str], replicas: int = RING_REPLICAS):
+        points = []
+        for name in names:
+            for i in range(replicas):
+                points.append((self._hash(f'{name}#{i}'), name))
+        points.sort()
+        self._keys = [p[0] for p in points]
+        self._names = [p[1] for p in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+    def shard_for(self, key) -> str:
+        index = bisect.bisect(self._keys, self._hash(str(key))) % len(self._keys)
+        return self._names[index]
+
+
+class ShardMap:
+    """应用级的分片表：分片引擎、哈希环与用户放置缓存"""
+
+    def __init__(self, urls: Dict[str, Optional[str]], engine_options: Optional[dict] = None,
+                 cache_ttl: float = 30):
+        self.names: List[str] = list(urls)
+        self.ring = HashRing(self.names)
+        self.engines = {
+            name: create_engine(url, **(engine_options or {}))
+            for name, url in urls.items() if url is not None
+        }
+        self.cache = TTLCache(maxsize=65536, ttl=cache_ttl)
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.names) > 1
+
+    def bind_for(self, name: str, primary):
+        """分片名对应的引擎；primary 为主库引擎"""
+        return primary if name == PRIMARY_SHARD else self.engines[name]
+
+    def placement(self, user_id: int, load_assignment: Callable[[int], Optional[Tuple[str, Optional[str]]]]) -> Placement:
+        """用户笔记所在分片：reads 为需要读取的分片，write 为新笔记写入的分片"""
+        if not self.sharded:
+            return Placement((self.names[0],), self.names[0])
+
+        def load():
+            assigned = load_assignment(user_id)
+            if assigned is None:
+                shard = self.ring.shard_for(user_id)
+                return Placement((shard,), shard)
+            shard, target = assigned
+            if target and target != shard:
+                return Placement((shard, target), target)
+            return Placement((shard,), shard)
+        return self.cache.get_or_set(user_id, load)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        if user_id is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(user_id)
+
+
+def init_shards(app) -> list:
+    """按 NOTE_SHARDS 创建分片引擎，返回新建的引擎列表（不含主库）"""
+    shard_map = ShardMap(
+        app.config.get('NOTE_SHARDS') or {PRIMARY_SHARD: None},
+        app.config.get('SQLALCHEMY_ENGINE_OPTIONS'),
+        app.config.get('NOTE_SHARD_CACHE_TTL', 30),
+    )
+    app.extensions['note_shards'] = shard_map
+    return list(shard_map.engines.values())
+
+
+def get_shard_map() -> ShardMap:
+    from flask import current_app
+    shard_map = current_app.extensions.get('note_shards')
+    if shard_map is None:
+        shard_map = current_app.extensions['note_shards'] = ShardMap({PRIMARY_SHARD: None})
+    return shard_map
+
+
+def ensure_shard_schema(app, primary_engine) -> None:
+    """在各分片上建立 note_entries，并让主库的 ID 序列从现有最大笔记 ID 之后开始"""
+    from simple_notes.models import NoteEntry, NoteIdSequence
+    from sqlalchemy import Column, Index, MetaData, Table, func, insert
+
+    shard_map = app.extensions['note_shards']
+    # 分片上没有 users 表，按列与索引复制表结构，不带外键
+    source = NoteEntry.__table__
+    metadata = MetaData()
+    table = Table(source.name, metadata, *[
+        Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in source.columns
+    ])
+    for index in source.indexes:
+        Index(index.name, *[table.c[c.name] for c in index.columns])
+    for engine in shard_map.engines.values():
+        metadata.create_all(engine)
+
+    if not shard_map.sharded:
+        return
+    sequence = NoteIdSequence.__table__
+    with primary_engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(sequence)).scalar() == 1:
+            return
+        # 首次启动，或旧版本每分配一个 ID 插入一行：收拢为一行
+        highest = conn.execute(select(func.max(sequence.c.id))).scalar() or 0
+        for name in shard_map.names:
+            engine = shard_map.bind_for(name, primary_engine)
+            if engine is primary_engine:
+                value = conn.execute(select(func.max(NoteEntry.__table__.c.id))).scalar()
+            else:
+                with engine.connect() as shard_conn:
+                    value = shard_conn.execute(select(func.max(table.c.id))).scalar()
+            highest = max(highest, value or 0)
+        conn.execute(sequence.delete())
+        conn.execute(insert(sequence).values(id=highest))
+
+
+def allocate_note_ids(conn, count: int) -> range:
+    """在主库的单行计数器上一次分配 count 个连续的笔记 ID"""
+    if conn.dialect.name == 'mysql':
+        # MySQL 不支持 UPDATE ... RETURNING，用 LAST_INSERT_ID(expr) 取回本连接写入的值
+        conn.execute(text('UPDATE note_id_sequence SET id = LAST_INSERT_ID(id + :n)'), {'n': count})
+        last = conn.execute(text('SELECT LAST_INSERT_ID()')).scalar()
+    else:
+        last = conn.execute(text('UPDATE note_id_sequence SET id = id + :n RETURNING id'), {'n': count}).scalar()
+    return range(last - count + 1, last + 1)
+
+
+@contextmanager
+def shard_scope(*names: str):
+    """在该上下文内，note_entries 上的查询只发往指定分片"""
+    token = _note_scope.set(tuple(names))
+    try:
+        yield
+    finally:
+        _note_scope.reset(token)
+
+
+@contextmanager
+def user_shard(user_id: int):
+    """在该上下文内，note_entries 上的查询只发往该用户所在的分片"""
+    from simple_notes.extensions import db
+    with shard_scope(*db.session().note_placement(user_id).reads):
+        yield
+
+
+def current_scope() -> Optional[Tuple[str, ...]]:
+    return _note_scope.get()
+
+
+def gather(run: Callable[[], Any]) -> List[Any]:
+    """在当前范围（未限定时为全部分片）的每个分片上执行 run，返回各分片的结果列表"""
+    results = []
+    for name in current_scope() or get_shard_map().names:
+        with shard_scope(name):
+            results.append(run())
+    return results
+
+
+def merge_ordered(parts: Iterable[list], limit: Optional[int] = None, newest_first: bool = True) -> list:
+    """按 (created_at, id) 归并各分片已排好序的结果
+
+    迁移中的笔记在源、目标分片上各有一行，排序键相同因而归并后相邻，只保留 preferred_copy 选出的一行。
+    """
+    merged = heapq.merge(*parts, key=lambda row: (row.created_at, row.id), reverse=newest_first)
+    rows = []
+    for row in merged:
+        if rows and rows[-1].id == row.id:
+            rows[-1] = preferred_copy(rows[-1], row)
+            continue
+        if limit is not None and len(rows) >= limit:
+            break
+        rows.append(row)
+    return rows
+
+
+def preferred_copy(first, second):
+    """同一笔记的两个分片副本中应当展示的一份
+
+    复制之后又被修改的行留在源分片等待下一轮复制，因此较新的一份优先；
+    否则取用户写入分片（迁移目标）上的副本。
+    """
+    if first.updated_at != second.updated_at:
+        return first if first.updated_at > second.updated_at else second
+    from simple_notes.extensions import db
+    write = db.session().note_placement(first.user_id).write
+    state = inspect(second, raiseerr=False)
+    return second if state is not None and state.identity_token == write else first
@@ -0,0 +1,357 @@
+import glob
+import gzip
+import os
+import re
+import shutil
+import subprocess
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from flask import Flask
+
+"""
+样式表构建：LESS 编译、与 Bootstrap 合并、清除未使用的选择器并压缩
+
+- simple-notes build-css 编译 STYLESHEETS 中的 .less（同时更新旁边的 .css），按 STYLESHEETS 的顺序
+  与 Bootstrap、styles.css 合并，删除在 templates/**/*.html 与静态 JS 中找不到对应类名、ID、
+  元素或属性的选择器，压缩后写入 static/css/bundle.min.css
+- 模板中的 alert-{{ category }} 这类拼接类名按前缀保留（alert-*）
+- 配置了 lessc（LESSC，默认在 PATH 中查找）时用它编译；否则使用内置编译器，只支持嵌套、& 与变量，
+  遇到混入等其他语法时报错
+- CSS_BUNDLE=1 且 bundle.min.css 存在时，base.html 只引用这一个样式表；之后执行 build-assets 生成指纹文件名
+"""
+
+BUNDLE_NAME = 'css/bundle.min.css'
+# 合并顺序即层叠顺序；与 base.html 未合并时引用的样式表相同（图标样式表单独引用，只含 .bi-* 规则，不参与层叠）
+STYLESHEETS = (
+    'vendor/bootstrap/bootstrap.min.css',
+    'css/styles.css',
+    'css/base.less',
+)
+# 内部可以嵌套普通规则的 at-rule；其他（@keyframes、@font-face 等）整体保留
+NESTING_AT_RULES = ('media', 'supports', 'container', 'layer', 'document')
+
+WORD = re.compile(r'[A-Za-z_][\w-]*')
+TEMPLATE_PREFIX = re.compile(r'([A-Za-z_][\w-]*-)\{\{')
+SELECTOR_TOKEN = re.compile(
+    r'\\.|"[^"]*"|\'[^\']*\'|\[[^\]]*\]'
+    r'|::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?'
+    r'|[.#](?:[\w-]|\\.)+|[A-Za-z][\w-]*|.',
+    re.S,
+)
+STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+LESS_VARIABLE = re.compile(r'@([\w-]+)')
+LESS_DEFINITION = re.compile(r'@([\w-]+)\s*:(.*)', re.S)
+
+
+class LessError(ValueError):
+    """内置编译器不支持的 LESS 语法"""
+
+
+def scan(text: str) -> Iterator[Tuple]:
+    """按顶层切分样式表，产出 ('comment', 文本)、('statement', 文本) 或 ('block', 前缀, 内容)"""
+    i, start, depth, prelude_end, n = 0, 0, 0, 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in '"\'':
+            i += 1
+            while i < n and text[i] != c:
+                i += 2 if text[i] == '\\' else 1
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            if depth == 0 and not text[start:i].strip():
+                yield 'comment', text[i:end]
+                start = end
+            i = end
+            continue
+        elif c == '{':
+            if depth == 0:
+                prelude_end = i
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                yield 'block', text[start:prelude_end].strip(), text[prelude_end + 1:i]
+                start = i + 1
+        elif c == ';' and depth == 0:
+            if text[start:i].strip():
+                yield 'statement', text[start:i].strip()
+            start = i + 1
+        i += 1
+    if text[start:].strip():
+        yield 'statement', text[start:].strip()
+
+
+def strip_comments(css: str, keep_bang: bool = True) -> str:
+    """删除注释；keep_bang 时保留 /*! ... */ 版权注释"""
+    out, i, n = [], 0, len(css)
+    while i < n:
+        match = STRING.match(css, i)
+        if match:
+            out.append(match.group(0))
+            i = match.end()
+        elif css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            if keep_bang and css.startswith('/*!', i):
+                out.append(css[i:end])
+            i = end
+        else:
+            out.append(css[i])
+            i += 1
+    return ''.join(out)
+
+
+def split_selectors(prelude: str) -> List[str]:
+    """按顶层逗号拆分选择器列表（忽略括号、方括号与字符串中的逗号）"""
+    parts, depth, start, quote = [], 0, 0, None
+    for i, c in enumerate(prelude):
+        if quote:
+            quote = None if c == quote else quote
+        elif c in '"\'':
+            quote = c
+        elif c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            parts.append(prelude[start:i].strip())
+            start = i + 1
+    parts.append(prelude[start:].strip())
+    return [p for p in parts if p]
+
+
+# ---- LESS ----
+
+def _less_declaration(text: str, scope: Dict[str, str]) -> str:
+    prop, sep, value = text.partition(':')
+    if not sep:
+        raise LessError(f'不支持的 LESS 语法: {text}')
+    value = LESS_VARIABLE.sub(lambda m: _less_variable(m.group(1), scope), value.strip())
+    return f'{prop.strip()}: {value}'
+
+
+def _less_variable(name: str, scope: Dict[str, str]) -> str:
+    if name not in scope:
+        raise LessError(f'未定义的 LESS 变量: @{name}')
+    return scope[name]
+
+
+def _less_selectors(parents: List[str], prelude: str) -> List[str]:
+    children = split_selectors(prelude)
+    if not parents:
+        return [c.replace('&', '').strip() if c.startswith('&') else c for c in children]
+    return [c.replace('&', p) if '&' in c else f'{p} {c}' for p in parents for c in children]
+
+
+def _less_block(body: str, parents: List[str], scope: Dict[str, str], out: List[Tuple]) -> None:
+    """编译一个块；out 收集 ('raw', 文本)、('rule', 选择器列表, 声明列表) 与 ('at', 前缀, 子项)"""
+    scope = dict(scope)
+    items = list(scan(body))
+    for kind, *rest in items:
+        definition = LESS_DEFINITION.fullmatch(rest[0]) if kind == 'statement' else None
+        if definition:
+            scope[definition.group(1)] = LESS_VARIABLE.sub(
+                lambda m: _less_variable(m.group(1), scope), definition.group(2).strip())
+
+    declarations: List[str] = []
+    rule = ('rule', parents, declarations)
+    if parents:
+        out.append(rule)
+    for kind, *rest in items:
+        if kind == 'comment':
+            if not parents:
+                out.append(('raw', rest[0]))
+        elif kind == 'statement':
+            if LESS_DEFINITION.fullmatch(rest[0]):
+                continue
+            if rest[0].startswith('@'):
+                if not parents:
+                    out.append(('raw', rest[0] + ';'))  # @import/@charset 等原样输出
+                    continue
+            if not parents:
+                raise LessError(f'不支持的 LESS 语法: {rest[0]}')
+            declarations.append(_less_declaration(rest[0], scope))
+        else:
+            prelude, inner = rest
+            if prelude.startswith('@'):
+                prelude = LESS_VARIABLE.sub(
+                    lambda m: scope[m.group(1)] if m.group(1) in scope else m.group(0), prelude)
+                nested: List[Tuple] = []
+                _less_block(inner, parents, scope, nested)
+                out.append(('at', prelude, nested))
+            else:
+                _less_block(inner, _less_selectors(parents, prelude), scope, out)
+    if parents and not declarations:
+        out.remove(rule)
+
+
+def _format_less(nodes: List[Tuple], indent: str = '') -> str:
+    lines = []
+    for node in nodes:
+        if node[0] == 'raw':
+            lines.append(indent + node[1])
+        elif node[0] == 'rule':
+            lines.append(indent + f',\n{indent}'.join(node[1]) + ' {')
+            lines.extend(f'{indent}  {d};' for d in node[2])
+            lines.append(indent + '}')
+        else:
+            lines.append(f'{indent}{node[1]} {{')
+            lines.append(_format_less(node[2], indent + '  ').rstrip('\n'))
+            lines.append(indent + '}')
+    return '\n'.join(lines) + '\n'
+
+
+def compile_less(source: str) -> str:
+    """内置 LESS 编译器：嵌套规则、& 父选择器、@变量与嵌套 @media；输出格式与 lessc 一致"""
+    source = re.sub(r'(?m)(^|\s)//[^\n]*', r'\1', source)
+    nodes: List[Tuple] = []
+    _less_block(source, [], {}, nodes)
+    return _format_less(nodes)
+
+
+def compile_less_file(path: str, lessc: Optional[str] = None) -> str:
+    """编译 LESS 文件；找到 lessc 时优先使用"""
+    executable = shutil.which(lessc or 'lessc')
+    if executable:
+        return subprocess.run([executable, path], check=True, capture_output=True, text=True).stdout
+    with open(path, encoding='utf-8') as f:
+        return compile_less(f.read())
+
+
+# ---- 清除未使用的选择器 ----
+
+def used_words(app: Flask) -> Tuple[Set[str], Tuple[str, ...]]:
+    """模板与静态 JS 中出现的标识符，以及模板中拼接类名的前缀"""
+    words: Set[str] = set()
+    prefixes: Set[str] = set()
+    paths = glob.glob(os.path.join(app.root_path, app.template_folder, '**', '*.html'), recursive=True)
+    paths += glob.glob(os.path.join(app.static_folder, '**', '*.js'), recursive=True)
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        words.update(WORD.findall(text))
+        if path.endswith('.html'):
+            prefixes.update(TEMPLATE_PREFIX.findall(text))
+    words.update(w.lower() for w in list(words))
+    return words, tuple(sorted(prefixes))
+
+
+def selector_used(selector: str, words: Set[str], prefixes: Tuple[str, ...] = ()) -> bool:
+    """选择器中的类、ID、元素与属性名是否都出现在页面中；伪类参数不检查（保守保留）"""
+    for match in SELECTOR_TOKEN.finditer(selector):
+        token = match.group(0)
+        if token.startswith('['):
+            attribute = re.match(r'\[\s*([\w-]+)', token)
+            if attribute and attribute.group(1) not in words:
+                return False
+        elif token[0] in '.#':
+            name = re.sub(r'\\(.)', r'\1', token[1:])
+            if name not in words and not name.startswith(prefixes or ('\0',)):
+                return False
+        elif token[0].isalpha() and token.lower() not in words:
+            return False
+    return True
+
+
+def purge_css(css: str, words: Set[str], prefixes: Tuple[str, ...] = ()) -> str:
+    """删除匹配不到任何页面内容的选择器与因此变空的规则"""
+    out = []
+    for kind, *rest in scan(css):
+        if kind == 'comment':
+            out.append(rest[0])
+        elif kind == 'statement':
+            out.append(rest[0] + ';')
+        else:
+            prelude, body = rest
+            if prelude.startswith('@'):
+                name = prelude[1:].split(None, 1)[0].lower() if len(prelude) > 1 else ''
+                if name in NESTING_AT_RULES:
+                    inner = purge_css(body, words, prefixes)
+                    if inner.strip():
+                        out.append(f'{prelude}{{{inner}}}')
+                else:
+                    out.append(f'{prelude}{{{body}}}')
+                continue
+            selectors = [s for s in split_selectors(prelude) if selector_used(s, words, prefixes)]
+            if selectors:
+                out.append(','.join(selectors) + '{' + body + '}')
+    return '\n'.join(out)
+
+
+def drop_unused_keyframes(css: str) -> str:
+    """删除不再被任何 animation 引用的 @keyframes"""
+    items = list(scan(css))
+    keyframes = {}
+    rest = []
+    for item in items:
+        if item[0] == 'block' and re.match(r'@(-\w+-)?keyframes\s', item[1]):
+            keyframes[id(item)] = item[1].split()[-1]
+        else:
+            rest.append(item[1] if item[0] != 'block' else item[1] + '{' + item[2] + '}')
+    referenced = '\n'.join(rest)
+    out = []
+    for item in items:
+        name = keyframes.get(id(item))
+        if name is not None and not re.search(rf'(?<![\w-]){re.escape(name)}(?![\w-])', referenced):
+            continue
+        if item[0] == 'block':
+            out.append(item[1] + '{' + item[2] + '}')
+        else:
+            out.append(item[1] + (';' if item[0] == 'statement' else ''))
+    return '\n'.join(out)
+
+
+def minify_css(css: str) -> str:
+    """删除注释（保留 /*! 版权注释）与多余空白"""
+    parts = STRING.split(strip_comments(css))
+    for i in range(0, len(parts), 2):
+        segment = re.sub(r'\s+', ' ', parts[i])
+        segment = re.sub(r'\s*([{};,>])\s*', r'\1', segment)
+        parts[i] = re.sub(r':\s+', ':', segment).replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+# ---- 构建 ----
+
+def build_stylesheet(app: Flask) -> Dict[str, int]:
+    """编译 LESS、合并、清除并压缩，写入 bundle.min.css；返回各阶段的字节数"""
+    static = app.static_folder
+    sizes: Dict[str, int] = {}
+    parts = []
+    for name in STYLESHEETS:
+        path = os.path.join(static, name)
+        if name.endswith('.less'):
+            css = compile_less_file(path, app.config.get('LESSC'))
+            with open(path[:-len('.less')] + '.css', 'w', encoding='utf-8') as f:
+                f.write(css)
+        else:
+            with open(path, encoding='utf-8') as f:
+                css = f.read()
+        sizes[name] = len(css.encode('utf-8'))
+        parts.append(css)
+
+    bundle = '\n'.join(parts)
+    words, prefixes = used_words(app)
+    purged = drop_unused_keyframes(purge_css(strip_comments(bundle), words, prefixes))
+    minified = minify_css(purged)
+    with open(os.path.join(static, BUNDLE_NAME), 'w', encoding='utf-8') as f:
+        f.write(minified)
+
+    data = minified.encode('utf-8')
+    sizes.update({
+        'bundle': len(bundle.encode('utf-8')),
+        'purged': len(purged.encode('utf-8')),
+        'minified': len(data),
+        'gzip': len(gzip.compress(data, compresslevel=9, mtime=0)),
+    })
+    return sizes
+
+
+def init_stylesheets(app: Flask) -> None:
+    """决定 base.html 引用的样式表：合并后的 bundle.min.css 与图标子集（存在时）"""
+    from simple_notes.icons import icon_stylesheet
+
+    use_bundle = app.config.get('CSS_BUNDLE') and os.path.isfile(os.path.join(app.static_folder, BUNDLE_NAME))
+    app.jinja_env.globals['css_bundle'] = BUNDLE_NAME if use_bundle else None
+    app.jinja_env.globals['icon_stylesheet'] = icon_stylesheet(app)
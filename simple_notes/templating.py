@@ -0,0 +1,31 @@
+import os
+
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+
+"""
+Jinja 模板字节码缓存
+
+- TEMPLATE_BYTECODE_CACHE=1 时（默认关闭），模板编译结果保存在 TEMPLATE_CACHE_DIR（默认 instance/jinja_cache）中，
+  新的 worker 进程首次渲染时直接加载字节码，不再解析与编译模板
+- 缓存按模板名与源码校验和区分，模板修改后自动重新编译；Python 版本变化时旧缓存自动失效
+- 部署时执行 simple-notes precompile-templates 预先编译全部模板
+"""
+
+
+def init_template_cache(app: Flask) -> None:
+    """为应用的 Jinja 环境配置磁盘字节码缓存；须在第一次访问 app.jinja_env 之前调用"""
+    if not app.config.get('TEMPLATE_BYTECODE_CACHE'):
+        return
+    directory = app.config.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(directory)}
+
+
+def precompile_templates(app: Flask) -> int:
+    """编译应用与蓝图的全部模板并写入字节码缓存，返回模板数"""
+    env = app.jinja_env
+    names = [name for name in env.list_templates() if name.endswith('.html')]
+    for name in names:
+        env.get_template(name)
+    return len(names)
@@ -0,0 +1,75 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.config import Config
+
+
+class FingerprintedAssetsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.build_dir = tempfile.mkdtemp(prefix='assets-')
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.patch = mock.patch.object(Config, 'ASSET_BUILD_DIR', self.build_dir)
+        self.patch.start()
+        app = create_app()
+        register_commands(app)
+        result = app.test_cli_runner().invoke(args=['build-assets'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        # 新的 worker 启动时读取清单
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.patch.stop()
+        os.environ.pop('DATABASE_URL', None)
+        shutil.rmtree(self.build_dir, ignore_errors=True)
+
+    def _static_url(self, filename):
+        with self.app.test_request_context():
+            from flask import url_for
+            return url_for('static', filename=filename)
+
+    def test_hashed_urls_are_immutable_and_precompressed(self):
+        url = self._static_url('css/base.css')
+        self.assertRegex(url, r'^/static/css/base\.[0-9a-f]{12}\.css$')
+
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertTrue(response.headers['Content-Type'].startswith('text/css'))
+        with open(os.path.join(self.app.static_folder, 'css', 'base.css'), 'rb') as f:
+            self.assertEqual(gzip.decompress(response.data), f.read())
+        response.close()
+
+        plain = self.client.get(url, headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', plain.headers)
+        plain.close()
+
+    def test_css_references_hashed_font(self):
+        url = self._static_url('vendor/bootstrap-icons/bootstrap-icons.css')
+        response = self.client.get(url)
+        css = response.get_data(as_text=True)
+        response.close()
+        font = self.app.extensions['asset_manifest']['vendor/bootstrap-icons/fonts/bootstrap-icons.woff2']
+        self.assertIn(f'url("./fonts/{os.path.basename(font)}")', css)
+        font_response = self.client.get(f'/static/{font}')
+        self.assertEqual(font_response.status_code, 200)
+        self.assertIn('immutable', font_response.headers['Cache-Control'])
+        font_response.close()
+
+    def test_unbuilt_files_are_served_from_static(self):
+        response = self.client.get('/static/css/base.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response.headers.get('Cache-Control', ''))
+        response.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
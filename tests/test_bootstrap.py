@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import event, inspect
+
+from simple_notes import create_app
+from simple_notes.bootstrap import SCHEMA_VERSION, check_schema, schema_version
+from simple_notes.cli import register_commands
+from simple_notes.config import Config
+from simple_notes.extensions import db
+from simple_notes.models import User
+
+
+class BootstrapTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_URL'] = f'sqlite:///{self.path}'
+        # 数据库是临时文件，会话用 Cookie，不在 instance 目录下创建会话库
+        self.patches = [
+            mock.patch.object(Config, 'AUTO_BOOTSTRAP', '0'),
+            mock.patch.object(Config, 'SESSION_BACKEND', 'cookie'),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        os.environ.pop('DATABASE_URL', None)
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_startup_only_checks_version_until_bootstrap_runs(self):
+        app = create_app()
+        with app.app_context():
+            self.assertIsNone(schema_version())
+            self.assertFalse(inspect(db.engine).has_table('users'))
+            db.engine.dispose()
+
+        register_commands(app)
+        result = app.test_cli_runner().invoke(args=['bootstrap'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn(f'None -> {SCHEMA_VERSION}', result.output)
+
+        app = create_app()
+        self.assertEqual(
+            list(app.extensions['startup_timing']),
+            ['import', 'config', 'extensions', 'blueprints', 'db_check'],
+        )
+        with app.app_context():
+            admins = app.config['ADMIN_USERS']
+            self.assertEqual(User.query.filter(User.username.in_(admins)).count(), len(admins))
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                self.assertTrue(check_schema(app))
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            self.assertEqual(len(statements), 1)
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
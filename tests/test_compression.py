@@ -0,0 +1,74 @@
+import gzip
+import os
+import unittest
+
+from flask import Response, stream_with_context
+
+from simple_notes import create_app
+
+
+class ResponseCompressionTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+
+        @self.app.route('/_stream')
+        def stream():
+            def rows():
+                for i in range(100):
+                    yield f'{i},row\n'
+            return Response(stream_with_context(rows()), mimetype='text/csv')
+
+        @self.app.route('/_page')
+        def page():
+            return '<p>登录</p>' * 200
+
+        @self.app.route('/_small')
+        def small():
+            return {'ok': True}
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        os.environ.pop('DATABASE_URL', None)
+
+    def test_html_is_gzipped_only_when_enabled(self):
+        response = self.client.get('/_page', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        self.app.config['COMPRESS_HTML'] = True
+        plain = self.client.get('/_page')
+        response = self.client.get('/_page', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertIn('登录'.encode('utf-8'), gzip.decompress(response.data))
+        self.assertNotIn('Content-Encoding', plain.headers)
+
+    def test_page_with_csrf_token_is_not_compressed(self):
+        # 登录页同时包含 CSRF 令牌与回显的 ?u= 参数，压缩会泄露令牌（BREACH）
+        self.app.config['COMPRESS_HTML'] = True
+        response = self.client.get('/login?u=guess', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('登录'.encode('utf-8'), response.data)
+
+    def test_streamed_response_is_compressed_incrementally(self):
+        response = self.client.get('/_stream', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        body = gzip.decompress(response.data).decode()
+        self.assertEqual(body.splitlines()[-1], '99,row')
+
+    def test_small_and_disabled_responses_are_untouched(self):
+        response = self.client.get('/_small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.app.config['COMPRESS_ENABLED'] = False
+        response = self.client.get('/_stream', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
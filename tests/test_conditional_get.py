@@ -0,0 +1,84 @@
+import os
+import unittest
+
+from simple_notes import create_app
+from simple_notes.extensions import db
+from simple_notes.metrics import SQL_COUNT_HEADER
+from simple_notes.models import User
+from simple_notes.services.note_service import NoteService
+
+
+class ConditionalGetTestCase(unittest.TestCase):
+    """笔记列表与编辑页的 ETag / 304 测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['SQL_COUNT_HEADER'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        user = User(username='alice', email='alice@example.com')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+        self.service = NoteService()
+        _ok, _msg, self.entry = self.service.create_entry(self.user_id, '第一篇', '内容')
+        self.client = self.app.test_client()
+        self.client.post('/login', data={'username': 'alice', 'password': 'password123'})
+        # 消费登录后的闪现消息
+        self.client.get('/')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _get(self, url, etag=None):
+        db.session.expunge_all()
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def test_repeat_request_returns_304(self):
+        first = self._get('/')
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.headers['ETag'].startswith('W/'))
+        self.assertIn('no-cache', first.headers['Cache-Control'])
+        self.assertIn('Last-Modified', first.headers)
+
+        second = self._get('/', first.headers['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        self.assertNotIn('Content-Security-Policy', second.headers)
+        self.assertLess(int(second.headers[SQL_COUNT_HEADER]), int(first.headers[SQL_COUNT_HEADER]))
+
+        edit = self._get(f'/entry/{self.entry.id}/edit')
+        self.assertEqual(edit.status_code, 200)
+        self.assertNotEqual(edit.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(self._get(f'/entry/{self.entry.id}/edit', edit.headers['ETag']).status_code, 304)
+
+    def test_edit_changes_etag(self):
+        etag = self._get('/').headers['ETag']
+        entry = db.session.get(type(self.entry), self.entry.id)
+        # 字节数不变的修改也必须使 ETag 失效
+        ok, _msg = self.service.update_entry(entry, '第二篇', '内容')
+        self.assertTrue(ok)
+        response = self._get('/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertIn('第二篇', response.get_data(as_text=True))
+
+    def test_pending_flash_is_not_conditional(self):
+        etag = self._get('/').headers['ETag']
+        with self.client.session_transaction() as sess:
+            sess['_flashes'] = [('info', '提示')]
+        response = self._get('/', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('提示', response.get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import text
+
+from simple_notes import create_app
+from simple_notes.config import Config
+from simple_notes.engine import engine_options, pool_sizing, resolve_profile
+from simple_notes.extensions import db
+
+
+class EngineProfileTestCase(unittest.TestCase):
+    """数据库引擎配置档测试"""
+
+    def test_pool_sizing_respects_connection_budget(self):
+        self.assertEqual(pool_sizing(workers=2, threads=4, max_connections=100),
+                         {'pool_size': 4, 'max_overflow': 4})
+        self.assertEqual(pool_sizing(workers=8, threads=8, max_connections=40),
+                         {'pool_size': 5, 'max_overflow': 0})
+        self.assertEqual(pool_sizing(workers=0, threads=0, max_connections=0),
+                         {'pool_size': 1, 'max_overflow': 0})
+
+    def test_profile_must_match_database(self):
+        self.assertEqual(resolve_profile('sqlite:///x.db', None), 'dev')
+        with self.assertRaises(ValueError):
+            resolve_profile('sqlite:///x.db', 'prod-mysql')
+        with self.assertRaises(ValueError):
+            resolve_profile('mysql+pymysql://u:p@h/db', 'prod-sqlite')
+        with self.assertRaises(ValueError):
+            resolve_profile('sqlite:///x.db', 'fast')
+
+    def test_mysql_options(self):
+        options = engine_options('mysql+pymysql://u:p@h/db', 'prod-mysql')
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertLess(options['pool_recycle'], 28800)
+        self.assertIn('pool_size', options)
+        self.assertEqual(engine_options('sqlite:///x.db', 'dev'), {})
+
+    def test_prod_sqlite_pragmas_applied(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+        try:
+            with mock.patch.object(Config, 'DB_PROFILE', 'prod-sqlite'), \
+                    mock.patch.object(Config, 'SESSION_BACKEND', 'cookie'):
+                app = create_app()
+            self.assertEqual(app.config['DB_PROFILE'], 'prod-sqlite')
+            with app.app_context():
+                with db.engine.connect() as conn:
+                    self.assertEqual(conn.execute(text('PRAGMA journal_mode')).scalar(), 'wal')
+                    self.assertEqual(conn.execute(text('PRAGMA synchronous')).scalar(), 1)
+                    self.assertEqual(conn.execute(text('PRAGMA busy_timeout')).scalar(), 5000)
+                db.engine.dispose()
+        finally:
+            os.environ.pop('DATABASE_URL', None)
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import unittest
+from unittest import mock
+
+from werkzeug.security import generate_password_hash
+
+from simple_notes import create_app
+from simple_notes.extensions import db
+from simple_notes.hashing import HashPool, HashingBusy, needs_rehash, normalize_method
+from simple_notes.models import User
+from simple_notes.services.auth_service import AuthService
+
+FAST_METHOD = 'scrypt:1024:8:1'
+
+
+class HashPoolTestCase(unittest.TestCase):
+    def test_normalize_fills_werkzeug_defaults(self):
+        self.assertEqual(normalize_method('scrypt'), 'scrypt:32768:8:1')
+        self.assertEqual(normalize_method('pbkdf2:sha256:1000'), 'pbkdf2:sha256:1000')
+        with self.assertRaises(ValueError):
+            normalize_method('md5')
+
+    def test_process_pool_hashes_and_verifies(self):
+        pool = HashPool(workers=1, queue_size=2)
+        try:
+            pwhash = pool.run(generate_password_hash, 'secret', FAST_METHOD)
+            self.assertTrue(pwhash.startswith(FAST_METHOD + '$'))
+        finally:
+            pool.shutdown()
+
+    def test_full_queue_raises_busy(self):
+        pool = HashPool(workers=1, queue_size=1)
+        # 模拟名额已被一个在途任务占用
+        pool._slots.acquire()
+        with self.assertRaises(HashingBusy):
+            pool.run(len, 'x')
+        pool._slots.release()
+        self.assertEqual(pool.run(len, 'x'), 1)
+        pool.shutdown()
+
+
+class RehashOnLoginTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, PASSWORD_HASH_METHOD=FAST_METHOD)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        user = User(username='old', email='old@example.com',
+                    password_hash=generate_password_hash('password123', 'pbkdf2:sha256:1000'))
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def test_login_upgrades_outdated_hash(self):
+        user = db.session.get(User, self.user_id)
+        self.assertTrue(needs_rehash(user.password_hash))
+        ok, _msg, _user, _q = AuthService().validate_login('old', 'password123')
+        self.assertTrue(ok)
+        user = db.session.get(User, self.user_id)
+        self.assertTrue(user.password_hash.startswith(FAST_METHOD + '$'))
+        self.assertFalse(needs_rehash(user.password_hash))
+        ok, _msg, _user, _q = AuthService().validate_login('old', 'password123')
+        self.assertTrue(ok)
+
+    def test_failed_login_keeps_hash(self):
+        before = db.session.get(User, self.user_id).password_hash
+        ok, _msg, _user, _q = AuthService().validate_login('old', 'wrong-password')
+        self.assertFalse(ok)
+        self.assertEqual(db.session.get(User, self.user_id).password_hash, before)
+
+    def test_busy_pool_returns_503(self):
+        client = self.app.test_client()
+        with mock.patch('simple_notes.services.auth_service.verify_password', side_effect=HashingBusy()):
+            response = client.post('/login', data={'username': 'old', 'password': 'password123'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers.get('Retry-After'), '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.icons import SUBSET_CSS, SUBSET_FONT, point_font_face, trim_icon_rules, used_icons
+from simple_notes.stylesheets import init_stylesheets
+
+HAS_FONTTOOLS = importlib.util.find_spec('fontTools') is not None and importlib.util.find_spec('brotli') is not None
+
+
+class IconSubsetTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        register_commands(self.app)
+        # 在静态目录的副本上构建，不改动源码树
+        self.static = os.path.join(tempfile.mkdtemp(prefix='static-'), 'static')
+        shutil.copytree(self.app.static_folder, self.static)
+        self.app.static_folder = self.static
+
+    def tearDown(self):
+        os.environ.pop('DATABASE_URL', None)
+        shutil.rmtree(os.path.dirname(self.static), ignore_errors=True)
+
+    def test_css_keeps_only_used_icons(self):
+        names = used_icons(self.app)
+        # 包括只在脚本中切换的图标
+        self.assertTrue({'eye', 'eye-slash', 'chevron-double-right'} <= names)
+        css = ('@font-face {\n  src: url("./fonts/a.woff2?1") format("woff2"),\nurl("./fonts/a.woff?1") format("woff");\n}\n'
+               '.bi-eye::before { content: "\\f341"; }\n.bi-alarm::before { content: "\\f102"; }\n')
+        trimmed, codepoints, missing = trim_icon_rules(css, {'eye', 'no-such-icon'})
+        self.assertEqual(codepoints, {'eye': 0xf341})
+        self.assertEqual(missing, ['no-such-icon'])
+        self.assertNotIn('alarm', trimmed)
+        self.assertIn('src: url("./fonts/s.woff2") format("woff2");', point_font_face(trimmed, './fonts/s.woff2'))
+
+    @unittest.skipUnless(HAS_FONTTOOLS, 'fonttools/brotli 未安装')
+    def test_build_icons_subsets_font(self):
+        from fontTools.ttLib import TTFont
+
+        result = self.app.test_cli_runner().invoke(args=['build-icons'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        font_path = os.path.join(self.static, SUBSET_FONT)
+        self.assertLess(os.path.getsize(font_path), 10 * 1024)
+        self.assertIn(0xf341, TTFont(font_path).getBestCmap())  # bi-eye
+
+        init_stylesheets(self.app)
+        html = self.app.test_client().get('/login').get_data(as_text=True)
+        self.assertIn(SUBSET_CSS, html)
+
+
+if __name__ == '__main__':
+    unittest.main()
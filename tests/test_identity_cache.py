@@ -0,0 +1,97 @@
+import os
+import unittest
+
+from simple_notes import create_app
+from simple_notes.extensions import db
+from simple_notes.metrics import SQL_COUNT_HEADER
+from simple_notes.models import User
+from simple_notes.services.admin_service import AdminService
+from simple_notes.services.identity_service import UserIdentity, get_identity_cache, load_identity
+
+
+class IdentityCacheTestCase(unittest.TestCase):
+    """登录用户身份缓存测试
+
+    不在 setUp 中常驻应用上下文：Flask-Login 把当前用户存放在 g 上，
+    共享上下文会让后续请求跳过 user_loader。
+    """
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['SQL_COUNT_HEADER'] = True
+        with self.app.app_context():
+            user = User(username='cached', email='cached@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _login(self):
+        self.client.post('/login', data={'username': 'cached', 'password': 'password123'})
+
+    def _statements(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return int(response.headers[SQL_COUNT_HEADER])
+
+    def _cached_ids(self):
+        with self.app.app_context():
+            return set(get_identity_cache()._data)
+
+    def test_identity_is_immutable(self):
+        with self.app.app_context():
+            identity = load_identity(self.user_id)
+            self.assertIsInstance(identity, UserIdentity)
+            self.assertFalse(hasattr(identity, '__dict__'))
+            with self.assertRaises(AttributeError):
+                identity.username = 'other'
+            self.assertEqual(identity.get_id(), str(self.user_id))
+            self.assertIsNone(load_identity(self.user_id + 100))
+
+    def test_cache_saves_one_query_per_request(self):
+        self._login()
+        self._statements('/')
+        cached = self._statements('/')
+        self.app.config['USER_CACHE_ENABLED'] = False
+        uncached = self._statements('/')
+        self.assertEqual(uncached - cached, 1)
+
+    def test_invalidation(self):
+        with self.app.app_context():
+            cache = get_identity_cache()
+            user = db.session.get(User, self.user_id)
+            load_identity(self.user_id)
+            AdminService().lock_user(user)
+            self.assertIsNone(cache.get(self.user_id))
+
+            load_identity(self.user_id)
+            AdminService().add_admin_user('cached')
+            self.assertEqual(len(cache), 0)
+
+    def test_settings_password_change_with_cached_identity(self):
+        self._login()
+        self.assertEqual(self.client.get('/settings').status_code, 200)
+        self.assertIn(self.user_id, self._cached_ids())
+        response = self.client.post('/settings', data={
+            'form': 'password',
+            'old_password': 'password123',
+            'new_password': 'newpassword456',
+            'confirm_new': 'newpassword456',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(self.user_id, self._cached_ids())
+        with self.app.app_context():
+            self.assertTrue(db.session.get(User, self.user_id).check_password('newpassword456'))
+
+
+if __name__ == '__main__':
+    unittest.main()
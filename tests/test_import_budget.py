@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 包本身（simple_notes/__init__.py）的导入耗时上限，单位毫秒；可用环境变量放宽
+PACKAGE_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', '50'))
+# 一次完整的 `simple-notes --help`（含解释器启动）的耗时上限，单位毫秒
+CLI_HELP_BUDGET_MS = float(os.getenv('CLI_HELP_BUDGET_MS', '1500'))
+
+# CLI 与维护脚本导入时不应加载的模块（由 create_app 或具体命令按需导入）
+HEAVY = ('flask_limiter', 'flask_wtf', 'wtforms', 'limits')
+APP_ONLY = ('simple_notes.services', 'simple_notes.repositories', 'simple_notes.blueprints', 'simple_notes.forms')
+
+
+def import_times(statement, *args):
+    """在新的解释器中执行 statement，解析 -X importtime 输出为 {模块名: (自身微秒, 累计微秒)}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement, *args],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+class ImportBudgetTestCase(unittest.TestCase):
+    def assertNotLoaded(self, times, prefixes):
+        loaded = sorted(name for name in times if name.split('.')[0] in prefixes or name.startswith(prefixes))
+        self.assertEqual(loaded, [])
+
+    def test_cli_import_is_lazy(self):
+        times = import_times('import simple_notes.cli')
+        self.assertNotLoaded(times, HEAVY + APP_ONLY + ('simple_notes.extensions', 'dotenv'))
+        self.assertLess(times['simple_notes'][1] / 1000, PACKAGE_BUDGET_MS)
+
+    def test_cli_help_does_not_create_app(self):
+        # 与 console_scripts 入口 simple-notes=simple_notes.cli:main 等价的调用
+        statement = 'import sys; sys.argv[0] = "simple-notes"; from simple_notes.cli import main; main()'
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', statement, '--help'],
+                                cwd=ROOT, capture_output=True, text=True, check=True)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for name in ('init-db', 'bootstrap', 'rehash-credentials', 'sweep-sessions'):
+            self.assertIn(name, result.stdout)
+        self.assertLess(elapsed_ms, CLI_HELP_BUDGET_MS)
+
+        # Flask-Limiter 以 flask.commands 插件提供 limiter 命令，FlaskGroup 列出命令时会导入它；
+        # 其余 Web 栈与应用模块都不应加载，即没有调用 create_app
+        times = import_times(statement, '--help')
+        self.assertNotLoaded(times, ('flask_wtf', 'wtforms') + APP_ONLY + ('simple_notes.extensions', 'simple_notes.config'))
+
+    def test_models_import_skips_web_extensions(self):
+        times = import_times('import simple_notes.models')
+        self.assertNotLoaded(times, HEAVY + APP_ONLY)
+
+    def test_create_app_still_loads_everything(self):
+        statement = ("import os; os.environ['DATABASE_URL'] = 'sqlite:///:memory:'\n"
+                     "from simple_notes import create_app; create_app()")
+        times = import_times(statement)
+        for name in ('flask_limiter', 'flask_wtf', 'simple_notes.blueprints.main', 'simple_notes.services.auth_service'):
+            self.assertIn(name, times)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import unittest
+from unittest import mock
+
+from sqlalchemy import event, inspect
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.extensions import db
+from simple_notes.models import User, NoteEntry
+from simple_notes.services.note_service import NoteService, EXCERPT_LENGTH
+
+
+class NoteSummaryTestCase(unittest.TestCase):
+    """延迟加载正文与摘要字段测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        register_commands(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.user = User(username='summary', email='summary@example.com')
+        self.user.set_password('password123')
+        db.session.add(self.user)
+        db.session.commit()
+        self.service = NoteService()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def test_summary_computed_on_write(self):
+        ok, _msg, entry = self.service.create_entry(self.user.id, 't', '今天  天气\n很好 hello world')
+        self.assertTrue(ok)
+        self.assertEqual(entry.excerpt, '今天 天气 很好 hello world')
+        self.assertEqual((entry.word_count, entry.char_count), (5, 21))
+
+        self.service.update_entry(entry, 't', 'a' * 500)
+        self.assertEqual(len(entry.excerpt), EXCERPT_LENGTH + 1)
+        self.assertTrue(entry.excerpt.endswith('…'))
+        self.assertEqual(entry.char_count, 500)
+
+    def test_list_queries_do_not_load_content(self):
+        user_id = self.user.id
+        self.service.create_entry(user_id, 't', 'body text')
+        db.session.expunge_all()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            page = self.service.repo.list_of_user_keyset(user_id)
+            self.assertEqual(page.items[0].excerpt, 'body text')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn('note_entries.content', statements[0])
+        self.assertEqual(self.service.get_entry_by_id(page.items[0].id, user_id).content, 'body text')
+
+    def test_backfill_command_adds_columns_and_fills_rows(self):
+        with db.engine.begin() as conn:
+            for column in ('excerpt', 'word_count', 'char_count'):
+                conn.exec_driver_sql(f'ALTER TABLE note_entries DROP COLUMN {column}')
+            for i in range(5):
+                conn.exec_driver_sql(
+                    'INSERT INTO note_entries (user_id, title, content, created_at, updated_at) '
+                    "VALUES (?, ?, ?, datetime('now'), datetime('now'))",
+                    (self.user.id, f't{i}', f'content {i}'),
+                )
+        result = self.app.test_cli_runner().invoke(args=['backfill-excerpts', '--batch-size', '2'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('5/5', result.output)
+        columns = {c['name'] for c in inspect(db.engine).get_columns('note_entries')}
+        self.assertTrue({'excerpt', 'word_count', 'char_count'} <= columns)
+        entries = NoteEntry.query.order_by(NoteEntry.id).all()
+        self.assertEqual([e.excerpt for e in entries], [f'content {i}' for i in range(5)])
+        self.assertEqual({e.word_count for e in entries}, {2})
+        self.assertEqual(self.service.repo.count_missing_summaries(), 0)
+
+    def test_backfill_commits_each_batch(self):
+        for i in range(5):
+            self.service.create_entry(self.user.id, f't{i}', f'content {i}')
+        NoteEntry.query.update({NoteEntry.excerpt: None})
+        db.session.commit()
+        with mock.patch.object(self.service.repo, 'commit', wraps=self.service.repo.commit) as commit:
+            self.assertEqual(self.service.backfill_summaries(batch_size=2), 5)
+        # 三批各提交一次，最后递增版本号再提交一次
+        self.assertEqual(commit.call_count, 4)
+        self.assertEqual(self.service.repo.count_missing_summaries(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from simple_notes import create_app
+from simple_notes.extensions import db
+from simple_notes.models import User, NoteEntry
+from simple_notes.repositories.note_repo import NoteRepository
+from simple_notes.repositories.pagination import encode_cursor, decode_cursor
+
+
+class KeysetPaginationTestCase(unittest.TestCase):
+    """游标分页测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.user = User(username='pager', email='pager@example.com')
+        self.user.set_password('password123')
+        db.session.add(self.user)
+        db.session.commit()
+        # 25 条笔记，其中部分共享同一 created_at 以验证 id 决胜
+        base = datetime(2024, 1, 1, 12, 0, 0)
+        for i in range(25):
+            db.session.add(NoteEntry(
+                user_id=self.user.id,
+                title=f'note {i}',
+                content='x',
+                created_at=base + timedelta(minutes=i // 2),
+                updated_at=base,
+            ))
+        db.session.commit()
+        self.repo = NoteRepository()
+        self.expected = [e.id for e in NoteEntry.query.order_by(
+            NoteEntry.created_at.desc(), NoteEntry.id.desc()).all()]
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def test_cursor_round_trip(self):
+        ts = datetime(2024, 5, 6, 7, 8, 9, 123456)
+        self.assertEqual(decode_cursor(encode_cursor(ts, 42)), (ts, 42))
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+
+    def test_walk_forward_and_back(self):
+        pages = []
+        page = self.repo.list_of_user_keyset(self.user.id, per_page=10)
+        self.assertFalse(page.has_prev)
+        pages.append([e.id for e in page.items])
+        while page.has_next:
+            page = self.repo.list_of_user_keyset(self.user.id, after=page.next_cursor, per_page=10)
+            pages.append([e.id for e in page.items])
+        self.assertEqual([i for p in pages for i in p], self.expected)
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+
+        back = self.repo.list_of_user_keyset(self.user.id, before=page.prev_cursor, per_page=10)
+        self.assertEqual([e.id for e in back.items], pages[1])
+        back = self.repo.list_of_user_keyset(self.user.id, before=back.prev_cursor, per_page=10)
+        self.assertEqual([e.id for e in back.items], pages[0])
+        self.assertFalse(back.has_prev)
+        self.assertTrue(back.has_next)
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = self.repo.list_of_user_keyset(self.user.id, after='garbage', per_page=10)
+        self.assertEqual([e.id for e in page.items], self.expected[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()
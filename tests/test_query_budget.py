@@ -0,0 +1,85 @@
+import os
+import unittest
+
+from simple_notes import create_app
+from simple_notes.extensions import db
+from simple_notes.metrics import SQL_COUNT_HEADER
+from simple_notes.models import User, SecurityProfile
+from simple_notes.services.note_service import NoteService
+
+
+class QueryBudgetTestCase(unittest.TestCase):
+    """各端点的 SQL 语句预算测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['SQL_COUNT_HEADER'] = True
+        self.app.config['ADMIN_USERS'] = {'admin'}
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _add_users(self, count):
+        for i in range(count):
+            user = User(username=f'user{i}', email=f'user{i}@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.add(SecurityProfile(user=user, failed_count=i % 4, question='q', answer_hash='x'))
+        db.session.commit()
+
+    def _get(self, url):
+        # 测试推入的应用上下文让各请求共享同一会话，先清空标识映射以免命中已加载的对象
+        db.session.expunge_all()
+        return self.client.get(url)
+
+    def _statements(self, response):
+        self.assertIn(response.status_code, (200, 302))
+        return int(response.headers[SQL_COUNT_HEADER])
+
+    def _login(self, username, password):
+        self.client.post('/login', data={'username': username, 'password': password})
+
+    def test_admin_user_list_is_constant(self):
+        self._add_users(3)
+        self._login('admin', 'ChangeMe123!')
+        small = self._statements(self._get('/admin/api/users'))
+        for i in range(3, 15):
+            user = User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.add(SecurityProfile(user=user, failed_count=3, question='q', answer_hash='x'))
+        db.session.commit()
+        response = self._get('/admin/api/users')
+        self.assertEqual(len(response.json['items']), 16)
+        self.assertEqual(self._statements(response), small)
+        self.assertLessEqual(small, 6)
+
+    def test_admin_contact_email_is_cached(self):
+        first = self._statements(self._get('/login?protect=1'))
+        self.assertEqual(first, 1)
+        response = self._get('/login?protect=1')
+        self.assertEqual(self._statements(response), 0)
+        self.assertIn(b'admin@local', response.data)
+
+    def test_index_budget(self):
+        self._add_users(1)
+        user = User.query.filter_by(username='user0').first()
+        for i in range(5):
+            NoteService().create_entry(user.id, f't{i}', 'body')
+        self._login('user0', 'password123')
+        first = self._statements(self._get('/'))
+        # 侧边栏缓存命中后只剩加载用户、游标分页与统计总数
+        self.assertLessEqual(self._statements(self._get('/')), first - 1)
+        self.assertLessEqual(self._statements(self._get('/')), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import unittest
+
+from simple_notes import create_app
+from simple_notes.extensions import db
+from simple_notes.scripts import check_query_plans, migrate_indexes
+
+
+class QueryPlanTestCase(unittest.TestCase):
+    """仓库查询执行计划与索引迁移测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _drop_index(self, name):
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+
+    def test_repository_queries_use_indexes(self):
+        self.assertEqual(check_query_plans.check(), [])
+
+    def test_missing_index_is_reported(self):
+        self._drop_index('ix_note_entries_user_created')
+        failed = {name for name, _sql, _problems in check_query_plans.check()}
+        self.assertIn('NoteRepository.list_of_user_keyset', failed)
+        self.assertIn('NoteRepository.recent_entries', failed)
+
+    def test_search_and_shard_queries_are_checked(self):
+        self._drop_index('ix_note_postings_note')
+        failed = {name for name, _sql, _problems in check_query_plans.check()}
+        self.assertEqual(failed, {'NgramIndexBackend.entry_postings'})
+        names = {name for name, _call, _allow in check_query_plans.repository_queries()}
+        self.assertTrue({'SettingsRegistry.load', 'NoteShardRepository.fetch_user_batch',
+                         'UserStatsRepository.total_note_count', 'LikeBackend.search'} <= names)
+
+    def test_migration_recreates_missing_indexes(self):
+        self._drop_index('ix_note_entries_user_created')
+        self._drop_index('ix_users_created_at')
+        _dialect, stats = migrate_indexes.scan()
+        self.assertEqual(stats['note_entries']['missing'], ['ix_note_entries_user_created'])
+        self.assertEqual(stats['users']['missing'], ['ix_users_created_at'])
+        migrate_indexes.apply_migration()
+        _dialect, stats = migrate_indexes.scan()
+        self.assertEqual(stats['note_entries']['missing'], [])
+        self.assertEqual(stats['users']['missing'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
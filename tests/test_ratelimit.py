@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from simple_notes import create_app
+from simple_notes.config import Config
+from simple_notes.ratelimit import SQLiteStorage
+
+
+def _hit_many(args):
+    path, hits = args
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(f'sqlite:///{path}'))
+    item = parse('5 per minute')
+    return sum(limiter.hit(item, '127.0.0.1') for _ in range(hits))
+
+
+class SQLiteStorageTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='-ratelimit.db')
+        os.close(fd)
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_registered_scheme_and_counters(self):
+        storage = storage_from_string(f'sqlite:///{self.path}')
+        self.assertIsInstance(storage, SQLiteStorage)
+        self.assertEqual(storage.incr('k', 60), 1)
+        self.assertEqual(storage.incr('k', 60, amount=2), 3)
+        self.assertEqual(storage.get('k'), 3)
+        # 已过期的计数重新从 amount 开始
+        self.assertEqual(storage.incr('short', -1), 1)
+        self.assertEqual(storage.get('short'), 0)
+        self.assertEqual(storage.incr('short', 60), 1)
+        storage.clear('k')
+        self.assertEqual(storage.get('k'), 0)
+
+    def test_limit_is_shared_across_processes(self):
+        with multiprocessing.get_context('spawn').Pool(2) as pool:
+            allowed = pool.map(_hit_many, [(self.path, 10)] * 2)
+        self.assertEqual(sum(allowed), 5)
+
+    def test_login_limit_survives_restart(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        try:
+            with mock.patch.object(Config, 'RATELIMIT_STORAGE_URI', f'sqlite:///{self.path}'), \
+                    mock.patch.object(Config, 'LOGIN_RATE_LIMIT', '2 per minute'):
+                codes = [create_app().test_client().get('/login').status_code for _ in range(2)]
+                # 新的应用实例（相当于重启后的 worker）读取同一份计数
+                codes.append(create_app().test_client().get('/login').status_code)
+        finally:
+            os.environ.pop('DATABASE_URL', None)
+        self.assertEqual(codes, [200, 200, 429])
+
+
+if __name__ == '__main__':
+    unittest.main()
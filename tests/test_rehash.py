@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import inspect
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.extensions import db
+from simple_notes.hashing import needs_rehash
+from simple_notes.models import SecurityProfile, User
+from simple_notes.services.auth_service import AuthService
+
+FAST_METHOD = 'scrypt:1024:8:1'
+OLD_METHOD = 'pbkdf2:sha256:1000'
+
+
+class RehashCredentialsTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config.update(TESTING=True, PASSWORD_HASH_METHOD=FAST_METHOD)
+        register_commands(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        for name, method in (('old', OLD_METHOD), ('new', FAST_METHOD)):
+            user = User(username=name, email=f'{name}@example.com',
+                        password_hash=generate_password_hash('password123', method))
+            user.security_profile = SecurityProfile(
+                question='q', answer_hash=generate_password_hash('answer', method), failed_count=0
+            )
+            db.session.add(user)
+        db.session.add(User(username='noprofile', email='np@example.com',
+                            password_hash=generate_password_hash('password123', FAST_METHOD)))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _user(self, name):
+        db.session.expire_all()
+        return User.query.filter_by(username=name).one()
+
+    def test_reports_distribution_and_marks_only_stale_hashes(self):
+        result = self.app.test_cli_runner().invoke(args=['rehash-credentials', '--batch-size', '1'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn(f'  {OLD_METHOD}: 1', result.output)
+        self.assertIn(f'  {FAST_METHOD}: 2', result.output)
+        # 启动时创建的管理员使用默认参数，同样过期
+        self.assertIn('已标记 2 个口令哈希、1 个答案哈希', result.output)
+        old, new = self._user('old'), self._user('new')
+        self.assertTrue(old.password_rehash and old.security_profile.answer_rehash)
+        self.assertFalse(new.password_rehash or new.security_profile.answer_rehash)
+
+        # 标记后即使参数一致，下次登录成功也会重算并清除标记
+        new.password_rehash = True
+        db.session.commit()
+        self.assertTrue(needs_rehash(new.password_hash, new.password_rehash))
+        before = new.password_hash
+        ok, _msg, _user, _q = AuthService().validate_login('new', 'password123')
+        self.assertTrue(ok)
+        new = self._user('new')
+        self.assertNotEqual(new.password_hash, before)
+        self.assertFalse(new.password_rehash)
+
+    def test_dry_run_marks_nothing(self):
+        result = self.app.test_cli_runner().invoke(args=['rehash-credentials', '--dry-run', '--force'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertNotIn('已标记', result.output)
+        self.assertIsNone(self._user('old').password_rehash)
+
+    def test_dry_run_leaves_schema_alone(self):
+        db.session.remove()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('ALTER TABLE users DROP COLUMN password_rehash')
+        result = self.app.test_cli_runner().invoke(args=['rehash-credentials', '--dry-run'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('缺少列 users.password_rehash', result.output)
+        self.assertIn(f'  {OLD_METHOD}: 1', result.output)
+        self.assertNotIn('password_rehash', {c['name'] for c in inspect(db.engine).get_columns('users')})
+
+    def test_answers_file_rehashes_in_worker_processes(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('old, imported \nnew,second\nnoprofile,x\nghost,y\n')
+        try:
+            result = self.app.test_cli_runner().invoke(
+                args=['rehash-credentials', '--answers', path, '--processes', '2']
+            )
+        finally:
+            os.remove(path)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('共 2 个，跳过 2 个', result.output)
+        for name, answer in (('old', 'imported'), ('new', 'second')):
+            profile = self._user(name).security_profile
+            self.assertTrue(profile.answer_hash.startswith(FAST_METHOD + '$'))
+            self.assertTrue(check_password_hash(profile.answer_hash, answer))
+            self.assertFalse(profile.answer_rehash)
+        # 口令哈希仍按参数标记（old 与启动时创建的管理员）
+        self.assertIn('已标记 2 个口令哈希、0 个答案哈希', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from simple_notes import create_app
+from simple_notes.config import Config
+from simple_notes.extensions import db
+from simple_notes.models import User, NoteEntry
+from simple_notes.routing import replica_engines
+from simple_notes.scripts.sync_sqlite_replica import sync_replica
+from simple_notes.services.note_service import NoteService
+
+
+class ReplicaRoutingTestCase(unittest.TestCase):
+    """读写分离测试：两个 SQLite 文件分别充当主库与只读副本"""
+
+    def setUp(self):
+        self.paths = []
+        for name in ('primary', 'replica'):
+            fd, path = tempfile.mkstemp(suffix=f'-{name}.db')
+            os.close(fd)
+            self.paths.append(path)
+        self.primary, self.replica = self.paths
+        os.environ['DATABASE_URL'] = f'sqlite:///{self.primary}'
+        with mock.patch.object(Config, 'DATABASE_REPLICA_URLS', [f'sqlite:///{self.replica}']), \
+                mock.patch.object(Config, 'SESSION_BACKEND', 'cookie'):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        with self.app.app_context():
+            user = User(username='reader', email='reader@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            NoteService().create_entry(self.user_id, '已同步', 'replicated')
+        self._sync()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            for engine in [db.engine, *replica_engines(self.app)]:
+                engine.dispose()
+        os.environ.pop('DATABASE_URL', None)
+        for path in self.paths:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def _sync(self):
+        with self.app.app_context():
+            for engine in [db.engine, *replica_engines(self.app)]:
+                engine.dispose()
+        sync_replica(self.primary, self.replica)
+
+    def _titles(self):
+        with self.app.app_context():
+            page = NoteService().repo.list_of_user_keyset(self.user_id)
+            return [e.title for e in page.items]
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(len(replica_engines(self.app)), 1)
+        with self.app.app_context():
+            ok, _msg, _entry = NoteService().create_entry(self.user_id, '未同步', 'primary only')
+            self.assertTrue(ok)
+            # 未标记为只读的查询走主库
+            self.assertEqual(NoteEntry.query.filter_by(user_id=self.user_id).count(), 2)
+        self.assertEqual(self._titles(), ['已同步'])
+        self._sync()
+        self.assertEqual(self._titles(), ['未同步', '已同步'])
+
+    def test_user_reads_own_writes_within_window(self):
+        self.client.post('/login', data={'username': 'reader', 'password': 'password123'})
+        self.client.post('/entry/new', data={'title': '刚写的', 'content': 'fresh'})
+        self.assertIn('刚写的'.encode('utf-8'), self.client.get('/').data)
+
+        # 窗口过后读取回到副本，副本尚未同步则看不到新笔记
+        self.app.config['REPLICA_STICKY_SECONDS'] = 0
+        self.client.post('/entry/new', data={'title': '窗口外', 'content': 'stale'})
+        page = self.client.get('/').data
+        self.assertNotIn('窗口外'.encode('utf-8'), page)
+        self._sync()
+        self.assertIn('窗口外'.encode('utf-8'), self.client.get('/').data)
+
+
+if __name__ == '__main__':
+    unittest.main()
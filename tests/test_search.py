@@ -0,0 +1,235 @@
+import os
+import unittest
+
+from sqlalchemy import event
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.extensions import db
+from simple_notes.models import User, NoteEntry, NotePosting
+from simple_notes.repositories.search_repo import (
+    get_search_backend, LikeBackend, SearchBackend, SqliteFtsBackend, NgramIndexBackend, note_grams
+)
+from simple_notes.repositories.pagination import ResultPage
+from simple_notes.services.note_service import NoteService
+
+
+class FullTextSearchTestCase(unittest.TestCase):
+    """全文检索后端测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SEARCH_CHECK_INTERVAL'] = 0
+        register_commands(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.user = User(username='searcher', email='searcher@example.com')
+        self.user.set_password('password123')
+        db.session.add(self.user)
+        db.session.commit()
+        self.service = NoteService()
+        self.service.create_entry(self.user.id, '周末计划', '去公园散步，顺便看看天气预报')
+        self.service.create_entry(self.user.id, '天气预报笔记', '明天多云转晴')
+        self.service.create_entry(self.user.id, 'Groceries', 'milk, eggs, bread')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _reindex(self):
+        result = self.app.test_cli_runner().invoke(args=['reindex', '--batch-size', '2'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def _titles(self, keyword):
+        return [e.title for e in self.service.search_entries(self.user.id, keyword).items]
+
+    def test_falls_back_to_ilike_before_index_exists(self):
+        self.assertFalse(get_search_backend().supports('天气预报'))
+        result = self.service.search_entries(self.user.id, '天气预报')
+        self.assertNotIsInstance(result, ResultPage)
+        self.assertEqual(result.total, 2)
+
+    def test_reindex_and_ranked_search(self):
+        output = self._reindex()
+        self.assertIn('3/3', output)
+        backend = get_search_backend()
+        self.assertIsInstance(backend, SqliteFtsBackend)
+        result = self.service.search_entries(self.user.id, '天气预报')
+        self.assertIsInstance(result, ResultPage)
+        self.assertEqual(result.total, 2)
+        # 标题命中排在正文命中之前
+        self.assertEqual([e.title for e in result.items], ['天气预报笔记', '周末计划'])
+        self.assertEqual(self._titles('MILK'), ['Groceries'])
+
+    def test_index_follows_writes(self):
+        self._reindex()
+        ok, _msg, entry = self.service.create_entry(self.user.id, '读书', '三体第二部')
+        self.assertTrue(ok)
+        self.assertEqual(self._titles('三体第'), ['读书'])
+        self.service.update_entry(entry, '读书', '球状闪电')
+        self.assertEqual(self._titles('三体第'), [])
+        self.assertEqual(self._titles('球状闪'), ['读书'])
+        self.service.delete_entry(entry)
+        self.assertEqual(self._titles('球状闪'), [])
+
+    def test_rebuild_keeps_old_index_until_swap(self):
+        self._reindex()
+        backend = get_search_backend()
+        backend.create_index()
+        db.session.commit()
+        # 重建期间检索仍使用原索引，其他进程的写入也进入原索引
+        self.assertEqual(self._titles('天气预报'), ['天气预报笔记', '周末计划'])
+        ok, _msg, entry = self.service.create_entry(self.user.id, '读书', '三体第二部')
+        self.assertTrue(ok)
+        self.assertEqual(self._titles('三体第'), ['读书'])
+        # 已写入待构建表的笔记再次写入时覆盖
+        backend.index_batch([entry])
+        backend.index_batch([entry])
+        db.session.commit()
+        self.assertEqual(backend.rebuild(batch_size=2), 4)
+        self.assertEqual(self._titles('三体第'), ['读书'])
+
+    def test_unavailable_result_is_cached(self):
+        ticks = [0.0]
+        backend = SqliteFtsBackend(check_interval=5, timer=lambda: ticks[0])
+        self.assertFalse(backend.is_available())
+        db.session.execute(db.text("CREATE VIRTUAL TABLE note_entries_fts USING fts5(title)"))
+        self.assertFalse(backend.is_available())
+        ticks[0] = 5.0
+        self.assertTrue(backend.is_available())
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class NoSearch(SearchBackend):
+            def _probe(self):
+                return True
+
+            def create_index(self):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoSearch()
+
+    def test_like_backend(self):
+        self.app.config['SEARCH_BACKEND'] = 'like'
+        self.app.extensions.pop('search_backend')
+        backend = get_search_backend()
+        self.assertIsInstance(backend, LikeBackend)
+        self.assertFalse(backend.supports('天气预报'))
+        self.assertEqual(backend.search(self.user.id, '天气预报').total, 2)
+        self.assertIn('ILIKE', self._reindex())
+
+    def test_short_keyword_uses_ilike(self):
+        self._reindex()
+        self.assertFalse(get_search_backend().supports('天气'))
+        self.assertEqual(sorted(self._titles('天气')), ['周末计划', '天气预报笔记'])
+
+
+class NgramSearchTestCase(unittest.TestCase):
+    """二元组倒排索引测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SEARCH_BACKEND'] = 'ngram'
+        self.app.config['SEARCH_CHECK_INTERVAL'] = 0
+        register_commands(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.user = User(username='ngram', email='ngram@example.com')
+        self.user.set_password('password123')
+        self.other = User(username='other', email='other@example.com')
+        self.other.set_password('password123')
+        db.session.add_all([self.user, self.other])
+        db.session.commit()
+        self.service = NoteService()
+        self.service.create_entry(self.user.id, '周末计划', '去公园散步，顺便看看天气预报')
+        self.service.create_entry(self.user.id, '天气预报笔记', '明天多云转晴')
+        self.service.create_entry(self.user.id, 'Groceries', 'Milk, eggs, bread')
+        self.service.create_entry(self.other.id, '别人的天气', '天气预报')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _reindex(self):
+        result = self.app.test_cli_runner().invoke(args=['reindex'])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+    def _ids(self, keyword):
+        return [e.id for e in self.service.search_entries(self.user.id, keyword).items]
+
+    def test_results_match_ilike(self):
+        keywords = ['天气预报', '天气', '预报笔', 'milk', 'EGGS', '多云转晴', '不存在的词']
+        expected = {k: [e.id for e in self.service.repo.search_user_entries(self.user.id, k).items] for k in keywords}
+        self.assertFalse(get_search_backend().supports('天气'))
+        self._reindex()
+        backend = get_search_backend()
+        self.assertIsInstance(backend, NgramIndexBackend)
+        self.assertTrue(backend.supports('天气'))
+        for keyword in keywords:
+            self.assertEqual(self._ids(keyword), expected[keyword], keyword)
+
+    def test_rebuild_tolerates_concurrent_writers(self):
+        self._reindex()
+        ok, _msg, entry = self.service.create_entry(self.user.id, '读书', '三体第二部')
+        self.assertTrue(ok)
+        entry_id = entry.id
+        # 另一个工作进程仍缓存着"可用"，在撤销标记后的等待期内继续写入倒排表
+        worker = NgramIndexBackend(check_interval=60)
+        self.assertTrue(worker.is_available())
+        backend = get_search_backend()
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            if len(waits) == 1:
+                worker.index_entry(db.session.get(NoteEntry, entry_id))
+                db.session.commit()
+
+        backend._sleep = sleep
+        self.assertEqual(backend.rebuild(batch_size=2), 5)
+        self.assertEqual(len(waits), 2)
+        self.assertEqual(NotePosting.query.filter_by(note_id=entry_id).count(),
+                         len(note_grams('读书') | note_grams('三体第二部')))
+        entry = db.session.get(NoteEntry, entry_id)
+        backend.index_batch([entry])
+        backend.index_batch([entry])
+        db.session.commit()
+        self.assertEqual(self._ids('三体第'), [entry_id])
+
+    def test_update_writes_only_changed_grams(self):
+        self._reindex()
+        ok, _msg, entry = self.service.create_entry(self.user.id, '读书', '三体第二部')
+        self.assertTrue(ok)
+        written = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if 'note_postings' in statement and statement.startswith(('INSERT', 'DELETE')):
+                written.append(len(parameters) if executemany else 1)
+
+        event.listen(db.engine, 'before_cursor_execute', _count)
+        try:
+            self.service.update_entry(entry, '读书', '三体第三部')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _count)
+        # '第二'、'二部' 被删除，'第三'、'三部' 被插入
+        self.assertEqual(sum(written), 1 + 2)
+        grams = {p.gram for p in NotePosting.query.filter_by(note_id=entry.id)}
+        self.assertEqual(grams, note_grams('读书') | note_grams('三体第三部'))
+        self.assertEqual(self._ids('第三部'), [entry.id])
+        self.assertEqual(self._ids('第二部'), [])
+
+        self.service.delete_entry(entry)
+        self.assertEqual(NotePosting.query.filter_by(note_id=entry.id).count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from simple_notes import create_app
+from simple_notes.config import Config
+from simple_notes.extensions import db
+from simple_notes.models import User
+
+
+class ServerSessionTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='-sessions.db')
+        os.close(fd)
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.patch = mock.patch.object(Config, 'SESSION_STORE_PATH', self.path)
+        self.patch.start()
+        self.app = self._make_app()
+        with self.app.app_context():
+            user = User(username='alice', email='alice@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+
+    def tearDown(self):
+        self.patch.stop()
+        os.environ.pop('DATABASE_URL', None)
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def _make_app(self):
+        app = create_app()
+        app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False)
+        return app
+
+    def _cookie(self, client):
+        cookie = client.get_cookie('session')
+        return cookie.value if cookie else None
+
+    def test_cookie_stays_small_while_counters_live_on_the_server(self):
+        client = self.app.test_client()
+        sizes = set()
+        for name in ('ghost1', 'ghost2', 'a-rather-long-username-that-would-bloat-cookies'):
+            for _ in range(2):
+                client.post('/login/aux-verify', data={'username': name, 'answer': 'x'})
+                sizes.add(len(self._cookie(client)))
+        self.assertEqual(len(sizes), 1)
+        self.assertLess(sizes.pop(), 80)
+        with client.session_transaction() as session:
+            self.assertEqual(session['aux_attempts:ghost2'], 2)
+
+    def test_other_worker_sees_latest_version(self):
+        client = self.app.test_client()
+        client.post('/login/aux-verify', data={'username': 'ghost', 'answer': 'x'})
+        # 另一个 worker（独立的进程内缓存）先读到第 1 版并缓存
+        other = self._make_app()
+        with other.test_request_context(headers={'Cookie': f"session={self._cookie(client)}"}):
+            from flask import session
+            self.assertEqual(session.get('aux_attempts:ghost'), 1)
+            cached = other.session_interface.cache.get(session.sid)
+        self.assertEqual(cached[0], 1)
+        client.post('/login/aux-verify', data={'username': 'ghost', 'answer': 'x'})
+        with other.test_request_context(headers={'Cookie': f"session={self._cookie(client)}"}):
+            from flask import session
+            self.assertEqual(session.get('aux_attempts:ghost'), 2)
+
+    def test_concurrent_writes_of_same_version_do_not_diverge(self):
+        client = self.app.test_client()
+        client.post('/login/aux-verify', data={'username': 'ghost', 'answer': 'x'})
+        headers = {'Cookie': f"session={self._cookie(client)}"}
+        workers = [self._make_app() for _ in range(2)]
+        # 两个 worker 都先读到第 1 版，再各自修改并写回
+        contexts = [worker.test_request_context(headers=headers) for worker in workers]
+        sessions = []
+        for context in contexts:
+            context.push()
+            sessions.append(context.session)
+        self.assertEqual([session.version for session in sessions], [1, 1])
+        responses = []
+        for i, (worker, session) in enumerate(zip(workers, sessions)):
+            session['writer'] = i
+            response = worker.response_class()
+            worker.session_interface.save_session(worker, session, response)
+            responses.append(response)
+        for context in reversed(contexts):
+            context.pop()
+        # 第一个 worker 写入第 2 版；第二个基于同一版本的写入被拒绝，丢弃缓存且不下发 Cookie
+        self.assertTrue(responses[0].headers.get('Set-Cookie'))
+        self.assertIsNone(responses[1].headers.get('Set-Cookie'))
+        sid = self._cookie(client).split('.')[0]
+        version, data = self.app.extensions['session_store'].load(sid)
+        self.assertEqual(version, 2)
+        self.assertIn('"writer":0', data.replace(' ', ''))
+        self.assertIsNone(workers[1].session_interface.cache.get(sid))
+
+    def test_login_rotates_session_id_and_sweep_removes_expired(self):
+        client = self.app.test_client()
+        client.post('/login/aux-verify', data={'username': 'ghost', 'answer': 'x'})
+        before = self._cookie(client).split('.')[0]
+        response = client.post('/login', data={'username': 'alice', 'password': 'password123'})
+        self.assertEqual(response.status_code, 302)
+        after = self._cookie(client).split('.')[0]
+        self.assertNotEqual(before, after)
+        store = self.app.extensions['session_store']
+        self.assertIsNone(store.load(before))
+
+        with client.session_transaction() as session:
+            sid = session.sid
+        self.assertIsNotNone(store.load(sid))
+        self.assertEqual(store.sweep(time.time() + self.app.permanent_session_lifetime.total_seconds() + 1), 1)
+        self.assertIsNone(store.load(sid))
+
+    def test_in_memory_database_keeps_sessions_off_disk(self):
+        with mock.patch.object(Config, 'SESSION_STORE_PATH', ''):
+            app = self._make_app()
+        store = app.extensions['session_store']
+        self.assertTrue(store.path.startswith('file:') and 'mode=memory' in store.path)
+        client = app.test_client()
+        client.post('/login/aux-verify', data={'username': 'ghost', 'answer': 'x'})
+        with client.session_transaction() as session:
+            self.assertEqual(session['aux_attempts:ghost'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import unittest
+
+from sqlalchemy import event
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.extensions import db
+from simple_notes.models import AppSetting
+from simple_notes.repositories.settings_repo import SettingsRegistry, get_settings
+from simple_notes.services.admin_service import AdminService
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class SettingsRegistryTestCase(unittest.TestCase):
+    """带版本号的设置注册表测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        register_commands(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.statements = []
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_typed_values_and_version(self):
+        registry = get_settings()
+        self.assertEqual(registry.get('max_entries_per_page'), 10)
+        before = registry.version
+        registry.set_many({'max_entries_per_page': 25, 'site_name': '测试'})
+        self.assertEqual(registry.get('max_entries_per_page'), 25)
+        self.assertEqual(registry.get('site_name'), '测试')
+        self.assertEqual(registry.version, before + 1)
+        self.assertEqual(db.session.get(AppSetting, 'max_entries_per_page').value, '25')
+
+    def test_reads_are_served_from_memory(self):
+        service = AdminService()
+        service.is_admin('admin')
+        event.listen(db.engine, 'before_cursor_execute', self._record)
+        try:
+            for _ in range(50):
+                self.assertTrue(service.is_admin('admin'))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', self._record)
+        self.assertEqual(self.statements, [])
+
+    def test_other_workers_refresh_after_interval(self):
+        timer = FakeTimer()
+        worker_a = SettingsRegistry(check_interval=5, timer=timer)
+        worker_b = SettingsRegistry(check_interval=5, timer=timer)
+        self.assertEqual(worker_b.get('login_attempts_limit'), 3)
+
+        worker_a.set('login_attempts_limit', 7)
+        self.assertEqual(worker_a.get('login_attempts_limit'), 7)
+        # 检查间隔内 worker_b 仍使用缓存
+        timer.now += 4
+        self.assertEqual(worker_b.get('login_attempts_limit'), 3)
+        timer.now += 2
+        self.assertEqual(worker_b.get('login_attempts_limit'), 7)
+
+        # 版本号未变化时只查询版本号，不重新加载
+        timer.now += 10
+        event.listen(db.engine, 'before_cursor_execute', self._record)
+        try:
+            worker_b.get('login_attempts_limit')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', self._record)
+        self.assertEqual(len(self.statements), 1)
+        self.assertIn('app_settings.value', self.statements[0])
+
+    def test_invalid_value_falls_back_to_default(self):
+        db.session.add(AppSetting(key='max_entries_per_page', value='lots'))
+        db.session.commit()
+        registry = SettingsRegistry()
+        self.assertEqual(registry.get('max_entries_per_page'), 10)
+
+    def test_init_db_seeds_settings(self):
+        result = self.app.test_cli_runner().invoke(args=['init-db'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        registry = get_settings()
+        self.assertEqual(registry.get('login_attempts_limit'), 5)
+        # init-db 同时执行 bootstrap，写入初始管理员列表
+        self.assertEqual(registry.get('admin_users'), frozenset(self.app.config['ADMIN_USERS']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import text
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.config import Config
+from simple_notes.extensions import db
+from simple_notes.models import User
+from simple_notes.services.note_service import NoteService
+from simple_notes.sharding import HashRing, get_shard_map
+
+
+class HashRingTestCase(unittest.TestCase):
+    def test_adding_a_shard_moves_only_a_fraction_of_users(self):
+        before = HashRing(['s0', 's1', 's2'])
+        after = HashRing(['s0', 's1', 's2', 's3'])
+        moved = [k for k in range(3000) if before.shard_for(k) != after.shard_for(k)]
+        # 理想情况下约 1/4 的用户迁往新分片，且只迁往新分片
+        self.assertLess(len(moved), 3000 * 0.4)
+        self.assertTrue(all(after.shard_for(k) == 's3' for k in moved))
+
+
+class NoteShardingTestCase(unittest.TestCase):
+    """笔记分片测试：一个 SQLite 主库加两个 SQLite 分片"""
+
+    def setUp(self):
+        self.paths = {}
+        for name in ('primary', 's0', 's1'):
+            fd, path = tempfile.mkstemp(suffix=f'-{name}.db')
+            os.close(fd)
+            self.paths[name] = path
+        os.environ['DATABASE_URL'] = f"sqlite:///{self.paths['primary']}"
+        shards = f"s0=sqlite:///{self.paths['s0']},s1=sqlite:///{self.paths['s1']}"
+        with mock.patch.object(Config, 'NOTE_SHARDS', shards), mock.patch.object(Config, 'SESSION_BACKEND', 'cookie'):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        register_commands(self.app)
+        with self.app.app_context():
+            ring = get_shard_map().ring
+            self.users = {}
+            i = 0
+            # 为两个分片各准备一个用户
+            while len(self.users) < 2:
+                i += 1
+                user = User(username=f'user{i}', email=f'user{i}@example.com')
+                user.set_password('password123')
+                db.session.add(user)
+                db.session.commit()
+                self.users.setdefault(ring.shard_for(user.id), (user.id, user.username))
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            for engine in [db.engine, *get_shard_map().engines.values()]:
+                engine.dispose()
+        os.environ.pop('DATABASE_URL', None)
+        for path in self.paths.values():
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def _shard_ids(self, shard, user_id):
+        with self.app.app_context():
+            with get_shard_map().engines[shard].connect() as conn:
+                return {row[0] for row in conn.execute(
+                    text('SELECT id FROM note_entries WHERE user_id = :u'), {'u': user_id}
+                )}
+
+    def test_notes_are_written_to_the_users_shard_with_unique_ids(self):
+        (a_id, _a), (b_id, _b) = self.users['s0'], self.users['s1']
+        with self.app.app_context():
+            service = NoteService()
+            for i in range(3):
+                service.create_entry(a_id, f'a{i}', 'alpha')
+                service.create_entry(b_id, f'b{i}', 'beta')
+        a_ids, b_ids = self._shard_ids('s0', a_id), self._shard_ids('s1', b_id)
+        self.assertEqual((len(a_ids), len(b_ids)), (3, 3))
+        self.assertFalse(a_ids & b_ids)
+        self.assertFalse(self._shard_ids('s1', a_id) | self._shard_ids('s0', b_id))
+        with self.app.app_context():
+            self.assertEqual(db.session.execute(text('SELECT COUNT(*) FROM note_entries')).scalar(), 0)
+            # ID 计数器只有一行，保存已分配的最大 ID
+            self.assertEqual(db.session.execute(text('SELECT id FROM note_id_sequence')).scalars().all(),
+                             [max(a_ids | b_ids)])
+
+        with self.app.app_context():
+            service = NoteService()
+            entry = service.get_entry_by_id(min(b_ids), b_id)
+            ok, _msg = service.update_entry(entry, '改过的', 'beta 2')
+            self.assertTrue(ok)
+            # 提交后对象过期，重新加载也应回到所在分片
+            self.assertEqual(entry.title, '改过的')
+            self.assertIsNone(service.get_entry_by_id(min(b_ids), a_id))
+            titles = [e.title for e in service.repo.list_of_user_keyset(b_id).items]
+            self.assertEqual(titles, ['b2', 'b1', '改过的'])
+
+    def test_admin_listings_merge_shards_by_created_at(self):
+        (a_id, _a), (b_id, _b) = self.users['s0'], self.users['s1']
+        with self.app.app_context():
+            service = NoteService()
+            for i in range(5):
+                service.create_entry(a_id if i % 2 else b_id, f'n{i}', 'x')
+        with self.app.app_context():
+            repo = NoteService().repo
+            page = repo.paginate_all(page=1, per_page=3)
+            self.assertEqual([e.title for e in page.items], ['n4', 'n3', 'n2'])
+            self.assertEqual(page.total, 5)
+            self.assertEqual([e.title for e in repo.paginate_all(page=2, per_page=3).items], ['n1', 'n0'])
+            deep = repo.paginate_all(page=1000, per_page=20)
+            self.assertEqual((deep.items, deep.total), ([], 5))
+
+            first = repo.paginate_all_keyset(per_page=2)
+            self.assertEqual([e.title for e in first.items], ['n4', 'n3'])
+            second = repo.paginate_all_keyset(after=first.next_cursor, per_page=2)
+            self.assertEqual([e.title for e in second.items], ['n2', 'n1'])
+            back = repo.paginate_all_keyset(before=second.prev_cursor, per_page=2)
+            self.assertEqual([e.title for e in back.items], ['n4', 'n3'])
+
+    def test_rebalance_moves_user_notes_in_batches(self):
+        user_id, username = self.users['s0']
+        with self.app.app_context():
+            for i in range(5):
+                NoteService().create_entry(user_id, f'm{i}', 'move me')
+        moved_ids = self._shard_ids('s0', user_id)
+
+        result = self.app.test_cli_runner().invoke(
+            args=['rebalance-user', username, '--to', 's1', '--batch-size', '2', '--wait', '0']
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('共 5 篇笔记', result.output)
+        self.assertEqual(self._shard_ids('s0', user_id), set())
+        self.assertEqual(self._shard_ids('s1', user_id), moved_ids)
+
+        with self.app.app_context():
+            service = NoteService()
+            self.assertEqual(service.repo.count_by_user(user_id), 5)
+            service.create_entry(user_id, 'after', 'new note')
+            titles = [e.title for e in service.repo.list_of_user_keyset(user_id, per_page=10).items]
+            self.assertEqual(titles, ['after', 'm4', 'm3', 'm2', 'm1', 'm0'])
+        self.assertEqual(len(self._shard_ids('s1', user_id)), 6)
+
+    def test_notes_on_both_shards_during_move_are_counted_once(self):
+        from simple_notes.repositories.shard_repo import NoteShardRepository
+        from simple_notes.repositories.stats_repo import UserStatsRepository
+
+        user_id, _username = self.users['s0']
+        with self.app.app_context():
+            for i in range(3):
+                NoteService().create_entry(user_id, f'd{i}', 'copy me')
+            # 模拟 move_user 复制了前两篇、尚未从源分片删除
+            repo = NoteShardRepository()
+            repo.set_assignment(user_id, 's0', 's1')
+            repo.commit()
+            rows = repo.fetch_user_batch('s0', user_id, 2)
+            repo.copy_rows('s1', [{**row, 'title': row['title'] + '@s1'} for row in rows])
+        self.assertEqual(len(self._shard_ids('s0', user_id) & self._shard_ids('s1', user_id)), 2)
+
+        with self.app.app_context():
+            repo = NoteService().repo
+            expected = ['d2', 'd1@s1', 'd0@s1']
+            self.assertEqual([e.title for e in repo.list_of_user_keyset(user_id).items], expected)
+            self.assertEqual([e.title for e in repo.paginate_all(page=1, per_page=10).items], expected)
+            first = repo.paginate_all_keyset(per_page=2)
+            self.assertEqual([e.title for e in first.items], expected[:2])
+            second = repo.paginate_all_keyset(after=first.next_cursor, per_page=2)
+            self.assertEqual([e.title for e in second.items], expected[2:])
+            self.assertEqual(UserStatsRepository().aggregate([user_id]), {user_id: (3, 3 * len('copy me'))})
+
+
+if __name__ == '__main__':
+    unittest.main()
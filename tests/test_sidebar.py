@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from sqlalchemy import event
+
+from simple_notes import create_app
+from simple_notes.extensions import db
+from simple_notes.models import User
+from simple_notes.services.note_service import NoteService
+
+
+class SidebarCacheTestCase(unittest.TestCase):
+    """侧边栏投影查询与缓存测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.user = User(username='sidebar', email='sidebar@example.com')
+        self.user.set_password('password123')
+        db.session.add(self.user)
+        db.session.commit()
+        self.service = NoteService()
+        self.service.create_entry(self.user.id, '第一篇', 'x' * 10000)
+        self.service.create_entry(self.user.id, '第二篇', 'y' * 10000)
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self._record)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self._record)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _sidebar_queries(self):
+        return [s for s in self.statements if 'date(note_entries.created_at)' in s]
+
+    def test_projection_skips_content(self):
+        days = self.service.get_sidebar_days(self.user.id)
+        self.assertEqual(len(days), 1)
+        self.assertEqual([i.title for i in days[0][1]], ['第二篇', '第一篇'])
+        (sql,) = self._sidebar_queries()
+        self.assertNotIn('content', sql)
+
+    def test_cache_is_reused_and_invalidated_by_writes(self):
+        self.service.get_sidebar_days(self.user.id)
+        self.service.get_sidebar_days(self.user.id)
+        self.assertEqual(len(self._sidebar_queries()), 1)
+
+        self.service.create_entry(self.user.id, '第三篇', 'z')
+        days = self.service.get_sidebar_days(self.user.id)
+        self.assertEqual(days[0][1][0].title, '第三篇')
+        self.assertEqual(len(self._sidebar_queries()), 2)
+
+    def test_warm_page_render_does_no_sidebar_work(self):
+        client = self.app.test_client()
+        client.post('/login', data={'username': 'sidebar', 'password': 'password123'})
+        first = client.get('/')
+        self.assertIn('今天'.encode('utf-8'), first.data)
+        self.assertEqual(len(self._sidebar_queries()), 1)
+        second = client.get('/')
+        self.assertEqual(second.status_code, 200)
+        self.assertIn('第一篇'.encode('utf-8'), second.data)
+        self.assertEqual(len(self._sidebar_queries()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.stylesheets import (
+    BUNDLE_NAME, STYLESHEETS, LessError, compile_less, drop_unused_keyframes, init_stylesheets, minify_css, purge_css,
+)
+
+
+class StylesheetPipelineTestCase(unittest.TestCase):
+    def test_compile_less_nesting_and_variables(self):
+        css = compile_less('@gap: 4px;\n.a {\n  // 注释\n  &:hover { margin: @gap; }\n  .b, .c { color: red }\n}')
+        self.assertEqual(css, '.a:hover {\n  margin: 4px;\n}\n.a .b,\n.a .c {\n  color: red;\n}\n')
+        with self.assertRaises(LessError):
+            compile_less('.a { .mixin(); }')
+
+    def test_purge_and_minify(self):
+        css = ('.used, .unused { color: red; }\n'
+               '@media (min-width: 1px) { .unused { top: 0; } }\n'
+               '.alert-danger:hover > p { color: blue; }\n'
+               '[data-bs-theme=dark] { color: #000; }\n'
+               '@keyframes spin { to { top: 1px; } }\n')
+        purged = drop_unused_keyframes(purge_css(css, {'used', 'p'}, ('alert-',)))
+        self.assertEqual(minify_css(purged), '.used{color:red}.alert-danger:hover>p{color:blue}')
+
+
+class BuildCssCommandTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        register_commands(self.app)
+        # 在静态目录的副本上构建，不改动源码树
+        self.static = os.path.join(tempfile.mkdtemp(prefix='static-'), 'static')
+        shutil.copytree(self.app.static_folder, self.static)
+        self.app.static_folder = self.static
+
+    def tearDown(self):
+        os.environ.pop('DATABASE_URL', None)
+        shutil.rmtree(os.path.dirname(self.static), ignore_errors=True)
+
+    def test_bundle_is_built_and_linked(self):
+        result = self.app.test_cli_runner().invoke(args=['build-css'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(os.path.join(self.static, BUNDLE_NAME), encoding='utf-8') as f:
+            bundle = f.read()
+        self.assertLess(len(bundle), os.path.getsize(os.path.join(self.static, 'vendor/bootstrap/bootstrap.min.css')) / 2)
+        self.assertIn('.wide-container{', bundle)
+        self.assertIn('.alert-danger', bundle)  # 模板中的 alert-{{ category }}
+        self.assertNotIn('.accordion', bundle)
+
+        init_stylesheets(self.app)
+        html = self.app.test_client().get('/login').get_data(as_text=True)
+        self.assertIn(BUNDLE_NAME, html)
+        self.assertNotIn('bootstrap.min.css', html)
+
+    def test_bundle_sources_match_unbundled_links(self):
+        # 合并与未合并两种模式引用相同的样式表，渲染结果一致
+        html = self.app.test_client().get('/login').get_data(as_text=True)
+        links = [href for href in re.findall(r'href="/static/([^"]+\.css)"', html) if 'bootstrap-icons' not in href]
+        self.assertEqual(links, [re.sub(r'\.less$', '.css', name) for name in STYLESHEETS])
+
+
+if __name__ == '__main__':
+    unittest.main()
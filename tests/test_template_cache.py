@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.config import Config
+
+
+class TemplateBytecodeCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix='jinja-')
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.patches = [
+            mock.patch.object(Config, 'TEMPLATE_CACHE_DIR', self.cache_dir),
+            mock.patch.object(Config, 'TEMPLATE_BYTECODE_CACHE', True),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        os.environ.pop('DATABASE_URL', None)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_precompiled_templates_render_without_compiling(self):
+        app = create_app()
+        register_commands(app)
+        result = app.test_cli_runner().invoke(args=['precompile-templates'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        count = len([n for n in app.jinja_env.list_templates() if n.endswith('.html')])
+        self.assertIn(f'已编译 {count} 个模板', result.output)
+        self.assertEqual(len(os.listdir(self.cache_dir)), count)
+
+        # 新的 worker：登录页及其父模板都从字节码缓存加载
+        fresh = create_app()
+        with mock.patch.object(fresh.jinja_env, 'compile', side_effect=AssertionError('compiled')):
+            response = fresh.test_client().get('/login')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_can_be_disabled(self):
+        with mock.patch.object(Config, 'TEMPLATE_BYTECODE_CACHE', False):
+            app = create_app()
+        self.assertIsNone(app.jinja_env.bytecode_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import unittest
+import unittest.mock
+
+from simple_notes import create_app
+from simple_notes.cli import register_commands
+from simple_notes.extensions import db
+from simple_notes.models import User, NoteEntry, UserStats
+from simple_notes.services.note_service import NoteService
+from simple_notes.services.admin_service import AdminService
+
+
+class UserStatsTestCase(unittest.TestCase):
+    """每用户统计计数器测试"""
+
+    def setUp(self):
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        register_commands(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.user = User(username='counter', email='counter@example.com')
+        self.user.set_password('password123')
+        db.session.add(self.user)
+        db.session.commit()
+        self.service = NoteService()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        os.environ.pop('DATABASE_URL', None)
+
+    def _stats(self):
+        db.session.expire_all()
+        return db.session.get(UserStats, self.user.id)
+
+    def test_counters_follow_note_writes(self):
+        ok, _msg, first = self.service.create_entry(self.user.id, 'a', '你好')
+        self.assertTrue(ok)
+        self.service.create_entry(self.user.id, 'b', 'abc')
+        stats = self._stats()
+        self.assertEqual((stats.note_count, stats.content_bytes), (2, 9))
+
+        self.service.update_entry(first, 'a', 'hello world')
+        self.assertEqual(self._stats().content_bytes, 14)
+
+        self.service.delete_entry(first)
+        stats = self._stats()
+        self.assertEqual((stats.note_count, stats.content_bytes), (1, 3))
+
+        entry = NoteEntry.query.filter_by(user_id=self.user.id).first()
+        AdminService().delete_entry(entry)
+        stats = self._stats()
+        self.assertEqual((stats.note_count, stats.content_bytes), (0, 0))
+
+    def test_pagination_total_comes_from_stats(self):
+        for i in range(3):
+            self.service.create_entry(self.user.id, f't{i}', 'x')
+        # 篡改计数以确认分页总数读自统计行而非 COUNT(*)
+        self._stats().note_count = 42
+        db.session.commit()
+        pagination = self.service.repo.list_of_user_paginated(self.user.id, page=1, per_page=2)
+        self.assertEqual(pagination.total, 42)
+        self.assertEqual(pagination.pages, 21)
+        self.assertEqual(len(pagination.items), 2)
+
+    def test_user_delete_cascades_stats(self):
+        self.service.create_entry(self.user.id, 't', 'x')
+        user_id = self.user.id
+        db.session.delete(self.user)
+        db.session.commit()
+        self.assertEqual(UserStats.query.filter_by(user_id=user_id).count(), 0)
+
+    def test_rebuild_stats_command(self):
+        db.session.add(NoteEntry(user_id=self.user.id, title='raw', content='abcd'))
+        db.session.add(NoteEntry(user_id=self.user.id, title='raw', content='ef'))
+        db.session.commit()
+        self.assertIsNone(self._stats())
+        result = self.app.test_cli_runner().invoke(args=['rebuild-stats', '--batch-size', '1'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        stats = self._stats()
+        self.assertEqual((stats.note_count, stats.content_bytes), (2, 6))
+
+    def test_total_counts_users_without_stats(self):
+        other = User(username='legacy', email='legacy@example.com')
+        other.set_password('password123')
+        db.session.add(other)
+        db.session.commit()
+        # 统计表上线前写入的笔记没有统计行
+        db.session.add(NoteEntry(user_id=other.id, title='raw', content='abcd'))
+        db.session.commit()
+        self.service.create_entry(self.user.id, 't', 'x')
+        self.assertEqual(self.service.repo.get_total_count(), 2)
+        self.assertEqual(self.service.repo.stats_repo.backfill_missing(), 1)
+        self.assertEqual(db.session.get(UserStats, other.id).note_count, 1)
+        self.assertEqual(self.service.repo.get_total_count(), 2)
+
+    def test_first_write_tolerates_concurrent_insert(self):
+        # 模拟另一个事务抢先插入了统计行
+        db.session.add(NoteEntry(user_id=self.user.id, title='raw', content='ab'))
+        db.session.add(UserStats(user_id=self.user.id, note_count=1, content_bytes=2))
+        db.session.flush()
+        repo = self.service.repo.stats_repo
+        with unittest.mock.patch.object(repo, '_increment', side_effect=[0, 1]) as increment:
+            repo.apply_delta(self.user.id, notes=1, content_bytes=2)
+        self.assertEqual(increment.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()